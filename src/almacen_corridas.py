@@ -0,0 +1,347 @@
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from recolector import estado_agentes, posiciones_agentes, paso_actual
+
+# --- 1. FORMATO EN DISCO ---
+# Cada corrida es una carpeta con archivos binarios planos de una fila por
+# paso recogido (paso x agente), legibles con np.memmap sin cargarlos en RAM:
+#   felicidad.bin, x.bin, y.bin  -> (pasos, N)
+#   pasos.bin                    -> número de paso de cada fila
+#   ids.npy, sociabilidad.npy    -> por agente (no cambian durante la corrida)
+#   meta.json                    -> parámetros y dimensiones
+# En la carpeta del almacén, indice.jsonl tiene una línea JSON por corrida
+# creada (clave, parámetros y dimensiones): las búsquedas leen ese archivo en
+# lugar de abrir el meta.json de cada corrida.
+INDICE = "indice.jsonl"
+DTYPE_FELICIDAD = np.dtype(np.float64)
+# Las coordenadas caben en 32 bits en cualquier rejilla razonable
+DTYPE_POSICION = np.dtype(np.int32)
+DTYPE_PASO = np.dtype(np.int64)
+
+
+def clave_corrida(parametros):
+    """Identificador de una corrida a partir de sus parámetros (los mismos dan la misma clave)."""
+    texto = json.dumps(parametros, sort_keys=True, default=str)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()[:16]
+
+def _anotar_indice(ruta_almacen, clave, meta):
+    """
+    Añade la corrida al índice del almacén. Una sola escritura en modo
+    O_APPEND: varios procesos pueden anotar corridas a la vez sin mezclar
+    líneas ni perder ninguna.
+    """
+    entrada = {"clave": clave, **{k: meta[k] for k in ("parametros", "N", "width", "height")}}
+    linea = (json.dumps(entrada, default=str) + "\n").encode("utf-8")
+    fd = os.open(os.path.join(ruta_almacen, INDICE), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o666)
+    try:
+        os.write(fd, linea)
+    finally:
+        os.close(fd)
+
+
+# --- 2. ESCRITURA ---
+class RecolectorCorrida:
+    """
+    Recolector (parámetro 'recolector' de SocialModel y MotorSocial) que
+    añade en cada paso la felicidad y la posición de todos los agentes a los
+    archivos de una corrida del almacén. Se crea con AlmacenCorridas.nueva_corrida.
+
+    :param intervalo: Solo se recoge cada 'intervalo' pasos.
+    """
+
+    def __init__(self, ruta, parametros, intervalo=1):
+        if intervalo < 1:
+            raise ValueError(f"intervalo debe ser un número de pasos positivo, no {intervalo}.")
+        self.ruta = ruta
+        self.parametros = parametros
+        self.intervalo = intervalo
+        os.makedirs(ruta, exist_ok=True)
+        # Una corrida con los mismos parámetros sustituye a la anterior
+        for nombre in ("felicidad.bin", "x.bin", "y.bin", "pasos.bin", "meta.json"):
+            if os.path.exists(os.path.join(ruta, nombre)):
+                os.remove(os.path.join(ruta, nombre))
+        self._iniciada = False
+
+    def _iniciar(self, model, ids, sociability):
+        # Orden de las filas: el de estado_agentes, que no cambia entre pasos
+        np.save(os.path.join(self.ruta, "ids.npy"), np.asarray(ids, dtype=np.int64))
+        np.save(os.path.join(self.ruta, "sociabilidad.npy"), np.asarray(sociability, dtype=float))
+        meta = {
+            "parametros": self.parametros,
+            "N": len(ids),
+            "width": model.width,
+            "height": model.height,
+            "intervalo": self.intervalo,
+            "felicidad": DTYPE_FELICIDAD.str,
+            "posicion": DTYPE_POSICION.str,
+        }
+        # meta.json se escribe al final: una corrida sin él no aparece en el índice
+        temporal = os.path.join(self.ruta, "meta.json.tmp")
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(meta, f, default=str)
+        os.replace(temporal, os.path.join(self.ruta, "meta.json"))
+        ruta = os.path.normpath(self.ruta)
+        _anotar_indice(os.path.dirname(ruta), os.path.basename(ruta), meta)
+        self._iniciada = True
+
+    def collect(self, model):
+        step = paso_actual(model)
+        if step % self.intervalo:
+            return
+
+        ids, happiness, sociability = estado_agentes(model)
+        x, y = posiciones_agentes(model)
+        if not self._iniciada:
+            self._iniciar(model, ids, sociability)
+
+        # El paso se escribe el último: marca la fila como completa
+        for nombre, valores, dtype in (("felicidad.bin", happiness, DTYPE_FELICIDAD),
+                                       ("x.bin", x, DTYPE_POSICION),
+                                       ("y.bin", y, DTYPE_POSICION),
+                                       ("pasos.bin", [step], DTYPE_PASO)):
+            with open(os.path.join(self.ruta, nombre), "ab") as f:
+                np.asarray(valores, dtype=dtype).tofile(f)
+
+    def estadisticas(self):
+        """Tabla por paso con las mismas columnas que MotorSocial.estadisticas."""
+        return Corrida(self.ruta).estadisticas()
+
+
+# --- 3. LECTURA ---
+class Corrida:
+    """
+    Una corrida guardada. felicidad, x e y son arrays (pasos, N) mapeados en
+    memoria: las consultas solo leen de disco las filas o columnas que tocan.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        with open(os.path.join(ruta, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.clave = os.path.basename(os.path.normpath(ruta))
+        self.parametros = meta["parametros"]
+        self.N = meta["N"]
+        self.width = meta["width"]
+        self.height = meta["height"]
+
+        self.pasos = self._mapear("pasos.bin", DTYPE_PASO, None)
+        # Filas completas: las que ya tienen su número de paso
+        self.n_pasos = len(self.pasos)
+        self.felicidad = self._mapear("felicidad.bin", np.dtype(meta["felicidad"]), self.N)
+        self.x = self._mapear("x.bin", np.dtype(meta["posicion"]), self.N)
+        self.y = self._mapear("y.bin", np.dtype(meta["posicion"]), self.N)
+        self.ids = np.load(os.path.join(ruta, "ids.npy"), mmap_mode="r")
+        self.sociabilidad = np.load(os.path.join(ruta, "sociabilidad.npy"), mmap_mode="r")
+
+    def _mapear(self, nombre, dtype, columnas):
+        ruta = os.path.join(self.ruta, nombre)
+        tam = os.path.getsize(ruta) if os.path.exists(ruta) else 0
+        if columnas is None:
+            filas = tam // dtype.itemsize
+            forma = (filas,)
+        else:
+            filas = min(tam // (dtype.itemsize * max(columnas, 1)), self.n_pasos)
+            forma = (filas, columnas)
+        if filas == 0:
+            return np.zeros(forma, dtype=dtype)
+        return np.memmap(ruta, dtype=dtype, mode="r", shape=forma)
+
+    def _fila_agente(self, agent_id):
+        # Con ids 0..N-1 en orden la fila es el propio id
+        if 0 <= agent_id < self.N and self.ids[agent_id] == agent_id:
+            return agent_id
+        filas = np.flatnonzero(self.ids == agent_id)
+        if len(filas) == 0:
+            raise KeyError(f"No hay ningún agente con id {agent_id} en la corrida {self.clave}.")
+        return filas[0]
+
+    def _fila_paso(self, paso):
+        fila = np.searchsorted(self.pasos, paso)
+        if fila >= self.n_pasos or self.pasos[fila] != paso:
+            raise KeyError(f"El paso {paso} no se recogió en la corrida {self.clave}.")
+        return fila
+
+    def trayectoria(self, agent_id):
+        """Felicidad de un agente en cada paso recogido (Series indexada por Step)."""
+        fila = self._fila_agente(agent_id)
+        return pd.Series(np.array(self.felicidad[:, fila]), index=np.array(self.pasos),
+                         name="Felicidad").rename_axis("Step")
+
+    def estado(self, paso):
+        """(x, y, felicidad) de todos los agentes en un paso, como vistas sobre el disco."""
+        fila = self._fila_paso(paso)
+        return self.x[fila], self.y[fila], self.felicidad[fila]
+
+    def rejilla(self, paso):
+        """
+        Instantánea de la rejilla en un paso: (ocupacion, felicidad_media),
+        ambas de width x height; la felicidad media es NaN en las celdas vacías.
+        """
+        x, y, happiness = self.estado(paso)
+        celdas = np.asarray(x, dtype=np.int64) * self.height + y
+        total = self.width * self.height
+        ocupacion = np.bincount(celdas, minlength=total)
+        suma = np.bincount(celdas, weights=happiness, minlength=total)
+        media = np.divide(suma, ocupacion, out=np.full(total, np.nan), where=ocupacion > 0)
+        forma = (self.width, self.height)
+        return ocupacion.reshape(forma), media.reshape(forma)
+
+    def estadisticas(self):
+        """Tabla por paso con las mismas columnas que MotorSocial.estadisticas (recorre la corrida)."""
+        felicidad = self.felicidad
+        return pd.DataFrame({
+            "Step": np.array(self.pasos),
+            "Felicidad_media": felicidad.mean(axis=1),
+            "Felicidad_std": felicidad.std(axis=1, ddof=1) if self.N > 1 else np.nan,
+            "Sociabilidad_media": float(np.mean(self.sociabilidad)),
+        })
+
+
+# --- 4. ALMACÉN ---
+class AlmacenCorridas:
+    """
+    Carpeta con una subcarpeta por corrida (nombrada con clave_corrida de sus
+    parámetros) y un índice de parámetros, indice.jsonl, al que cada corrida
+    añade su línea al crearse: varios procesos pueden escribir corridas a la
+    vez sin coordinarse. Cada objeto lee del índice solo las líneas nuevas
+    desde la consulta anterior. Un almacén sin índice (de una versión
+    anterior) lo reconstruye a partir de los meta.json la primera vez.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        os.makedirs(ruta, exist_ok=True)
+        self._entradas = {}
+        self._leido = 0
+
+    def nueva_corrida(self, parametros, intervalo=1):
+        """
+        Recolector para una corrida nueva con estos parámetros (p. ej. red, N,
+        seed, alpha). Si ya hay una corrida con los mismos parámetros se
+        sustituye: con seed=None conviene añadir algo que las distinga.
+        """
+        return RecolectorCorrida(os.path.join(self.ruta, clave_corrida(parametros)),
+                                 parametros, intervalo=intervalo)
+
+    def _reconstruir_indice(self):
+        # Por anotaciones, igual que las corridas: si alguna se anota a la vez
+        # solo queda repetida, y al leer manda la última línea de cada clave
+        open(os.path.join(self.ruta, INDICE), "ab").close()
+        for clave in sorted(os.listdir(self.ruta)):
+            ruta_meta = os.path.join(self.ruta, clave, "meta.json")
+            if not os.path.exists(ruta_meta):
+                continue
+            with open(ruta_meta, encoding="utf-8") as f:
+                _anotar_indice(self.ruta, clave, json.load(f))
+
+    def _actualizar_indice(self):
+        """Lee las líneas del índice añadidas desde la última consulta."""
+        ruta = os.path.join(self.ruta, INDICE)
+        if not os.path.exists(ruta):
+            self._reconstruir_indice()
+        if os.path.getsize(ruta) < self._leido:
+            # El índice se ha sustituido: se vuelve a leer entero
+            self._entradas, self._leido = {}, 0
+        with open(ruta, "rb") as f:
+            f.seek(self._leido)
+            nuevo = f.read()
+        # Una línea sin salto final aún se está escribiendo
+        completo = nuevo[:nuevo.rfind(b"\n") + 1]
+        self._leido += len(completo)
+        for linea in completo.splitlines():
+            try:
+                entrada = json.loads(linea)
+            except ValueError:
+                continue
+            self._entradas[entrada["clave"]] = entrada
+
+    def _tabla(self, entradas):
+        # Los pasos recogidos se miran en disco (crecen durante la corrida);
+        # sin meta.json la corrida se está sustituyendo o se ha borrado
+        filas = []
+        for entrada in entradas:
+            carpeta = os.path.join(self.ruta, entrada["clave"])
+            if not os.path.exists(os.path.join(carpeta, "meta.json")):
+                continue
+            ruta_pasos = os.path.join(carpeta, "pasos.bin")
+            n_pasos = os.path.getsize(ruta_pasos) // DTYPE_PASO.itemsize if os.path.exists(ruta_pasos) else 0
+            filas.append({"clave": entrada["clave"], **entrada["parametros"], "N": entrada["N"],
+                          "width": entrada["width"], "height": entrada["height"],
+                          "pasos_recogidos": n_pasos})
+        return pd.DataFrame(filas)
+
+    def indice(self):
+        """Una fila por corrida: clave, parámetros, N, width, height y pasos recogidos."""
+        self._actualizar_indice()
+        return self._tabla(self._entradas[clave] for clave in sorted(self._entradas))
+
+    def buscar(self, **filtros):
+        """
+        Corridas cuyos parámetros cumplen todos los filtros. Cada filtro es un
+        valor exacto, una lista de valores admitidos o un rango (min, max)
+        inclusivo, p. ej. buscar(alpha=(0.3, 0.5), red=["FB", "IG"]).
+        Se filtra sobre el índice y solo se mira en disco cada corrida encontrada.
+        """
+        self._actualizar_indice()
+        claves = sorted(self._entradas)
+        parametros = pd.DataFrame(
+            [{**self._entradas[c]["parametros"], "N": self._entradas[c]["N"],
+              "width": self._entradas[c]["width"], "height": self._entradas[c]["height"]}
+             for c in claves],
+            index=claves)
+        seleccion = pd.Series(True, index=parametros.index)
+        for columna, condicion in filtros.items():
+            if columna not in parametros:
+                return self._tabla([])
+            valores = parametros[columna]
+            if isinstance(condicion, tuple):
+                seleccion &= valores.between(*condicion)
+            elif isinstance(condicion, list):
+                seleccion &= valores.isin(condicion)
+            else:
+                seleccion &= valores == condicion
+        return self._tabla(self._entradas[c] for c in parametros.index[seleccion])
+
+    def corrida(self, clave):
+        """Abre una corrida por su clave (o por su diccionario de parámetros)."""
+        if isinstance(clave, dict):
+            clave = clave_corrida(clave)
+        return Corrida(os.path.join(self.ruta, clave))
+
+
+# --- 5. LÍNEA DE COMANDOS ---
+def _valor(texto):
+    try:
+        return float(texto)
+    except ValueError:
+        return texto
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consultas sobre un almacén de corridas.")
+    parser.add_argument("ruta", help="Carpeta del almacén")
+    parser.add_argument("--filtro", nargs="+", default=[], metavar="CLAVE=VALOR|MIN:MAX",
+                        help="Parámetros de las corridas a listar, p. ej. alpha=0.3:0.5 red=FB")
+    parser.add_argument("--agente", type=int, default=None,
+                        help="Muestra la trayectoria de este agente en cada corrida encontrada")
+    args = parser.parse_args()
+
+    filtros = {}
+    for filtro in args.filtro:
+        clave, separador, texto = filtro.partition("=")
+        if not separador or not clave:
+            parser.error(f"--filtro espera CLAVE=VALOR o CLAVE=MIN:MAX, no '{filtro}'.")
+        filtros[clave] = tuple(map(_valor, texto.split(":", 1))) if ":" in texto else _valor(texto)
+
+    almacen = AlmacenCorridas(args.ruta)
+    encontradas = almacen.buscar(**filtros)
+    print(encontradas.to_string(index=False) if len(encontradas) else "Ninguna corrida.")
+    if args.agente is not None:
+        for clave in encontradas["clave"] if len(encontradas) else []:
+            print(f"\n[{clave}]")
+            print(almacen.corrida(clave).trayectoria(args.agente).to_string())
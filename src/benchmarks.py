@@ -0,0 +1,306 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows: no hay ru_maxrss
+    resource = None
+
+from graphics import SocialModel, obtener_ruta_datos
+from motor_vectorizado import MotorSocial
+from motor_teselas import MotorTeselado
+from poblacion import inicializar_agentes, DistribucionConjunta, poblacion_sintetica
+from modelo_felicidad import calculate_happiness, calculate_sociability_from_happiness
+from cache_datos import CARPETA_CACHE
+from filtra_datos import COLUMNAS_RED, procesar_redes
+from calibrado_aunado import calcular_correlacion, metricas_alphas
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SRC_DIR)
+
+# Configuraciones de graphics.py (menú de lanzar_servidor)
+CONFIG_REDES = {
+    "FB": {"N": 400, "file": "model_FB.xlsx"},
+    "IG": {"N": 267, "file": "model_IG.xlsx"},
+    "X": {"N": 371, "file": "model_X.xlsx"},
+}
+
+
+# --- 1. BENCHMARKS ---
+# Cada función devuelve un diccionario de métricas; el tiempo total y la
+# memoria pico los añade _medir.
+
+def bench_social_model(N, width, height, pasos, red="FB", simultanea=False):
+    ruta = obtener_ruta_datos(CONFIG_REDES[red]["file"])
+    inicio = time.perf_counter()
+    model = SocialModel(N, width, height, ruta, seed=0, actualizacion_simultanea=simultanea)
+    construido = time.perf_counter()
+    for _ in range(pasos):
+        model.step()
+    fin = time.perf_counter()
+    return {
+        "construccion_s": construido - inicio,
+        "pasos_s": fin - construido,
+        "agent_steps_por_s": N * pasos / (fin - construido),
+    }
+
+def bench_memoria_agentes(N, width, height, red="FB"):
+    # Memoria asignada por Python al construir el modelo (arrays de agentes e
+    # índice por celda), sin el Excel ya leído
+    ruta = obtener_ruta_datos(CONFIG_REDES[red]["file"])
+    SocialModel(10, width, height, ruta, seed=0)
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    model = SocialModel(N, width, height, ruta, seed=0)
+    bytes_modelo = tracemalloc.get_traced_memory()[0] - antes
+    tracemalloc.stop()
+    return {"bytes_por_agente": bytes_modelo / model.num_agents}
+
+def bench_motor_vectorizado(N, width, height, pasos, red="FB"):
+    ruta = obtener_ruta_datos(CONFIG_REDES[red]["file"])
+    inicio = time.perf_counter()
+    motor = MotorSocial(N, width, height, ruta, seed=0)
+    construido = time.perf_counter()
+    motor.run(pasos)
+    fin = time.perf_counter()
+    return {
+        "construccion_s": construido - inicio,
+        "pasos_s": fin - construido,
+        "agent_steps_por_s": N * pasos / (fin - construido),
+    }
+
+def bench_motor_teselas(N, width, height, pasos, teselas=None):
+    # Población sintética: con millones de agentes el Excel solo se repetiría
+    agentes = inicializar_agentes(None, None, N, width, height, seed=0)
+    inicio = time.perf_counter()
+    with MotorTeselado(N, width, height, agentes_iniciales=agentes, seed=0,
+                       teselas=teselas) as motor:
+        construido = time.perf_counter()
+        motor.avanzar(pasos)
+        fin = time.perf_counter()
+    return {
+        "construccion_s": construido - inicio,
+        "pasos_s": fin - construido,
+        "agent_steps_por_s": N * pasos / (fin - construido),
+    }
+
+def bench_poblacion_sintetica(N, width, height, red="FB"):
+    distribucion = DistribucionConjunta.desde_modelo(obtener_ruta_datos(CONFIG_REDES[red]["file"]))
+    inicio = time.perf_counter()
+    poblacion_sintetica(distribucion, N, width, height, seed=0)
+    return {"elementos_por_s": N / (time.perf_counter() - inicio)}
+
+def bench_calculate_happiness(n, n_alphas=1, n_horas=1):
+    factores = np.random.default_rng(0).integers(0, 6, n)
+    alphas = np.linspace(0, 1, n_alphas) if n_alphas > 1 else 0.3
+    horas = np.linspace(1, 12, n_horas) if n_horas > 1 else 8
+    inicio = time.perf_counter()
+    felicidad = calculate_happiness(alphas, factores, horas=horas)
+    fin = time.perf_counter()
+    return {"elementos_por_s": felicidad.size / (fin - inicio)}
+
+def bench_calculate_sociability(n):
+    happiness = np.random.default_rng(0).uniform(0, 5, n)
+    inicio = time.perf_counter()
+    sociabilidad = calculate_sociability_from_happiness(happiness, 0.3)
+    fin = time.perf_counter()
+    return {"elementos_por_s": sociabilidad.size / (fin - inicio)}
+
+def bench_procesar_datos():
+    # Se trabaja sobre una copia para no tocar clean_data. Sin la caché
+    # columnar de data/: se mide la lectura del Excel, no un acierto de caché
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copytree(os.path.join(PROJECT_ROOT, "data"), os.path.join(tmp, "data"),
+                        ignore=shutil.ignore_patterns("*.pdf", "*.xls", CARPETA_CACHE))
+        inicio = time.perf_counter()
+        procesar_redes(dict(COLUMNAS_RED), raiz=tmp)
+        fin = time.perf_counter()
+    return {"procesado_s": fin - inicio}
+
+def bench_calcular_correlacion(red="FB"):
+    # Copia de los dos Excel en una carpeta sin caché columnar: se mide la
+    # lectura y el cálculo, no un acierto de caché
+    with tempfile.TemporaryDirectory() as tmp:
+        rutas = []
+        for nombre in (f"3145_data_clean_{red}.xlsx", f"model_{red}.xlsx"):
+            rutas.append(os.path.join(tmp, nombre))
+            shutil.copy2(obtener_ruta_datos(nombre), rutas[-1])
+        inicio = time.perf_counter()
+        calcular_correlacion(red, *rutas)
+        fin = time.perf_counter()
+    return {"correlacion_s": fin - inicio}
+
+def bench_metricas_calibrado(n_alphas, bootstrap, red="FB"):
+    alphas = np.linspace(0, 1, n_alphas)
+    inicio = time.perf_counter()
+    metricas_alphas(f"3145_data_clean_{red}.xlsx", alphas, bootstrap=bootstrap, seed=0)
+    return {"metricas_s": time.perf_counter() - inicio}
+
+
+def definir_benchmarks(rapido=False):
+    """Lista de (nombre, función, kwargs). 'rapido' reduce pasos y tamaños."""
+    pasos = 10 if rapido else 50
+    benchmarks = [
+        (f"social_model_{red}", bench_social_model,
+         {"N": cfg["N"], "width": 30, "height": 30, "pasos": pasos, "red": red})
+        for red, cfg in CONFIG_REDES.items()
+    ]
+    benchmarks += [
+        ("social_model_FB_simultanea", bench_social_model,
+         {"N": 400, "width": 30, "height": 30, "pasos": pasos, "simultanea": True}),
+        ("social_model_2k_60x60", bench_social_model,
+         {"N": 2000, "width": 60, "height": 60, "pasos": pasos // 5}),
+        ("memoria_agentes_50k_300x300", bench_memoria_agentes,
+         {"N": 50_000, "width": 300, "height": 300}),
+        ("motor_vectorizado_10k_100x100", bench_motor_vectorizado,
+         {"N": 10_000, "width": 100, "height": 100, "pasos": pasos * 2}),
+        ("poblacion_sintetica_1M", bench_poblacion_sintetica,
+         {"N": 1_000_000, "width": 1000, "height": 1000}),
+        ("calculate_happiness_1M", bench_calculate_happiness, {"n": 1_000_000}),
+        ("calculate_happiness_1000alphas", bench_calculate_happiness, {"n": 1062, "n_alphas": 1000}),
+        # alpha escalar con un vector de horas
+        ("calculate_happiness_100horas", bench_calculate_happiness, {"n": 1062, "n_horas": 100}),
+        ("calculate_sociability_1M", bench_calculate_sociability, {"n": 1_000_000}),
+        ("procesar_datos_social_media", bench_procesar_datos, {}),
+        ("calcular_correlacion_FB", bench_calcular_correlacion, {"red": "FB"}),
+        ("metricas_calibrado_1001alphas_1000boot", bench_metricas_calibrado,
+         {"n_alphas": 1001, "bootstrap": 1000}),
+    ]
+    if not rapido:
+        benchmarks += [
+            ("social_model_10k_100x100", bench_social_model,
+             {"N": 10_000, "width": 100, "height": 100, "pasos": 5}),
+            ("motor_vectorizado_100k_300x300", bench_motor_vectorizado,
+             {"N": 100_000, "width": 300, "height": 300, "pasos": 20}),
+            ("poblacion_sintetica_10M", bench_poblacion_sintetica,
+             {"N": 10_000_000, "width": 3000, "height": 3000}),
+            # El cociente entre ambas da la aceleración con todos los núcleos
+            ("motor_teselas_2M_1000x1000_1tesela", bench_motor_teselas,
+             {"N": 2_000_000, "width": 1000, "height": 1000, "pasos": 10, "teselas": 1}),
+            ("motor_teselas_2M_1000x1000", bench_motor_teselas,
+             {"N": 2_000_000, "width": 1000, "height": 1000, "pasos": 10}),
+        ]
+    return benchmarks
+
+
+# --- 2. MEDICIÓN ---
+def rss_pico_mb():
+    """Memoria residente pico del proceso actual (None si no se puede medir)."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux da KiB, macOS bytes
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+def _medir(funcion, kwargs):
+    inicio = time.perf_counter()
+    metricas = funcion(**kwargs)
+    metricas["tiempo_s"] = time.perf_counter() - inicio
+    metricas["rss_pico_mb"] = rss_pico_mb()
+    return metricas
+
+def ejecutar_benchmarks(rapido=False, filtro=None, repeticiones=1):
+    """
+    Ejecuta cada benchmark en un proceso nuevo (para que la memoria pico sea
+    solo la suya) y se queda con la repetición más rápida.
+    """
+    resultados = {}
+    contexto = multiprocessing.get_context("spawn")
+
+    for nombre, funcion, kwargs in definir_benchmarks(rapido):
+        if filtro and filtro not in nombre:
+            continue
+        print(f"-> {nombre}...", flush=True)
+
+        mejor = None
+        for _ in range(repeticiones):
+            with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as pool:
+                metricas = pool.submit(_medir, funcion, kwargs).result()
+            if mejor is None or metricas["tiempo_s"] < mejor["tiempo_s"]:
+                mejor = metricas
+        resultados[nombre] = {"parametros": kwargs, **mejor}
+
+    return {
+        "fecha": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "maquina": platform.platform(),
+        "benchmarks": resultados,
+    }
+
+
+# --- 3. COMPARACIÓN CON UNA BASE ---
+# Métricas donde más es mejor; en el resto (tiempos, memoria) menos es mejor
+METRICAS_MAS_ES_MEJOR = {"agent_steps_por_s", "elementos_por_s"}
+
+def comparar(actual, base, tolerancia=0.10):
+    """
+    Compara dos informes y devuelve la lista de regresiones:
+    (benchmark, métrica, valor_base, valor_actual, cambio relativo).
+    """
+    regresiones = []
+    for nombre, metricas in actual["benchmarks"].items():
+        anteriores = base["benchmarks"].get(nombre)
+        if anteriores is None:
+            continue
+        for metrica, valor in metricas.items():
+            valor_base = anteriores.get(metrica)
+            if not isinstance(valor, (int, float)) or not isinstance(valor_base, (int, float)) or not valor_base:
+                continue
+            cambio = (valor - valor_base) / valor_base
+            if metrica in METRICAS_MAS_ES_MEJOR:
+                empeora = cambio < -tolerancia
+            else:
+                empeora = cambio > tolerancia
+            if empeora:
+                regresiones.append((nombre, metrica, valor_base, valor, cambio))
+    return regresiones
+
+def imprimir_resumen(informe):
+    print(f"\n{'benchmark':<34}{'tiempo_s':>10}{'rss_MB':>10}{'agent-steps/s':>16}")
+    for nombre, m in informe["benchmarks"].items():
+        rss = f"{m['rss_pico_mb']:.0f}" if m.get("rss_pico_mb") is not None else "-"
+        throughput = f"{m['agent_steps_por_s']:,.0f}" if "agent_steps_por_s" in m else "-"
+        print(f"{nombre:<34}{m['tiempo_s']:>10.3f}{rss:>10}{throughput:>16}")
+
+
+# --- 4. LÍNEA DE COMANDOS ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks del ABM y del modelo de felicidad.")
+    parser.add_argument("--rapido", action="store_true", help="Menos pasos y tamaños")
+    parser.add_argument("--filtro", default=None, help="Solo benchmarks cuyo nombre contenga este texto")
+    parser.add_argument("--repeticiones", type=int, default=1)
+    parser.add_argument("--salida", default=os.path.join(PROJECT_ROOT, "resultados", "benchmarks.json"))
+    parser.add_argument("--base", default=None, help="Informe anterior con el que comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.10,
+                        help="Cambio relativo a partir del cual se marca una regresión")
+    args = parser.parse_args()
+
+    informe = ejecutar_benchmarks(args.rapido, args.filtro, args.repeticiones)
+    imprimir_resumen(informe)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.salida)), exist_ok=True)
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(informe, f, indent=2)
+    print(f"\nResultados guardados en: {args.salida}")
+
+    if args.base:
+        with open(args.base, encoding="utf-8") as f:
+            base = json.load(f)
+        regresiones = comparar(informe, base, args.tolerancia)
+        if regresiones:
+            print(f"\n¡{len(regresiones)} regresión(es) respecto a {args.base}!")
+            for nombre, metrica, antes, ahora, cambio in regresiones:
+                print(f"  {nombre}.{metrica}: {antes:.4g} -> {ahora:.4g} ({cambio:+.1%})")
+            sys.exit(1)
+        print(f"\nSin regresiones respecto a {args.base} (tolerancia {args.tolerancia:.0%}).")
@@ -0,0 +1,192 @@
+import pandas as pd
+import hashlib
+import json
+import os
+import tempfile
+
+# --- 1. CONFIGURACIÓN ---
+# Parquet si pyarrow está instalado; si no, pickle (también conserva los tipos)
+try:
+    import pyarrow  # noqa: F401
+    FORMATO_CACHE = "parquet"
+except ImportError:
+    FORMATO_CACHE = "pickle"
+
+EXTENSIONES = {"parquet": ".parquet", "pickle": ".pkl"}
+
+# Carpeta (junto al Excel de origen) donde se guarda la caché
+CARPETA_CACHE = ".cache"
+
+# Los resultados se siguen exportando también a Excel para poder abrirlos a mano.
+# Poner a False para trabajar solo con la caché columnar.
+EXPORTAR_EXCEL = True
+
+
+# --- 2. RUTAS Y HUELLAS ---
+def ruta_cache(ruta_origen):
+    """Ruta de la caché columnar asociada a un archivo Excel."""
+    carpeta, nombre = os.path.split(os.path.abspath(ruta_origen))
+    base = os.path.splitext(nombre)[0]
+    return os.path.join(carpeta, CARPETA_CACHE, base + EXTENSIONES[FORMATO_CACHE])
+
+def _ruta_metadatos(ruta_cache_tabla):
+    return os.path.splitext(ruta_cache_tabla)[0] + ".json"
+
+def hash_archivo(ruta, bloque=1 << 20):
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for trozo in iter(lambda: f.read(bloque), b""):
+            h.update(trozo)
+    return h.hexdigest()
+
+def _huella(ruta):
+    """mtime y tamaño: comprobación barata antes de recurrir al hash."""
+    info = os.stat(ruta)
+    return {"mtime_ns": info.st_mtime_ns, "size": info.st_size}
+
+def _leer_metadatos(ruta_cache_tabla):
+    try:
+        with open(_ruta_metadatos(ruta_cache_tabla), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _umask():
+    # os.umask solo se puede leer cambiándola: se restaura en seguida
+    actual = os.umask(0o022)
+    os.umask(actual)
+    return actual
+
+def _escribir_atomico(ruta, escribir):
+    """
+    Llama a escribir(ruta_temporal) con un temporal de la misma carpeta y lo
+    renombra a 'ruta' (os.replace es atómico): otro proceso que lea a la vez
+    ve el archivo anterior o el nuevo completo, nunca uno a medias.
+    mkstemp crea el temporal solo para el propietario (0600): se le dan los
+    permisos normales de un archivo nuevo (0666 menos la umask).
+    """
+    fd, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta),
+                                    prefix=os.path.basename(ruta) + ".", suffix=".tmp")
+    os.close(fd)
+    try:
+        escribir(temporal)
+        os.chmod(temporal, 0o666 & ~_umask())
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+def _guardar_metadatos(ruta_cache_tabla, metadatos):
+    def escribir(ruta):
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(metadatos, f, indent=2)
+    _escribir_atomico(_ruta_metadatos(ruta_cache_tabla), escribir)
+
+def existe_tabla(ruta_origen):
+    """True si existe el Excel o su caché."""
+    return os.path.exists(ruta_origen) or os.path.exists(ruta_cache(ruta_origen))
+
+
+# --- 3. VALIDEZ DE LA CACHÉ ---
+def _metadatos_vigentes(ruta_origen):
+    """
+    Metadatos de la caché si es válida, o None. Se leen una sola vez: otro
+    proceso puede estar regenerando la caché y borrarlos entre dos lecturas.
+    """
+    cache = ruta_cache(ruta_origen)
+    metadatos = _leer_metadatos(cache)
+    if not os.path.exists(cache) or not isinstance(metadatos, dict) \
+            or "columnas" not in metadatos:
+        return None
+    if not os.path.exists(ruta_origen):
+        return metadatos
+
+    huella = _huella(ruta_origen)
+    if metadatos.get("origen") == huella:
+        return metadatos
+
+    # El archivo se ha tocado: solo se invalida si cambió el contenido
+    if metadatos.get("sha256") == hash_archivo(ruta_origen):
+        metadatos["origen"] = huella
+        _guardar_metadatos(cache, metadatos)
+        return metadatos
+    return None
+
+def cache_vigente(ruta_origen):
+    """
+    La caché es válida si no hay Excel (la tabla solo existe en caché) o si el
+    Excel no ha cambiado desde que se generó: primero se compara mtime/tamaño
+    y, si difieren, el hash del contenido.
+    """
+    return _metadatos_vigentes(ruta_origen) is not None
+
+
+# --- 4. LECTURA Y ESCRITURA ---
+def _escribir_cache(df, ruta_origen):
+    cache = ruta_cache(ruta_origen)
+    os.makedirs(os.path.dirname(cache), exist_ok=True)
+
+    # Primero se invalida la caché (sin metadatos nadie la da por buena), luego
+    # se sustituye la tabla y los metadatos van al final: varios procesos
+    # pueden regenerarla a la vez sin que ninguno lea una tabla a medias
+    try:
+        os.remove(_ruta_metadatos(cache))
+    except FileNotFoundError:
+        pass
+    if FORMATO_CACHE == "parquet":
+        _escribir_atomico(cache, lambda ruta: df.to_parquet(ruta, index=False))
+    else:
+        _escribir_atomico(cache, df.to_pickle)
+
+    metadatos = {"formato": FORMATO_CACHE, "columnas": [str(c) for c in df.columns]}
+    if os.path.exists(ruta_origen):
+        metadatos["origen"] = _huella(ruta_origen)
+        metadatos["sha256"] = hash_archivo(ruta_origen)
+    _guardar_metadatos(cache, metadatos)
+
+def construir_cache(ruta_origen):
+    """Lee el Excel una vez y guarda su versión columnar tipada."""
+    print(f"Generando caché de {os.path.basename(ruta_origen)}...")
+    df = pd.read_excel(ruta_origen)
+    _escribir_cache(df, ruta_origen)
+    return df
+
+def leer_tabla(ruta_origen, columnas=None):
+    """
+    Sustituto de pd.read_excel: lee la tabla desde la caché (creándola o
+    regenerándola si hace falta). Como usecols, devuelve las columnas pedidas
+    en el orden en que aparecen en el archivo.
+    Lanza FileNotFoundError si no existe ni el Excel ni la caché.
+    """
+    if not existe_tabla(ruta_origen):
+        raise FileNotFoundError(ruta_origen)
+
+    metadatos = _metadatos_vigentes(ruta_origen)
+    if metadatos is None:
+        df = construir_cache(ruta_origen)
+        return df if columnas is None else df[[c for c in df.columns if c in columnas]]
+
+    cache = ruta_cache(ruta_origen)
+    orden = metadatos["columnas"]
+    seleccion = None if columnas is None else [c for c in orden if c in columnas]
+
+    if FORMATO_CACHE == "parquet":
+        return pd.read_parquet(cache, columns=seleccion)
+    df = pd.read_pickle(cache)
+    return df if seleccion is None else df[seleccion]
+
+def guardar_tabla(df, ruta_origen, exportar_excel=None):
+    """
+    Guarda una tabla de resultados en la caché y, opcionalmente, en Excel
+    (por defecto según EXPORTAR_EXCEL).
+    """
+    if exportar_excel is None:
+        exportar_excel = EXPORTAR_EXCEL
+
+    if exportar_excel:
+        df.to_excel(ruta_origen, index=False)
+
+    # Si no se exporta, la huella guardada es la del Excel antiguo: la caché
+    # solo se regenerará si alguien modifica ese Excel a mano.
+    _escribir_cache(df.reset_index(drop=True), ruta_origen)
@@ -1,6 +1,22 @@
 import pandas as pd
 import numpy as np
+import hashlib
 import os
+import warnings
+
+from cache_datos import leer_tabla, existe_tabla
+from modelo_felicidad import calculate_happiness, extraer_factores
+
+# Columnas por nombre: felicidad observada en los datos limpios (la tercera
+# columna, P65) y felicidad simulada en model_*.xlsx
+COLUMNA_OBSERVADA = "P65"
+COLUMNA_MODELO = "Nivel_Felicidad"
+
+# Métricas de metricas_calibrado, en el orden de las columnas del resultado
+METRICAS_CALIBRADO = ("pearson", "spearman", "rmse", "mae")
+
+# Elementos (remuestras x salidas x encuestados) de cada bloque de cálculo
+ELEMENTOS_BLOQUE = 4_000_000
 
 def obtener_ruta_datos(nombre_archivo):
     """
@@ -18,9 +34,12 @@ def obtener_ruta_datos(nombre_archivo):
     
     return ruta_final
 
-def calcular_correlacion(nombre_red, archivo_datos, archivo_modelo):
+def calcular_correlacion(nombre_red, archivo_datos, archivo_modelo,
+                         columna_observada=COLUMNA_OBSERVADA):
     """
     Carga los excels y calcula la correlación manual.
+    Devuelve el coeficiente (o None si no se pudo calcular).
+    Para el resto de métricas ver metricas_modelo.
     """
     # Construimos las rutas dinámicas
     path_data = obtener_ruta_datos(archivo_datos)
@@ -31,20 +50,19 @@ def calcular_correlacion(nombre_red, archivo_datos, archivo_modelo):
 
     try:
         # Verificar existencia
-        if not os.path.exists(path_data):
+        if not existe_tabla(path_data):
             print(f" Error: No se encuentra el archivo de datos: {archivo_datos}")
             return
-        if not os.path.exists(path_model):
+        if not existe_tabla(path_model):
             print(f" Error: No se encuentra el archivo del modelo: {archivo_modelo}")
             return
 
-        # Leer Excels
-        df1 = pd.read_excel(path_data)
-        df2 = pd.read_excel(path_model)
+        # Leer tablas (desde la caché columnar)
+        df1 = leer_tabla(path_data)
+        df2 = leer_tabla(path_model)
 
-        # Seleccionar columnas (Datos: col 3 [índice 2], Modelo: col 1 [índice 0])
-        happiness_data = df1.iloc[:, 2]
-        happiness_model = df2.iloc[:, 0]
+        happiness_data = df1[columna_observada]
+        happiness_model = df2[COLUMNA_MODELO]
 
         # --- LÓGICA MATEMÁTICA ---
         mean_data = happiness_data.mean()
@@ -63,12 +81,273 @@ def calcular_correlacion(nombre_red, archivo_datos, archivo_modelo):
         if sqrt_product != 0:
             correlation = sum_of_products / sqrt_product
             print(f" El coeficiente de correlación para {nombre_red} es: {correlation:.6f}")
+            return correlation
         else:
             print(f" No se puede calcular para {nombre_red} (división por cero).")
 
     except Exception as e:
         print(f" Ocurrió un error inesperado en {nombre_red}: {e}")
 
+# --- Búsqueda automática de alpha (en memoria, sin pasar por model_*.xlsx) ---
+def correlacion_por_filas(matriz_modelo, happiness_data):
+    """
+    Coeficiente de Pearson de cada fila de 'matriz_modelo' frente a los datos.
+    Misma fórmula que calcular_correlacion, evaluada para todas las filas a la vez.
+    Las filas sin varianza devuelven NaN.
+    """
+    matriz_modelo = np.asarray(matriz_modelo, dtype=float)
+    happiness_data = np.asarray(happiness_data, dtype=float)
+
+    deviation_data = happiness_data - happiness_data.mean()
+    deviation_model = matriz_modelo - matriz_modelo.mean(axis=1, keepdims=True)
+
+    sum_of_products = deviation_model @ deviation_data
+    sqrt_product = np.sqrt((deviation_model ** 2).sum(axis=1) * (deviation_data ** 2).sum())
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(sqrt_product != 0, sum_of_products / sqrt_product, np.nan)
+
+def superficie_correlacion(factores, happiness_data, alphas, horas_candidatas):
+    """
+    Correlación para cada combinación (alpha, horas). Devuelve un DataFrame con
+    alpha en el índice y horas en las columnas.
+    Nota: horas solo reescala la felicidad, así que r apenas varía entre
+    columnas (únicamente por el redondeo a 2 decimales del modelo).
+    """
+    alphas = np.asarray(alphas, dtype=float)
+    superficie = np.empty((len(alphas), len(horas_candidatas)))
+
+    # Una pasada vectorizada por valor de horas: la matriz es (alpha x encuestado)
+    for j, horas in enumerate(horas_candidatas):
+        matriz = calculate_happiness(alphas, factores, horas=horas)
+        superficie[:, j] = correlacion_por_filas(matriz, happiness_data)
+
+    return pd.DataFrame(superficie, index=pd.Index(alphas, name="alpha"),
+                        columns=pd.Index(horas_candidatas, name="horas"))
+
+def buscar_mejor_alpha(nombre_red, archivo_datos, alphas=None, horas_candidatas=(8,),
+                       columna_observada=COLUMNA_OBSERVADA):
+    """
+    Busca el (alpha, horas) con mayor correlación para una red.
+    Devuelve un diccionario con los mejores parámetros y la superficie completa,
+    o None si no se encuentra el archivo de datos.
+    """
+    if alphas is None:
+        alphas = np.linspace(0, 1, 1001)
+
+    path_data = obtener_ruta_datos(archivo_datos)
+    if not existe_tabla(path_data):
+        print(f" Error: No se encuentra el archivo de datos: {archivo_datos}")
+        return None
+
+    df = leer_tabla(path_data)
+    happiness_data = df[columna_observada]
+    factores = extraer_factores(df)
+
+    superficie = superficie_correlacion(factores, happiness_data, alphas, list(horas_candidatas))
+    if superficie.isna().all().all():
+        print(f" No se puede calcular para {nombre_red} (división por cero).")
+        return None
+
+    i, j = np.unravel_index(np.nanargmax(superficie.to_numpy()), superficie.shape)
+    return {
+        "red": nombre_red,
+        "alpha": superficie.index[i],
+        "horas": superficie.columns[j],
+        "correlacion": superficie.iat[i, j],
+        "superficie": superficie,
+    }
+
+def calibrar_todas(redes, alphas=None, horas_candidatas=(8,)):
+    """
+    Ejecuta buscar_mejor_alpha para cada red de 'redes' ({nombre: archivos}).
+    Devuelve (tabla resumen, {nombre: superficie}).
+    """
+    filas = []
+    superficies = {}
+    for nombre_red, archivos in redes.items():
+        resultado = buscar_mejor_alpha(nombre_red, archivos['data'], alphas, horas_candidatas)
+        if resultado is None:
+            continue
+        superficies[nombre_red] = resultado.pop("superficie")
+        filas.append(resultado)
+    return pd.DataFrame(filas), superficies
+
+# --- Métricas de calibración en bloque ---
+def _grupos_empate(ordenada):
+    """Primera y última posición del grupo de empates de cada elemento (filas ya ordenadas)."""
+    k, n = ordenada.shape
+    posiciones = np.broadcast_to(np.arange(n), (k, n))
+    nuevo = np.ones((k, n), dtype=bool)
+    nuevo[:, 1:] = ordenada[:, 1:] != ordenada[:, :-1]
+    ultimo = np.ones((k, n), dtype=bool)
+    ultimo[:, :-1] = nuevo[:, 1:]
+    inicio = np.maximum.accumulate(np.where(nuevo, posiciones, 0), axis=1)
+    fin = np.minimum.accumulate(np.where(ultimo, posiciones, n - 1)[:, ::-1], axis=1)[:, ::-1]
+    return inicio, fin
+
+def _rangos_ponderados(pesos_ordenados, inicio, fin):
+    """
+    Rango medio (desde 1, empates promediados) de cada elemento en orden,
+    contando cada encuestado tantas veces como su peso en la remuestra.
+    Con pesos 1 es el rango habitual de Spearman.
+    """
+    forma = pesos_ordenados.shape
+    acumulado = np.zeros(forma[:-1] + (forma[-1] + 1,))
+    np.cumsum(pesos_ordenados, axis=-1, out=acumulado[..., 1:])
+    # Peso de los elementos menores y de los iguales (el grupo de empates)
+    antes = np.take_along_axis(acumulado, np.broadcast_to(inicio, forma), axis=-1)
+    hasta = np.take_along_axis(acumulado, np.broadcast_to(fin + 1, forma), axis=-1)
+    return antes + (hasta - antes + 1) / 2
+
+def _pearson_pesos(pesos, a, b):
+    """
+    Pearson de cada fila de 'a' (salidas x encuestados) frente a 'b' en cada
+    remuestra de 'pesos' (remuestras x encuestados), con productos de matrices.
+    Las medias sin ponderar se restan antes para evitar cancelaciones.
+    """
+    n = pesos.sum(axis=1, keepdims=True)
+    a = a - a.mean(axis=1, keepdims=True)
+    b = b - b.mean()
+    suma_a, suma_b = pesos @ a.T, (pesos @ b)[:, None]
+    sum_of_products = pesos @ (a * b).T - suma_a * suma_b / n
+    varianza_a = pesos @ (a * a).T - suma_a ** 2 / n
+    varianza_b = pesos @ (b * b)[:, None] - suma_b ** 2 / n
+    # Una salida constante puede dar una varianza de -1e-16 por redondeo
+    sqrt_product = np.sqrt(np.maximum(varianza_a * varianza_b, 0))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(sqrt_product > 0, sum_of_products / sqrt_product, np.nan)
+
+def _spearman_pesos(pesos, orden, inicio, fin, rangos_obs):
+    """
+    Spearman de las salidas dadas por su orden y grupos de empates frente a los
+    rangos observados de cada remuestra. Con pesos que suman n, el rango medio
+    ponderado es siempre (n + 1) / 2, así que basta centrar en ese valor.
+    """
+    centro = (pesos.shape[1] + 1) / 2
+    w = pesos[:, orden]
+    a = _rangos_ponderados(w, inicio, fin) - centro
+    b = rangos_obs[:, orden] - centro
+    sum_of_products = np.einsum("bkn,bkn,bkn->bk", w, a, b)
+    varianza_a = np.einsum("bkn,bkn,bkn->bk", w, a, a)
+    varianza_b = np.einsum("bn,bn,bn->b", pesos, rangos_obs - centro, rangos_obs - centro)
+    sqrt_product = np.sqrt(varianza_a * varianza_b[:, None])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(sqrt_product > 0, sum_of_products / sqrt_product, np.nan)
+
+def metricas_calibrado(modelo, observado, etiquetas=None, bootstrap=0, nivel=0.95, seed=None):
+    """
+    Pearson, Spearman, RMSE y MAE de cada salida del modelo frente a la
+    felicidad observada, todas a la vez.
+
+    :param modelo: (salidas x encuestados), p. ej. una fila por alpha de un
+        barrido o por paso de una corrida (acepta np.memmap: se lee por bloques).
+    :param observado: Felicidad observada de cada encuestado.
+    :param etiquetas: Índice del resultado (alphas, pasos...).
+    :param bootstrap: Remuestras para los intervalos de confianza (0 = sin IC).
+        Cada remuestra se representa con los pesos (veces que sale cada
+        encuestado), así que se evalúa con las mismas operaciones que la
+        muestra original.
+    :return: DataFrame con una fila por salida y una columna por métrica; con
+        bootstrap, además '{metrica}_ic_inf' y '{metrica}_ic_sup' (percentiles).
+    """
+    observado = np.asarray(observado, dtype=float)
+    if np.ndim(modelo) == 1:
+        modelo = np.asarray(modelo)[None, :]
+    k, n = modelo.shape
+    if n != len(observado):
+        raise ValueError(f"El modelo tiene {n} encuestados y los datos observados {len(observado)}.")
+
+    # Fila 0: la muestra original; el resto, las remuestras bootstrap
+    rng = np.random.default_rng(seed)
+    pesos = np.vstack([np.ones(n), rng.multinomial(n, np.full(n, 1 / n), size=bootstrap)])
+    B = len(pesos)
+
+    # Rangos de los datos observados en cada remuestra (en su orden original)
+    orden_obs = np.argsort(observado, kind="stable")
+    inicio, fin = _grupos_empate(observado[orden_obs][None, :])
+    rangos_obs = np.empty((B, n))
+    rangos_obs[:, orden_obs] = _rangos_ponderados(pesos[:, orden_obs], inicio[0], fin[0])
+
+    resultado = {metrica: np.empty((B, k)) for metrica in METRICAS_CALIBRADO}
+    bloque_b = min(B, max(1, ELEMENTOS_BLOQUE // n))
+    bloque_k = max(1, ELEMENTOS_BLOQUE // n)
+    # Spearman solo depende del orden (con empates) de cada salida: las que
+    # comparten patrón de rangos, como los alphas de un barrido (transformaciones
+    # monótonas de los mismos factores), se calculan una vez
+    patrones = {}
+
+    for k0 in range(0, k, bloque_k):
+        filas = np.arange(k0, min(k0 + bloque_k, k))
+        matriz = np.asarray(modelo[k0:filas[-1] + 1], dtype=float)
+        error = matriz - observado
+        resultado["rmse"][:, filas] = np.sqrt(pesos @ (error ** 2).T / n)
+        resultado["mae"][:, filas] = pesos @ np.abs(error).T / n
+        resultado["pearson"][:, filas] = _pearson_pesos(pesos, matriz, observado)
+
+        orden = np.argsort(matriz, axis=1, kind="stable")
+        inicio, fin = _grupos_empate(np.take_along_axis(matriz, orden, axis=1))
+        rangos = np.empty_like(matriz)
+        np.put_along_axis(rangos, orden, (inicio + fin) / 2, axis=1)
+        nuevas, repetidas = [], []
+        for i, fila in enumerate(filas):
+            clave = hashlib.sha1(rangos[i].tobytes()).digest()
+            if clave in patrones:
+                repetidas.append((fila, patrones[clave]))
+            else:
+                patrones[clave] = fila
+                nuevas.append(i)
+
+        paso_k = max(1, ELEMENTOS_BLOQUE // (bloque_b * n))
+        for j0 in range(0, len(nuevas), paso_k):
+            seleccion = nuevas[j0:j0 + paso_k]
+            for b0 in range(0, B, bloque_b):
+                remuestras = slice(b0, min(b0 + bloque_b, B))
+                resultado["spearman"][remuestras, filas[seleccion]] = _spearman_pesos(
+                    pesos[remuestras], orden[seleccion], inicio[seleccion], fin[seleccion],
+                    rangos_obs[remuestras],
+                )
+        for fila, original in repetidas:
+            resultado["spearman"][:, fila] = resultado["spearman"][:, original]
+
+    tabla = pd.DataFrame({metrica: valores[0] for metrica, valores in resultado.items()},
+                         index=etiquetas)
+    if bootstrap:
+        cola = (1 - nivel) / 2
+        for metrica, valores in resultado.items():
+            with warnings.catch_warnings():
+                # Salidas sin varianza: todas las remuestras son NaN
+                warnings.simplefilter("ignore", RuntimeWarning)
+                inferior, superior = np.nanquantile(valores[1:], [cola, 1 - cola], axis=0)
+            tabla[f"{metrica}_ic_inf"] = inferior
+            tabla[f"{metrica}_ic_sup"] = superior
+    return tabla
+
+def metricas_alphas(archivo_datos, alphas, horas=8, columna_observada=COLUMNA_OBSERVADA,
+                    bootstrap=0, seed=None):
+    """metricas_calibrado de la felicidad del modelo para cada alpha (índice 'alpha')."""
+    df = leer_tabla(obtener_ruta_datos(archivo_datos))
+    alphas = np.atleast_1d(np.asarray(alphas, dtype=float))
+    matriz = calculate_happiness(alphas, extraer_factores(df), horas=horas)
+    return metricas_calibrado(matriz, df[columna_observada], pd.Index(alphas, name="alpha"),
+                              bootstrap=bootstrap, seed=seed)
+
+def metricas_modelo(nombre_red, archivo_datos, archivo_modelo, columna_observada=COLUMNA_OBSERVADA,
+                    bootstrap=1000, seed=None):
+    """
+    Métricas de model_*.xlsx frente a los datos limpios de una red, como
+    diccionario {metrica: valor} (para el pipeline), o None si falta algún archivo.
+    """
+    path_data = obtener_ruta_datos(archivo_datos)
+    path_model = obtener_ruta_datos(archivo_modelo)
+    if not existe_tabla(path_data) or not existe_tabla(path_model):
+        print(f" Error: Faltan los datos o el modelo de {nombre_red}.")
+        return None
+    tabla = metricas_calibrado(leer_tabla(path_model)[COLUMNA_MODELO],
+                               leer_tabla(path_data)[columna_observada],
+                               bootstrap=bootstrap, seed=seed)
+    return {"red": nombre_red, **{c: float(v) for c, v in tabla.iloc[0].items()}}
+
 # --- Definición de Archivos (Solo los nombres, ya no rutas completas) ---
 files_ig = {
     'data': '3145_data_clean_IG.xlsx',
@@ -95,9 +374,11 @@ def menu():
         print("2. Calibrar Twitter (X)")
         print("3. Calibrar Facebook")
         print("4. Calibrar TODAS las redes")
-        print("5. Salir")
+        print("5. Buscar el mejor alpha (todas las redes)")
+        print("6. Métricas de calibración (todas las redes)")
+        print("7. Salir")
         
-        opcion = input("\nSeleccione una opción (1-5): ")
+        opcion = input("\nSeleccione una opción (1-7): ")
 
         if opcion == '1':
             calcular_correlacion("Instagram", files_ig['data'], files_ig['model'])
@@ -115,6 +396,18 @@ def menu():
             calcular_correlacion("Facebook", files_fb['data'], files_fb['model'])
         
         elif opcion == '5':
+            resumen, _ = calibrar_todas({
+                "Instagram": files_ig, "Twitter (X)": files_tw, "Facebook": files_fb
+            })
+            print(resumen.to_string(index=False))
+
+        elif opcion == '6':
+            filas = [metricas_modelo(nombre, archivos['data'], archivos['model'])
+                     for nombre, archivos in (("Instagram", files_ig), ("Twitter (X)", files_tw),
+                                              ("Facebook", files_fb))]
+            print(pd.DataFrame([f for f in filas if f is not None]).to_string(index=False))
+
+        elif opcion == '7':
             print("Saliendo...")
             break
         else:
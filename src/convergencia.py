@@ -0,0 +1,97 @@
+import numpy as np
+from collections import deque
+
+from recolector import estado_agentes
+
+
+# --- 1. FELICIDAD DEL MODELO ---
+def felicidad_media(model):
+    """
+    Felicidad media de los agentes. En SocialModel se usa el array de
+    felicidad, no la suma por celda: esa se actualiza de forma incremental y
+    acumula redondeos.
+    """
+    return estado_agentes(model)[1].mean()
+
+
+# --- 2. CRITERIO DE PARADA ---
+class CriterioConvergencia:
+    """
+    Criterio de parada para SocialModel y MotorSocial (parámetro 'convergencia').
+    Se evalúa al final de cada paso; el modelo se detiene en cuanto se cumple
+    cualquiera de las condiciones activas:
+
+    :param tol_delta: Máximo |cambio de felicidad| de un agente en el paso.
+    :param ventana: Número de pasos de la ventana deslizante de la media.
+    :param tol_varianza: Varianza máxima de la felicidad media en esa ventana.
+    :param paso_minimo: No se declara convergencia antes de este paso.
+
+    Guarda estado entre pasos: cada modelo necesita su propio criterio.
+    """
+
+    def __init__(self, tol_delta=None, ventana=None, tol_varianza=None, paso_minimo=1):
+        # El criterio de varianza necesita las dos cosas, también junto a tol_delta
+        if (ventana is None) != (tol_varianza is None):
+            raise ValueError("ventana y tol_varianza van juntas: indica las dos o ninguna.")
+        if tol_delta is None and tol_varianza is None:
+            raise ValueError("Indica tol_delta o ventana y tol_varianza.")
+        self.tol_delta = tol_delta
+        self.ventana = ventana
+        self.tol_varianza = tol_varianza
+        self.paso_minimo = paso_minimo
+
+        self._anterior = None
+        self._medias = deque(maxlen=ventana) if ventana else None
+        self.ultimo_delta = None
+
+    def estado(self):
+        """
+        (meta, anterior): parámetros y estado entre pasos en un diccionario
+        serializable a JSON, y la felicidad del paso anterior (o None).
+        Lo usan los checkpoints para reanudar la evaluación donde se quedó.
+        """
+        meta = {
+            "tol_delta": self.tol_delta,
+            "ventana": self.ventana,
+            "tol_varianza": self.tol_varianza,
+            "paso_minimo": self.paso_minimo,
+            "medias": None if self._medias is None else [float(m) for m in self._medias],
+            "ultimo_delta": None if self.ultimo_delta is None else float(self.ultimo_delta),
+        }
+        return meta, self._anterior
+
+    @classmethod
+    def desde_estado(cls, meta, anterior=None):
+        """Criterio reconstruido a partir de estado(), sin volver a llamar a iniciar."""
+        criterio = cls(meta["tol_delta"], meta["ventana"], meta["tol_varianza"], meta["paso_minimo"])
+        if meta["medias"] is not None:
+            criterio._medias.extend(meta["medias"])
+        criterio.ultimo_delta = meta["ultimo_delta"]
+        criterio._anterior = None if anterior is None else np.array(anterior, dtype=float)
+        return criterio
+
+    def iniciar(self, model):
+        """Toma el estado inicial (lo llama el modelo al crearse)."""
+        if self.tol_delta is not None:
+            self._anterior = estado_agentes(model)[1].copy()
+        if self._medias is not None:
+            self._medias.clear()
+            self._medias.append(felicidad_media(model))
+
+    def evaluar(self, model, paso):
+        """Actualiza el estado con el paso recién terminado y dice si ha convergido."""
+        convergido = False
+
+        if self.tol_delta is not None:
+            # El orden de los agentes no cambia entre pasos
+            actual = estado_agentes(model)[1]
+            self.ultimo_delta = np.abs(actual - self._anterior).max(initial=0.0)
+            self._anterior[:] = actual
+            convergido = self.ultimo_delta < self.tol_delta
+
+        if self._medias is not None:
+            self._medias.append(felicidad_media(model))
+            if len(self._medias) == self.ventana:
+                convergido = convergido or np.var(self._medias) < self.tol_varianza
+
+        return convergido and paso >= self.paso_minimo
@@ -0,0 +1,250 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from cache_datos import leer_tabla
+from filtra_datos import COLUMNAS_RED, COLUMNAS_BASE, filtrar_redes
+from graphics import obtener_ruta_datos
+from motor_vectorizado import desplazamientos_vecindad
+from poblacion import leer_valores_modelo, inicializar_agentes
+
+# --- 1. CONFIGURACIÓN ---
+# Archivo del modelo y número de agentes de cada red (los mismos que el menú
+# de graphics.py). Una red nueva (P21Axx) se añade aquí y en filtra_datos.COLUMNAS_RED.
+REDES_COSIMULACION = {
+    "FB": ("model_FB.xlsx", 400),
+    "IG": ("model_IG.xlsx", 267),
+    "X": ("model_X.xlsx", 371),
+}
+
+def _raiz_proyecto():
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def encuestados_por_red(claves, raiz=None):
+    """
+    Identificador de encuestado (fila de la encuesta original) de cada fila de
+    los archivos limpios, con el mismo filtro que filtra_datos. Las redes sin
+    columna en COLUMNAS_RED se omiten. Devuelve {clave: array} o {} si no se
+    puede leer la encuesta.
+    """
+    columnas = {clave: COLUMNAS_RED[clave] for clave in claves if clave in COLUMNAS_RED}
+    ruta = os.path.join(raiz or _raiz_proyecto(), "data", "3145_data.xlsx")
+    try:
+        df = leer_tabla(ruta, columnas=COLUMNAS_BASE + list(columnas.values()))
+    except FileNotFoundError:
+        print(f"No se encontró {ruta}: sin agentes compartidos entre redes.")
+        return {}
+    # filtrar_redes conserva el índice de la encuesta y el orden de las filas
+    return {clave: tabla.index.to_numpy() for clave, tabla in filtrar_redes(df, columnas).items()}
+
+
+# --- 2. CO-SIMULACIÓN ---
+class CoSimulacion:
+    """
+    Simula varias redes (FB, IG, X, ...) a la vez en un solo proceso, con un
+    único bucle de pasos y los mismos núcleos vectorizados que MotorSocial
+    aplicados a una rejilla (red, x, y): cada red conserva su propio espacio
+    toroidal de width x height.
+
+    Con agentes_cruzados=True, un encuestado que usa varias redes es una única
+    persona con una presencia (posición) en cada una: comparte la felicidad
+    y el cambio de cada paso es la media de la influencia recibida en las
+    redes donde tiene vecinos. Sin agentes cruzados cada red evoluciona como
+    un MotorSocial independiente.
+
+    :param redes: Diccionario {clave: (archivo_modelo, N)}; por defecto REDES_COSIMULACION.
+    """
+
+    def __init__(self, redes=None, width=30, height=30, social_threshold=2.0, seed=None,
+                 agentes_cruzados=False, remuestreo="ciclico", raiz=None, convergencia=None):
+        redes = redes or REDES_COSIMULACION
+        self.claves = list(redes)
+        self.width = width
+        self.height = height
+        self.social_threshold = social_threshold
+        self.desplazamientos = desplazamientos_vecindad(width, height)
+        self.rng = np.random.default_rng(seed)
+        self.running = True
+        self.steps = 0
+        self.historial = []
+
+        encuestados = encuestados_por_red(self.claves, raiz) if agentes_cruzados else {}
+
+        bloques = []
+        for indice, (clave, (archivo, N)) in enumerate(redes.items()):
+            valores = leer_valores_modelo(obtener_ruta_datos(archivo))
+            agentes = inicializar_agentes(*(valores or (None, None)), N, width, height,
+                                          seed=self.rng, remuestreo=remuestreo)
+            agentes["red"] = np.full(N, indice)
+            agentes["persona"] = self._claves_persona(clave, agentes["filas"], encuestados,
+                                                      valores)
+            bloques.append(agentes)
+
+        def unir(campo):
+            return np.concatenate([b[campo] for b in bloques])
+
+        self.red = unir("red")
+        self.x = unir("x").astype(np.int64)
+        self.y = unir("y").astype(np.int64)
+        self.sociability = unir("sociability").astype(float)
+        self.num_agents = len(self.red)
+        self.agentes_por_red = np.bincount(self.red, minlength=len(self.claves))
+
+        # Una persona por (encuestado, copia); sin encuestado conocido, una por presencia
+        claves_persona = unir("persona")
+        _, primera, self.persona = np.unique(claves_persona, axis=0, return_index=True,
+                                             return_inverse=True)
+        self.persona = self.persona.ravel()
+        self.felicidad_persona = unir("happiness").astype(float)[primera]
+        self.num_personas = len(self.felicidad_persona)
+
+        self.convergencia = convergencia
+        self.paso_convergencia = None
+        if convergencia is not None:
+            convergencia.iniciar(self)
+
+    def _claves_persona(self, clave, filas, encuestados, valores):
+        # (encuestado, copia): la copia distingue las repeticiones de una fila
+        # cuando hay más agentes que encuestados
+        orden = np.argsort(filas, kind="stable")
+        copia = np.empty(len(filas), dtype=np.int64)
+        inicio_grupo = np.r_[True, filas[orden][1:] != filas[orden][:-1]]
+        posicion = np.arange(len(filas))
+        copia[orden] = posicion - np.maximum.accumulate(np.where(inicio_grupo, posicion, 0))
+
+        ids = encuestados.get(clave)
+        if ids is not None and valores is not None and len(ids) == len(valores[0]):
+            return np.column_stack([ids[filas], copia])
+        if ids is not None:
+            print(f"[{clave}] El modelo no corresponde a los datos limpios: sin agentes cruzados.")
+        # Identificador negativo por red: nunca coincide con un encuestado ni con otra red
+        return np.column_stack([np.full(len(filas), -1 - self.claves.index(clave)),
+                                np.arange(len(filas))])
+
+    @property
+    def happiness(self):
+        """Felicidad de cada presencia (la de su persona)."""
+        return self.felicidad_persona[self.persona]
+
+    # --- Núcleos sobre la rejilla (red, x, y) ---
+    def _rejilla(self, pesos=None):
+        celdas = (self.red * self.width + self.x) * self.height + self.y
+        total = len(self.claves) * self.width * self.height
+        rejilla = np.bincount(celdas, weights=pesos, minlength=total)
+        return rejilla.reshape(len(self.claves), self.width, self.height)
+
+    def _suma_vecindad(self, rejilla):
+        total = np.zeros_like(rejilla)
+        for dx, dy in self.desplazamientos:
+            total += np.roll(rejilla, shift=(-dx, -dy), axis=(1, 2))
+        return total
+
+    def move_smart(self):
+        """Misma regla que MotorSocial.move_smart, en la rejilla de la red de cada presencia."""
+        ocupacion = self._rejilla()
+        vx = (self.x[:, None] + self.desplazamientos[:, 0]) % self.width
+        vy = (self.y[:, None] + self.desplazamientos[:, 1]) % self.height
+        conteos = ocupacion[self.red[:, None], vx, vy]
+
+        gregarios = self.sociability > self.social_threshold
+        puntuacion = np.where(gregarios[:, None], conteos, -conteos)
+        puntuacion = puntuacion + self.rng.random(puntuacion.shape) * 0.5
+        eleccion = np.argmax(puntuacion, axis=1)
+
+        filas = np.arange(self.num_agents)
+        self.x = vx[filas, eleccion]
+        self.y = vy[filas, eleccion]
+
+    def interact_and_influence(self):
+        """
+        Influencia de MotorSocial por presencia; el cambio de una persona es la
+        media de los cambios de sus presencias con vecinos.
+        """
+        happiness = self.happiness
+        n_vecinos = self._suma_vecindad(self._rejilla())[self.red, self.x, self.y]
+        suma_vecinos = self._suma_vecindad(self._rejilla(happiness))[self.red, self.x, self.y]
+
+        con_vecinos = n_vecinos > 0
+        avg_happiness = np.divide(suma_vecinos, n_vecinos, out=np.zeros(self.num_agents),
+                                  where=con_vecinos)
+        permeability = np.minimum(0.3, self.sociability * 0.05)
+        delta = np.where(con_vecinos, (avg_happiness - happiness) * permeability, 0.0)
+
+        suma_delta = np.bincount(self.persona, weights=delta, minlength=self.num_personas)
+        influidas = np.bincount(self.persona, weights=con_vecinos, minlength=self.num_personas)
+        cambia = influidas > 0
+        self.felicidad_persona[cambia] = np.clip(
+            self.felicidad_persona[cambia] + suma_delta[cambia] / influidas[cambia], 0, 5
+        )
+
+    # --- Bucle común ---
+    def collect(self):
+        happiness = self.happiness
+        n = self.agentes_por_red
+        media = np.bincount(self.red, weights=happiness) / n
+        var = (np.bincount(self.red, weights=happiness ** 2) - n * media ** 2) / np.maximum(n - 1, 1)
+        sociabilidad = np.bincount(self.red, weights=self.sociability) / n
+        for indice, clave in enumerate(self.claves):
+            self.historial.append({
+                "Step": self.steps,
+                "Red": clave,
+                "Felicidad_media": media[indice],
+                "Felicidad_std": np.sqrt(max(var[indice], 0.0)),
+                "Sociabilidad_media": sociabilidad[indice],
+            })
+
+    def step(self):
+        self.collect()
+        self.move_smart()
+        self.interact_and_influence()
+        self.steps += 1
+        if self.convergencia is not None and self.convergencia.evaluar(self, self.steps):
+            self.running = False
+            self.paso_convergencia = self.steps
+
+    def run(self, pasos):
+        for _ in range(pasos):
+            if not self.running:
+                break
+            self.step()
+        return self.estadisticas()
+
+    def estadisticas(self):
+        """Tabla por paso y red (columnas de MotorSocial.estadisticas más 'Red')."""
+        return pd.DataFrame(self.historial, columns=[
+            "Step", "Red", "Felicidad_media", "Felicidad_std", "Sociabilidad_media"
+        ])
+
+    def comparar_redes(self, columna="Felicidad_media"):
+        """Una columna por red con la métrica indicada, para comparar dinámicas."""
+        return self.estadisticas().pivot(index="Step", columns="Red", values=columna)[self.claves]
+
+
+# --- 3. LÍNEA DE COMANDOS ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Co-simulación de todas las redes en un proceso.")
+    parser.add_argument("--redes", nargs="+", default=list(REDES_COSIMULACION),
+                        choices=list(REDES_COSIMULACION))
+    parser.add_argument("--width", type=int, default=30)
+    parser.add_argument("--height", type=int, default=30)
+    parser.add_argument("--umbral", type=float, default=2.0, help="social_threshold")
+    parser.add_argument("--pasos", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--cruzados", action="store_true",
+                        help="Un encuestado presente en varias redes comparte su felicidad")
+    parser.add_argument("--salida", default=None)
+    args = parser.parse_args()
+
+    cosim = CoSimulacion({clave: REDES_COSIMULACION[clave] for clave in args.redes},
+                         args.width, args.height, social_threshold=args.umbral, seed=args.seed,
+                         agentes_cruzados=args.cruzados)
+    cosim.run(args.pasos)
+    cosim.collect()
+    tabla = cosim.comparar_redes()
+    print(tabla.tail())
+    if args.salida:
+        os.makedirs(os.path.dirname(os.path.abspath(args.salida)), exist_ok=True)
+        cosim.estadisticas().to_csv(args.salida, index=False)
+        print(f"Resultados guardados en: {args.salida}")
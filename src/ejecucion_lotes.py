@@ -0,0 +1,213 @@
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from graphics import SocialModel, obtener_ruta_datos
+from motor_vectorizado import MotorSocial, estadisticas_mesa
+from recolector import RecolectorStreaming
+from almacen_corridas import AlmacenCorridas
+from convergencia import CriterioConvergencia
+
+# --- 1. CONFIGURACIÓN ---
+# Archivo del modelo (salida de modelo_felicidad.py) para cada red
+REDES = {
+    "FB": "model_FB.xlsx",
+    "IG": "model_IG.xlsx",
+    "X": "model_X.xlsx",
+}
+
+MOTORES = ("mesa", "vectorizado")
+
+
+def obtener_ruta_resultados(nombre_archivo):
+    """Ruta dentro de la carpeta 'resultados' de la raíz del proyecto."""
+    dir_script = os.path.dirname(os.path.abspath(__file__))
+    dir_raiz = os.path.dirname(dir_script)
+    return os.path.join(dir_raiz, "resultados", nombre_archivo)
+
+
+# --- 2. EJECUCIÓN SIN VISUALIZACIÓN ---
+def ejecutar_simulacion(red, N, width, height, social_threshold=2.0, seed=None,
+                        pasos=100, motor="mesa", simultanea=False,
+                        tol_delta=None, ventana=None, tol_varianza=None,
+                        almacen=None, etiquetas=None):
+    """
+    Ejecuta SocialModel (o MotorSocial) durante 'pasos' pasos sin servidor web
+    y devuelve un diccionario con los parámetros y el resumen de la corrida.
+    'simultanea' activa la actualización simultánea de SocialModel
+    (MotorSocial siempre es simultáneo).
+    Con tol_delta o ventana + tol_varianza la corrida se detiene al converger
+    (ver convergencia.CriterioConvergencia) y 'paso_convergencia' indica cuándo.
+    Con 'almacen' (carpeta de almacen_corridas) se guardan la felicidad y la
+    posición de cada agente en cada paso, con los parámetros de la corrida y
+    las 'etiquetas' (p. ej. {"alpha": 0.3}) como índice; la fila resultante
+    incluye la 'clave' de la corrida.
+    """
+    if motor not in MOTORES:
+        raise ValueError(f"Motor desconocido: {motor}. Opciones: {MOTORES}")
+
+    ruta_archivo = obtener_ruta_datos(REDES[red])
+    convergencia = None
+    if tol_delta is not None or tol_varianza is not None:
+        # --ventana tiene valor por defecto: solo cuenta junto a --tol-varianza
+        convergencia = CriterioConvergencia(
+            tol_delta=tol_delta, ventana=ventana if tol_varianza is not None else None,
+            tol_varianza=tol_varianza)
+    recolector = None
+    if almacen is not None:
+        parametros = {"red": red, "N": N, "width": width, "height": height,
+                      "social_threshold": social_threshold, "seed": seed, "pasos": pasos,
+                      "motor": motor, "simultanea": simultanea, **(etiquetas or {})}
+        recolector = AlmacenCorridas(almacen).nueva_corrida(parametros)
+    inicio = time.perf_counter()
+
+    if motor == "mesa":
+        # Solo hacen falta agregados: memoria constante aunque la corrida sea larga
+        model = SocialModel(N, width, height, ruta_archivo,
+                            social_threshold=social_threshold, seed=seed,
+                            actualizacion_simultanea=simultanea,
+                            recolector=recolector or RecolectorStreaming(solo_agregados=True),
+                            convergencia=convergencia)
+        for _ in range(pasos):
+            if not model.running:
+                break
+            model.step()
+        # El DataCollector recoge al inicio de cada paso: añadimos el estado final
+        model.datacollector.collect(model)
+        stats = estadisticas_mesa(model)
+    else:
+        model = MotorSocial(N, width, height, ruta_archivo,
+                            social_threshold=social_threshold, seed=seed,
+                            recolector=recolector, convergencia=convergencia)
+        model.run(pasos)
+        model.collect()
+        stats = model.estadisticas()
+
+    duracion = time.perf_counter() - inicio
+    inicial, final = stats.iloc[0], stats.iloc[-1]
+
+    fila = {
+        "red": red,
+        "N": N,
+        "width": width,
+        "height": height,
+        "social_threshold": social_threshold,
+        "seed": seed,
+        "pasos": pasos,
+        "motor": motor,
+        "simultanea": simultanea or motor == "vectorizado",
+        "Felicidad_media_inicial": inicial["Felicidad_media"],
+        "Felicidad_media_final": final["Felicidad_media"],
+        "Felicidad_std_inicial": inicial["Felicidad_std"],
+        "Felicidad_std_final": final["Felicidad_std"],
+        "paso_convergencia": model.paso_convergencia,
+        "tiempo_s": duracion,
+    }
+    if recolector is not None:
+        fila["clave"] = os.path.basename(recolector.ruta)
+    return fila
+
+
+def _ejecutar_combinacion(kwargs):
+    # Función de nivel de módulo para que ProcessPoolExecutor pueda serializarla
+    return ejecutar_simulacion(**kwargs)
+
+
+# --- 3. BARRIDO DE PARÁMETROS ---
+def barrido_parametros(redes, Ns, widths, heights, thresholds, seeds, pasos=100,
+                       motor="mesa", procesos=None, archivo_salida=None, simultanea=False,
+                       tol_delta=None, ventana=None, tol_varianza=None,
+                       almacen=None, etiquetas=None):
+    """
+    Ejecuta todas las combinaciones (red, N, width, height, social_threshold, seed)
+    repartidas entre 'procesos' procesos (por defecto, todos los núcleos) y
+    devuelve una única tabla con una fila por corrida.
+    Si se indica 'archivo_salida' (.csv o .xlsx) la tabla también se guarda.
+    tol_delta, ventana y tol_varianza activan la parada por convergencia.
+    'almacen' y 'etiquetas' guardan cada corrida completa (ver ejecutar_simulacion).
+    """
+    combinaciones = [
+        {"red": red, "N": N, "width": w, "height": h, "social_threshold": t,
+         "seed": s, "pasos": pasos, "motor": motor, "simultanea": simultanea,
+         "tol_delta": tol_delta, "ventana": ventana, "tol_varianza": tol_varianza,
+         "almacen": almacen, "etiquetas": etiquetas}
+        for red, N, w, h, t, s in itertools.product(redes, Ns, widths, heights, thresholds, seeds)
+    ]
+    print(f"Ejecutando {len(combinaciones)} corridas ({motor})...")
+
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        # chunksize agrupa corridas cortas para reducir el coste de comunicación
+        chunksize = max(1, len(combinaciones) // (4 * (procesos or os.cpu_count() or 1)))
+        filas = list(pool.map(_ejecutar_combinacion, combinaciones, chunksize=chunksize))
+
+    resultados = pd.DataFrame(filas)
+
+    if archivo_salida:
+        os.makedirs(os.path.dirname(os.path.abspath(archivo_salida)), exist_ok=True)
+        if archivo_salida.endswith(".xlsx"):
+            resultados.to_excel(archivo_salida, index=False)
+        else:
+            resultados.to_csv(archivo_salida, index=False)
+        print(f"Resultados guardados en: {archivo_salida}")
+
+    return resultados
+
+
+# --- 4. LÍNEA DE COMANDOS ---
+def parsear_argumentos(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Ejecuta SocialModel sin visualización, en lote y en paralelo."
+    )
+    parser.add_argument("--redes", nargs="+", default=list(REDES), choices=list(REDES))
+    parser.add_argument("--N", nargs="+", type=int, default=[400])
+    parser.add_argument("--width", nargs="+", type=int, default=[30])
+    parser.add_argument("--height", nargs="+", type=int, default=[30])
+    parser.add_argument("--umbral", nargs="+", type=float, default=[2.0],
+                        help="Valores de social_threshold")
+    parser.add_argument("--semillas", nargs="+", type=int, default=[0])
+    parser.add_argument("--pasos", type=int, default=100)
+    parser.add_argument("--motor", choices=MOTORES, default="mesa")
+    parser.add_argument("--simultanea", action="store_true",
+                        help="Actualización simultánea (doble búfer) en SocialModel")
+    parser.add_argument("--tol-delta", type=float, default=None,
+                        help="Parar cuando ningún agente cambie su felicidad más que esto")
+    parser.add_argument("--ventana", type=int, default=20,
+                        help="Pasos de la ventana deslizante para --tol-varianza")
+    parser.add_argument("--tol-varianza", type=float, default=None,
+                        help="Parar cuando la varianza de la felicidad media en la ventana sea menor")
+    parser.add_argument("--procesos", type=int, default=None,
+                        help="Número de procesos (por defecto, todos los núcleos)")
+    parser.add_argument("--salida", default=obtener_ruta_resultados("barrido.csv"))
+    parser.add_argument("--almacen", default=None,
+                        help="Carpeta donde guardar cada corrida completa (almacen_corridas.py)")
+    parser.add_argument("--etiqueta", nargs="+", default=[], metavar="CLAVE=VALOR",
+                        help="Parámetros extra para el índice del almacén, p. ej. alpha=0.3")
+    args = parser.parse_args(argv)
+    if args.simultanea and args.motor != "mesa":
+        parser.error("--simultanea solo se aplica a --motor mesa.")
+    args.etiquetas = {}
+    for etiqueta in args.etiqueta:
+        clave, separador, valor = etiqueta.partition("=")
+        if not separador or not clave:
+            parser.error(f"--etiqueta espera CLAVE=VALOR, no '{etiqueta}'.")
+        try:
+            args.etiquetas[clave] = float(valor)
+        except ValueError:
+            args.etiquetas[clave] = valor
+    return args
+
+
+if __name__ == "__main__":
+    args = parsear_argumentos()
+    tabla = barrido_parametros(
+        args.redes, args.N, args.width, args.height, args.umbral, args.semillas,
+        pasos=args.pasos, motor=args.motor, procesos=args.procesos,
+        archivo_salida=args.salida, simultanea=args.simultanea,
+        tol_delta=args.tol_delta, ventana=args.ventana, tol_varianza=args.tol_varianza,
+        almacen=args.almacen, etiquetas=args.etiquetas,
+    )
+    print(tabla.groupby("red")[["Felicidad_media_final", "tiempo_s"]].mean())
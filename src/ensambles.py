@@ -0,0 +1,168 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+import pandas as pd
+
+from graphics import SocialModel, obtener_ruta_datos
+from motor_vectorizado import MotorSocial
+from recolector import RecolectorNulo, estado_agentes, N_BANDAS
+from ejecucion_lotes import REDES, MOTORES, obtener_ruta_resultados
+
+# Cuantil de la normal para un intervalo de confianza del 95 %
+Z_95 = 1.959963984540054
+
+
+# --- 1. ACUMULADOR EN LÍNEA ---
+class AcumuladorWelford:
+    """
+    Media y varianza en línea (algoritmo de Welford) de arrays de forma fija.
+    La memoria no depende del número de observaciones añadidas.
+    """
+
+    def __init__(self, forma):
+        self.n = 0
+        self.media = np.zeros(forma)
+        self.m2 = np.zeros(forma)
+
+    def agregar(self, valor):
+        self.n += 1
+        delta = valor - self.media
+        self.media += delta / self.n
+        self.m2 += delta * (valor - self.media)
+
+    def varianza(self):
+        if self.n < 2:
+            return np.full_like(self.media, np.nan)
+        return self.m2 / (self.n - 1)
+
+    def intervalo(self, z=Z_95):
+        """Intervalo de confianza (aprox. normal) de la media."""
+        margen = z * np.sqrt(self.varianza() / max(self.n, 1))
+        return self.media - margen, self.media + margen
+
+
+# --- 2. UNA RÉPLICA ---
+def nombres_metricas(cuantiles):
+    return (["felicidad_media", "felicidad_var"]
+            + [f"felicidad_q{int(round(q * 100)):02d}" for q in cuantiles]
+            + [f"banda_{i}" for i in range(N_BANDAS)])
+
+def metricas_paso(model, cuantiles):
+    """Resumen de un paso: media, varianza y cuantiles de felicidad y fracción por banda."""
+    _, happiness, _ = estado_agentes(model)
+    bandas = np.bincount(np.rint(np.clip(happiness, 0, 5)).astype(int), minlength=N_BANDAS)
+    return np.concatenate([
+        [happiness.mean(), happiness.var(ddof=1)],
+        np.quantile(happiness, cuantiles),
+        bandas / len(happiness),
+    ])
+
+def ejecutar_replica(red, N, width, height, social_threshold, seed, pasos, motor,
+                     simultanea, cuantiles):
+    """
+    Ejecuta una réplica y devuelve una matriz (paso x métrica) de tamaño
+    (pasos + 1) x len(nombres_metricas): no depende del número de agentes.
+    """
+    ruta_archivo = obtener_ruta_datos(REDES[red])
+    if motor == "mesa":
+        # Las métricas se calculan aquí: el modelo no necesita recoger nada
+        model = SocialModel(N, width, height, ruta_archivo, social_threshold=social_threshold,
+                            seed=seed, actualizacion_simultanea=simultanea,
+                            recolector=RecolectorNulo())
+    else:
+        model = MotorSocial(N, width, height, ruta_archivo,
+                            social_threshold=social_threshold, seed=seed)
+
+    trayectoria = np.empty((pasos + 1, len(nombres_metricas(cuantiles))))
+    trayectoria[0] = metricas_paso(model, cuantiles)
+    for t in range(1, pasos + 1):
+        model.step()
+        trayectoria[t] = metricas_paso(model, cuantiles)
+    return trayectoria
+
+
+# --- 3. ENSAMBLE ---
+def ejecutar_ensamble(red, N, width, height, replicas, pasos=100, social_threshold=2.0,
+                      semilla_base=0, motor="mesa", simultanea=False,
+                      cuantiles=(0.1, 0.5, 0.9), procesos=None):
+    """
+    Ejecuta 'replicas' réplicas (semillas semilla_base, semilla_base + 1, ...)
+    en procesos paralelos y combina sus trayectorias en línea.
+
+    Devuelve un DataFrame con una fila por paso y, para cada métrica, la media
+    entre réplicas y su intervalo de confianza al 95 % (columnas _media,
+    _ic_inf, _ic_sup). Los cuantiles son los de cada réplica promediados.
+    """
+    if motor not in MOTORES:
+        raise ValueError(f"Motor desconocido: {motor}. Opciones: {MOTORES}")
+    if simultanea and motor != "mesa":
+        raise ValueError("simultanea solo se aplica a motor='mesa': el motor vectorizado "
+                         "ya actualiza a todos los agentes a la vez.")
+
+    cuantiles = list(cuantiles)
+    nombres = nombres_metricas(cuantiles)
+    acumulador = AcumuladorWelford((pasos + 1, len(nombres)))
+    procesos = procesos or os.cpu_count() or 1
+
+    print(f"Ensamble {red}: {replicas} réplicas x {pasos} pasos ({motor})...")
+    semillas = iter(range(semilla_base, semilla_base + replicas))
+
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        def lanzar():
+            seed = next(semillas, None)
+            if seed is None:
+                return None
+            return pool.submit(ejecutar_replica, red, N, width, height, social_threshold,
+                               seed, pasos, motor, simultanea, cuantiles)
+
+        # Como mucho 2 réplicas por proceso en vuelo: la memoria no crece con K
+        en_vuelo = {f for f in (lanzar() for _ in range(2 * procesos)) if f is not None}
+        while en_vuelo:
+            hechos, en_vuelo = wait(en_vuelo, return_when=FIRST_COMPLETED)
+            for futuro in hechos:
+                acumulador.agregar(futuro.result())
+                siguiente = lanzar()
+                if siguiente is not None:
+                    en_vuelo.add(siguiente)
+
+    inferior, superior = acumulador.intervalo()
+    tabla = {"Step": np.arange(pasos + 1), "replicas": acumulador.n}
+    for j, nombre in enumerate(nombres):
+        tabla[f"{nombre}_media"] = acumulador.media[:, j]
+        tabla[f"{nombre}_ic_inf"] = inferior[:, j]
+        tabla[f"{nombre}_ic_sup"] = superior[:, j]
+    return pd.DataFrame(tabla)
+
+
+# --- 4. LÍNEA DE COMANDOS ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ensamble de réplicas de SocialModel con bandas de confianza.")
+    parser.add_argument("--red", choices=list(REDES), default="FB")
+    parser.add_argument("--N", type=int, default=400)
+    parser.add_argument("--width", type=int, default=30)
+    parser.add_argument("--height", type=int, default=30)
+    parser.add_argument("--umbral", type=float, default=2.0, help="social_threshold")
+    parser.add_argument("--replicas", type=int, default=32)
+    parser.add_argument("--pasos", type=int, default=100)
+    parser.add_argument("--semilla-base", type=int, default=0)
+    parser.add_argument("--motor", choices=MOTORES, default="mesa")
+    parser.add_argument("--simultanea", action="store_true")
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--salida", default=None)
+    args = parser.parse_args()
+    if args.simultanea and args.motor != "mesa":
+        parser.error("--simultanea solo se aplica a --motor mesa.")
+
+    resultado = ejecutar_ensamble(
+        args.red, args.N, args.width, args.height, args.replicas, pasos=args.pasos,
+        social_threshold=args.umbral, semilla_base=args.semilla_base, motor=args.motor,
+        simultanea=args.simultanea, procesos=args.procesos,
+    )
+    salida = args.salida or obtener_ruta_resultados(f"ensamble_{args.red}.csv")
+    os.makedirs(os.path.dirname(os.path.abspath(salida)), exist_ok=True)
+    resultado.to_csv(salida, index=False)
+    print(resultado[["Step", "felicidad_media_media", "felicidad_media_ic_inf",
+                     "felicidad_media_ic_sup"]].tail())
+    print(f"Resultados guardados en: {salida}")
@@ -1,26 +1,76 @@
 import pandas as pd
+import numpy as np
 import os
 
-def procesar_datos_social_media(social_media_key, columna_red_social):
+from cache_datos import leer_tabla, guardar_tabla
+
+# Columna de uso de cada red social en el estudio 3145
+COLUMNAS_RED = {'X': 'P21A02', 'IG': 'P21A05', 'FB': 'P21A01'}
+
+# Columnas comunes a todas las redes
+COLUMNAS_BASE = ["P65", "P69", "P60A"]
+
+# Recodificación de P69 de rango 0-10 a 0-5 como tabla de búsqueda:
+# la posición es el valor original y el contenido, el valor recodificado.
+RECODIFICACION_P69 = np.array([0, 0, 1, 1, 2, 2, 3, 3, 4, 4, 5])
+
+def recodificar_p69(serie):
     """
-    Procesa el archivo de datos, filtra las filas, recodifica una columna 
-    y guarda el resultado en un nuevo archivo Excel.
-    
-    :param social_media_key: Clave para nombrar el archivo de salida (Ej: 'X', 'IG', 'FB').
-    :param columna_red_social: El nombre de la columna específica de la red social (Ej: 'P21A02').
+    Recodifica P69 (0-10 -> 0-5) con una búsqueda vectorizada. Los valores
+    fuera de 0-10 (p. ej. 98/99 = NS/NC) se mantienen, igual que con Series.replace.
+    """
+    valores = serie.to_numpy()
+    en_rango = (valores >= 0) & (valores <= 10)
+    indices = np.clip(np.nan_to_num(valores), 0, 10).astype(int)
+    return pd.Series(
+        np.where(en_rango, RECODIFICACION_P69[indices], valores),
+        index=serie.index, name=serie.name,
+    )
+
+def filtrar_redes(df, redes):
+    """
+    Aplica el filtro común y la recodificación una sola vez y separa la tabla
+    de cada red.
+
+    :param df: DataFrame con COLUMNAS_BASE y las columnas de todas las redes.
+    :param redes: Diccionario {clave: columna}, ej. {'X': 'P21A02', 'FB': 'P21A01'}.
+    :return: Diccionario {clave: DataFrame filtrado}.
+
+    El filtro es el que aplicaba la versión por posiciones: como la columna de
+    la red va antes que P60A, P65 y P69 en el archivo, las posiciones 0, 1 y 2
+    corresponden a red == 1, P60A == 1 y P65 != 99.
+    """
+    mascara_comun = (df["P60A"] == 1) & (df["P65"] != 99)
+    comun = df.loc[mascara_comun].copy()
+    comun["P69"] = recodificar_p69(comun["P69"])
+
+    resultados = {}
+    for clave, columna_red in redes.items():
+        # Mismo orden de columnas que el archivo original (como usecols)
+        columnas = [c for c in comun.columns if c == columna_red or c in COLUMNAS_BASE]
+        resultados[clave] = comun.loc[comun[columna_red] == 1, columnas]
+    return resultados
+
+def procesar_redes(redes, raiz='.'):
+    """
+    Carga una sola vez la unión de columnas necesarias, filtra todas las redes
+    pedidas en una pasada y guarda un archivo por red.
+
+    :param redes: Diccionario {clave: columna}, ej. {'X': 'P21A02', 'IG': 'P21A05'}.
+    :param raiz: Carpeta raíz del proyecto (por defecto, la carpeta actual).
     """
     
     # 1. Definir Rutas Portables
     
-    # IMPORTANTE: Estas rutas son relativas a la carpeta donde se ejecuta el script.
+    # IMPORTANTE: Si no se indica 'raiz', estas rutas son relativas a la carpeta donde se ejecuta el script.
     # Asumimos que el script se ejecuta desde la raíz del proyecto (la carpeta "ABM-Income...").
     
     DATA_FOLDER = 'data'
     CLEAN_DATA_FOLDER = 'clean_data'
     
     # Uso de os.path.join para crear rutas robustas
-    data_path = DATA_FOLDER
-    clean_data_path = CLEAN_DATA_FOLDER
+    data_path = os.path.join(raiz, DATA_FOLDER)
+    clean_data_path = os.path.join(raiz, CLEAN_DATA_FOLDER)
     
     # Crear la carpeta clean_data si no existe
     if not os.path.exists(clean_data_path):
@@ -30,43 +80,46 @@ def procesar_datos_social_media(social_media_key, columna_red_social):
     excel_file_name = '3145_data.xlsx'
     excel_file_path = os.path.join(data_path, excel_file_name)
     
-    # 2. Especificar Columnas
+    # 2. Especificar Columnas (unión de todas las redes)
     
-    columnas_base = ["P65", "P69", "P60A"]
-    columnas_deseadas = columnas_base + [columna_red_social]
+    columnas_deseadas = COLUMNAS_BASE + list(redes.values())
     
-    print(f"\n--- Procesando datos para {social_media_key} (Columna: {columna_red_social}) ---")
+    for clave, columna in redes.items():
+        print(f"\n--- Procesando datos para {clave} (Columna: {columna}) ---")
     
     # 3. Cargar el Archivo y Comprobar su Existencia
     try:
-        # Cargar el archivo Excel en un DataFrame
-        df = pd.read_excel(excel_file_path, usecols=columnas_deseadas)
+        # Cargar el archivo (desde la caché columnar) en un DataFrame
+        df = leer_tabla(excel_file_path, columnas=columnas_deseadas)
     except FileNotFoundError:
         print(f"ERROR: No se encontró el archivo de datos en la ruta: {excel_file_path}")
         print(f"Asegúrate de que '{excel_file_name}' esté en la carpeta '{DATA_FOLDER}' y de que estés ejecutando el script desde la raíz del proyecto.")
         return
 
-    # 4. Filtrar y Preprocesar
+    # 4. Filtrar y Preprocesar (una sola vez para todas las redes)
     
-    # Filtrar: P65=1, P69=1, P60A!=99
-    filas_con_uno = df[(df.iloc[:, 0] == 1) & (df.iloc[:, 1] == 1) & (df.iloc[:, 2] != 99)].copy()
-
-    # Recodificar la columna P69 de rango 0-10 a 0-5
-    recodificacion_p69 = {
-        0:0, 1:0, 2:1, 3:1, 4:2, 5:2, 6:3, 7:3, 8:4, 9:4, 10:5
-    }
-    filas_con_uno.loc[:, "P69"] = filas_con_uno["P69"].replace(recodificacion_p69)
+    tablas = filtrar_redes(df, redes)
 
     # 5. Guardar el Resultado
     
-    # Nombre del archivo de salida
-    nuevo_excel_file_name = f'3145_data_clean_{social_media_key}.xlsx'
-    nuevo_excel_path = os.path.join(clean_data_path, nuevo_excel_file_name)
-    
-    filas_con_uno.to_excel(nuevo_excel_path, index=False)
+    for clave, filas_con_uno in tablas.items():
+        nuevo_excel_file_name = f'3145_data_clean_{clave}.xlsx'
+        nuevo_excel_path = os.path.join(clean_data_path, nuevo_excel_file_name)
+
+        guardar_tabla(filas_con_uno, nuevo_excel_path)
+
+        print(f"\n [{clave}] Procesamiento completado. Filas filtradas:\n{filas_con_uno.head(5)}")
+        print(f"\n Archivo guardado correctamente en: {nuevo_excel_path}")
+
+def procesar_datos_social_media(social_media_key, columna_red_social):
+    """
+    Procesa el archivo de datos, filtra las filas, recodifica una columna 
+    y guarda el resultado en un nuevo archivo Excel.
     
-    print(f"\n Procesamiento completado. Filas filtradas:\n{filas_con_uno.head(5)}")
-    print(f"\n Archivo guardado correctamente en: {nuevo_excel_path}")
+    :param social_media_key: Clave para nombrar el archivo de salida (Ej: 'X', 'IG', 'FB').
+    :param columna_red_social: El nombre de la columna específica de la red social (Ej: 'P21A02').
+    """
+    procesar_redes({social_media_key: columna_red_social})
 
 
 # --- FUNCIÓN PRINCIPAL Y MENÚ INTERACTIVO ---
@@ -87,10 +140,11 @@ def menu_principal():
     print("1. X (Anteriormente Twitter)")
     print("2. Instagram (IG)")
     print("3. Facebook (FB)")
+    print("4. Todas las redes (una sola pasada)")
     print("0. Salir")
     
     while True:
-        eleccion = input("\nIngrese su opción (1, 2, 3 o 0): ").strip()
+        eleccion = input("\nIngrese su opción (1, 2, 3, 4 o 0): ").strip()
         
         if eleccion == '0':
             print("Programa finalizado. ¡Hasta luego!")
@@ -98,8 +152,10 @@ def menu_principal():
         elif eleccion in opciones:
             opcion_elegida = opciones[eleccion]
             procesar_datos_social_media(opcion_elegida['key'], opcion_elegida['col'])
+        elif eleccion == '4':
+            procesar_redes({o['key']: o['col'] for o in opciones.values()})
         else:
-            print("Opción no válida. Por favor, ingrese 1, 2, 3 o 0.")
+            print("Opción no válida. Por favor, ingrese 1, 2, 3, 4 o 0.")
 
 if __name__ == "__main__":
     menu_principal()
\ No newline at end of file
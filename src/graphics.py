@@ -1,14 +1,16 @@
-import mesa
-from mesa import Agent, Model
-from mesa.time import RandomActivation
+from mesa import Model
+from mesa.time import BaseScheduler
 from mesa.space import MultiGrid
-from mesa.datacollection import DataCollector
 from mesa.visualization.modules import CanvasGrid
 from mesa.visualization.ModularVisualization import ModularServer
-import pandas as pd
 import numpy as np
 import os
-import sys
+import time
+
+from motor_vectorizado import desplazamientos_vecindad
+from recolector import RecolectorMemoria
+from poblacion import agentes_desde_excel
+from topologias import preparar_topologia, grado, influencia_red
 
 # --- 1. GESTIÓN DE RUTAS ---
 def obtener_ruta_datos(nombre_archivo):
@@ -22,143 +24,352 @@ def obtener_ruta_datos(nombre_archivo):
         return nombre_archivo
 
 # --- 2. AGENTE CON INTELIGENCIA SOCIAL ---
-class SocialAgent(Agent):
-    def __init__(self, unique_id, model, happiness, sociability):
-        super().__init__(unique_id, model)
-        self.happiness = float(happiness)
-        self.sociability = float(sociability)
-        
-        # Definimos un umbral: ¿Qué consideramos "sociable"?
-        # Si la sociabilidad es alta (> 5 por ejemplo, depende de tu alpha), busca gente.
-        # Ajusta este valor según tus datos reales.
-        self.social_threshold = 2.0 
+# Color según la felicidad redondeada (0 a 5); tabla común a todos los agentes
+COLORES_FELICIDAD = ("Red", "Orange", "Yellow", "Green", "LightBlue", "DarkBlue")
+
+class SocialAgent:
+    """
+    Vista de un agente de SocialModel: no guarda estado propio, solo el modelo
+    y su fila en los arrays del modelo (felicidad, sociabilidad, posición).
+    El modelo avanza sin objetos agente; estas vistas solo se crean al pedir
+    model.grid (visualización de Mesa) y tienen la interfaz que usan la
+    rejilla y agent_portrayal (unique_id, pos, happiness, sociability).
+    """
+    __slots__ = ("model", "indice")
+
+    def __init__(self, model, indice):
+        self.model = model
+        self.indice = indice
+
+    @property
+    def unique_id(self):
+        return int(self.model.ids[self.indice])
+
+    @property
+    def happiness(self):
+        return float(self.model.felicidad[self.indice])
+
+    @happiness.setter
+    def happiness(self, valor):
+        self.model.cambiar_felicidad(self.indice, valor)
+
+    @property
+    def sociability(self):
+        return float(self.model.sociabilidad[self.indice])
+
+    @property
+    def pos(self):
+        return int(self.model.pos_x[self.indice]), int(self.model.pos_y[self.indice])
+
+    @pos.setter
+    def pos(self, valor):
+        # MultiGrid.place_agent / move_agent asignan la posición: se refleja en el modelo
+        if valor != self.pos:
+            self.model.mover_agente(self.indice, valor)
 
     def update_color(self):
         """Actualiza el color basado en la felicidad actual redondeada."""
         val = int(round(max(0, min(5, self.happiness))))
-        color_mapping = {
-            0: "Red", 1: "Orange", 2: "Yellow", 
-            3: "Green", 4: "LightBlue", 5: "DarkBlue"
-        }
-        return color_mapping.get(val, "Grey")
+        return COLORES_FELICIDAD[val]
+
+# --- 3. MODELO ---
+class SocialModel(Model):
+    """
+    Modelo de Mesa con el estado de los agentes en arrays de NumPy (uno por
+    variable, en el orden del planificador) y un índice espacial por celda.
+    Las reglas se aplican directamente sobre los arrays:
+
+    - Por defecto (como RandomActivation) cada agente, en orden aleatorio, se
+      mueve y se ve influido viendo ya a los que se movieron antes.
+    - Con actualizacion_simultanea=True (como StagedActivation con las fases
+      de FASES_SIMULTANEAS) todos deciden con el estado del inicio del paso y
+      cada fase se calcula para todos los agentes a la vez.
+
+    Ambos modos consumen el generador aleatorio igual que los agentes de Mesa,
+    así que las trayectorias son las mismas que con un objeto por agente.
+    """
+    # Fases del modo simultáneo: decidir y mover por separado, y luego
+    # calcular toda la influencia antes de escribir ninguna felicidad
+    FASES_SIMULTANEAS = ["fase_decidir", "fase_mover", "fase_influir", "fase_actualizar"]
 
-    def move_smart(self):
+    def __init__(self, N, width, height, excel_file_path, social_threshold=2.0, seed=None,
+                 actualizacion_simultanea=False, recolector=None, perfilador=None,
+                 agentes_iniciales=None, remuestreo="ciclico", convergencia=None,
+                 topologia=None):
+        # 'seed' lo consume mesa.Model.__new__ para inicializar self.random
+        self.num_agents = N
+        # Umbral de "sociable": si la sociabilidad lo supera, busca gente
+        self.social_threshold = social_threshold
+        self.width = width
+        self.height = height
+        # Lista de tuplas: paso_secuencial los recorre en Python
+        self.desplazamientos = [tuple(d) for d in desplazamientos_vecindad(width, height).tolist()]
+
+        # Con una topología (grafo de networkx, lista de aristas o tipo de
+        # topologias.TOPOLOGIAS) el agente i es el nodo i: la influencia viene de
+        # sus vecinos en el grafo (producto CSR) y los agentes no se mueven.
+        # La rejilla solo conserva posiciones para la visualización.
+        self.topologia = None
+        if topologia is not None:
+            self.topologia = preparar_topologia(topologia, N, seed=seed)
+            self.grados = grado(self.topologia)
+            N = self.topologia.shape[0]
+
+        # Por defecto cada agente se actualiza en orden aleatorio viendo a los
+        # vecinos ya actualizados. En modo simultáneo todos leen el estado del
+        # paso anterior, así el resultado no depende del orden de activación.
+        # El planificador solo lleva la cuenta de pasos y tiempo.
+        self.actualizacion_simultanea = actualizacion_simultanea
+        self.schedule = BaseScheduler(self)
+
+        # Índice espacial: ocupantes y suma de felicidad por celda.
+        # Se mantiene en cada movimiento o cambio de felicidad.
+        self.ocupacion = np.zeros((width, height), dtype=np.int64)
+        self.suma_felicidad = np.zeros((width, height))
+        self.running = True 
+        self._rejilla_vistas = None
+        self.perfilador = None
+
+        if agentes_iniciales is None:
+            # Col 0 = Felicidad, Col 1 = Sociabilidad. Con menos filas que agentes
+            # se repiten cíclicamente (o se remuestrean con 'bootstrap').
+            # Si el Excel falla se usan datos aleatorios, también con la semilla.
+            print(f"Cargando datos extendidos desde: {excel_file_path}")
+            agentes_iniciales = agentes_desde_excel(
+                excel_file_path, N, width, height, seed=seed, remuestreo=remuestreo
+            )
+        # Se crean todos los agentes en bloque (también al restaurar un checkpoint)
+        self.crear_agentes(agentes_iniciales)
+
+        # Para corridas largas se puede pasar un RecolectorStreaming (memoria acotada)
+        self.datacollector = recolector if recolector is not None else RecolectorMemoria()
+
+        # Parada opcional al alcanzar el estado estacionario (convergencia.CriterioConvergencia)
+        self.convergencia = convergencia
+        self.paso_convergencia = None
+        if convergencia is not None:
+            convergencia.iniciar(self)
+
+        # Instrumentación opcional (perfilado.Perfilador); sin ella no hay coste añadido
+        if perfilador is not None:
+            perfilador.instrumentar(self)
+
+    def crear_agentes(self, agentes):
         """
-        Movimiento basado en Sociabilidad:
-        - Si soy sociable: Prefiero celdas con vecinos.
-        - Si soy antisocial: Prefiero celdas vacías.
+        Carga los agentes a partir de arrays, en el orden dado (que es el orden
+        del planificador). 'agentes' es un diccionario con las claves
+        'ids', 'x', 'y', 'happiness' y 'sociability'.
         """
-        possible_steps = self.model.grid.get_neighborhood(
-            self.pos, moore=True, include_center=False
-        )
-        
-        # Clasificamos las celdas posibles
-        candidates = []
-        for step in possible_steps:
-            # Contamos agentes en esa celda candidata (usamos get_cell_list_contents)
-            occupants = self.model.grid.get_cell_list_contents([step])
-            count = len(occupants)
-            candidates.append((step, count))
-        
-        if not candidates:
-            return
+        self.num_agents = len(agentes["ids"])
+        self.ids = np.array(agentes["ids"], dtype=np.int64)
+        self.felicidad = np.array(agentes["happiness"], dtype=float)
+        self.sociabilidad = np.array(agentes["sociability"], dtype=float)
+        self.pos_x = np.array(agentes["x"], dtype=np.int64)
+        self.pos_y = np.array(agentes["y"], dtype=np.int64)
 
-        # Lógica de decisión
-        if self.sociability > self.social_threshold:
-            # --- COMPORTAMIENTO GREGARIO (Busca multitud) ---
-            # Ordenamos descendente por cantidad de ocupantes
-            candidates.sort(key=lambda x: x[1], reverse=True)
-            # Intentamos ir a donde haya más gente, pero con un poco de aleatoriedad
-            # para no quedar estancados
-            best_steps = [c[0] for c in candidates if c[1] >= candidates[0][1]]
-        else:
-            # --- COMPORTAMIENTO ERMITAÑO (Busca soledad) ---
-            # Ordenamos ascendente (preferimos 0 ocupantes)
-            candidates.sort(key=lambda x: x[1], reverse=False)
-            best_steps = [c[0] for c in candidates if c[1] <= candidates[0][1]]
-            
-        new_position = self.random.choice(best_steps)
-        self.model.grid.move_agent(self, new_position)
-
-    def interact_and_influence(self):
+        # Índice espacial en bloque (mismo orden de suma que agente a agente)
+        np.add.at(self.ocupacion, (self.pos_x, self.pos_y), 1)
+        np.add.at(self.suma_felicidad, (self.pos_x, self.pos_y), self.felicidad)
+        self._rejilla_vistas = None
+
+    def __getstate__(self):
+        # La rejilla de vistas se reconstruye al pedirla
+        estado = self.__dict__.copy()
+        estado["_rejilla_vistas"] = None
+        return estado
+
+    @property
+    def grid(self):
         """
-        Calcula la media de felicidad de los vecinos y ajusta la propia.
-        La intensidad del cambio depende de la sociabilidad.
+        MultiGrid con una vista SocialAgent por agente, para la visualización
+        de Mesa (CanvasGrid). Se construye al pedirla y se reutiliza hasta que
+        cambia alguna posición.
         """
-        neighbors = self.model.grid.get_neighbors(self.pos, moore=True, include_center=False)
-        
-        if len(neighbors) > 0:
-            avg_happiness = np.mean([a.happiness for a in neighbors])
-            
-            # Factor de permeabilidad: Cuanto más sociable, más te afecta el entorno.
-            # Normalizamos un poco para que el cambio no sea drástico instantáneamente.
-            # Supongamos que sociabilidad va de 0 a 10 aprox.
-            permeability = min(0.3, self.sociability * 0.05) 
-            
-            # Fórmula de difusión: Nueva = Vieja + Tasa * (Objetivo - Vieja)
-            delta = (avg_happiness - self.happiness) * permeability
-            
-            self.happiness += delta
-            
-            # Mantenemos la felicidad en rangos lógicos (0 a 5)
-            self.happiness = max(0, min(5, self.happiness))
+        if self._rejilla_vistas is None:
+            grid = MultiGrid(self.width, self.height, True)
+            for indice, (x, y) in enumerate(zip(self.pos_x.tolist(), self.pos_y.tolist())):
+                grid.place_agent(SocialAgent(self, indice), (x, y))
+            self._rejilla_vistas = grid
+        return self._rejilla_vistas
 
-    def step(self):
-        self.move_smart()
-        self.interact_and_influence()
+    def mover_agente(self, indice, pos):
+        happiness = self.felicidad[indice]
+        anterior = (self.pos_x[indice], self.pos_y[indice])
+        self.ocupacion[anterior] -= 1
+        self.suma_felicidad[anterior] -= happiness
+        self.pos_x[indice], self.pos_y[indice] = pos
+        self.ocupacion[pos] += 1
+        self.suma_felicidad[pos] += happiness
+        self._rejilla_vistas = None
 
-# --- 3. MODELO ---
-class SocialModel(Model):
-    def __init__(self, N, width, height, excel_file_path):
-        self.num_agents = N
-        self.grid = MultiGrid(width, height, True)
-        self.schedule = RandomActivation(self)
-        self.running = True 
+    def cambiar_felicidad(self, indice, happiness):
+        self.suma_felicidad[self.pos_x[indice], self.pos_y[indice]] += happiness - self.felicidad[indice]
+        self.felicidad[indice] = happiness
 
-        print(f"Cargando datos extendidos desde: {excel_file_path}")
-        
-        try:
-            # Asumimos que la fila 1 son headers. 
-            # Col 0 = Felicidad, Col 1 = Sociabilidad
-            df = pd.read_excel(excel_file_path) # Detecta headers automáticamente
-            
-            # Si el excel no tiene headers y empieza directo con números, usa: header=None
-            # Ajuste de seguridad:
-            if isinstance(df.iloc[0,0], str): 
-                # Parece que leyó headers como datos, recargamos
-                pass 
-            
-            # Extraemos columnas. Ajusta nombres si tus columnas tienen nombres específicos
-            # O usamos iloc para ir a lo seguro (columna 0 y columna 1)
-            happiness_vals = df.iloc[:, 0].tolist()
-            sociability_vals = df.iloc[:, 1].tolist()
-            
-        except Exception as e:
-            print(f"Error leyendo Excel ({e}). Usando datos aleatorios.")
-            happiness_vals = np.random.uniform(0, 5, N).tolist()
-            sociability_vals = np.random.uniform(0, 5, N).tolist()
-
-        for i in range(self.num_agents):
-            # Obtener datos cíclicos si hay menos filas que agentes
-            h_val = happiness_vals[i % len(happiness_vals)]
-            s_val = sociability_vals[i % len(sociability_vals)]
-            
-            # Crear agente
-            a = SocialAgent(i, self, h_val, s_val)
-            self.schedule.add(a)
-            
-            # Ubicación aleatoria
-            x = self.random.randrange(self.grid.width)
-            y = self.random.randrange(self.grid.height)
-            self.grid.place_agent(a, (x, y))
-
-        self.datacollector = DataCollector(
-            agent_reporters={"Felicidad": "happiness", "Sociabilidad": "sociability"}
-        )
+    # --- Modo por defecto (orden aleatorio, actualización inmediata) ---
+    def paso_secuencial(self):
+        """
+        Cada agente, en orden aleatorio, va a la celda vecina con más ocupantes
+        (si es sociable) o con menos (si no), con empates al azar, y después
+        acerca su felicidad a la media de sus vecinos. Se recorre en listas de
+        Python: cada agente ve lo que hicieron los anteriores, así que no se
+        puede vectorizar sin cambiar las reglas.
+
+        Con un perfilador se mide por separado el movimiento y la influencia
+        de cada agente; sin él el recorrido no llama al reloj.
+        """
+        height = self.height
+        desplazamientos = [(dx * height, dy) for dx, dy in self.desplazamientos]
+        total_celdas = self.width * height
+        umbral = self.social_threshold
+        elegir = self.random.choice
+
+        felicidad = self.felicidad.tolist()
+        sociabilidad = self.sociabilidad.tolist()
+        celdas = (self.pos_x * height + self.pos_y).tolist()
+        ocupacion = self.ocupacion.ravel().tolist()
+        suma = self.suma_felicidad.ravel().tolist()
+
+        medir = self.perfilador is not None
+        reloj = time.perf_counter
+        tiempo_mover = tiempo_influir = 0.0
+
+        orden = list(range(self.num_agents))
+        self.random.shuffle(orden)
+        for i in orden:
+            if medir:
+                inicio = reloj()
+            celda = celdas[i]
+            base, y = celda - celda % height, celda % height
+            vecinas = [(base + dx) % total_celdas + (y + dy) % height for dx, dy in desplazamientos]
+            if not vecinas:
+                continue
+
+            # Movimiento: sociables a la celda con más gente, ermitaños a la vacía
+            conteos = [ocupacion[c] for c in vecinas]
+            objetivo = max(conteos) if sociabilidad[i] > umbral else min(conteos)
+            destino = elegir([c for c, n in zip(vecinas, conteos) if n == objetivo])
+            happiness = felicidad[i]
+            ocupacion[celda] -= 1
+            suma[celda] -= happiness
+            ocupacion[destino] += 1
+            suma[destino] += happiness
+            celdas[i] = destino
+            if medir:
+                medio = reloj()
+                tiempo_mover += medio - inicio
+
+            # Influencia: media de felicidad de los vecinos de la nueva celda
+            base, y = destino - destino % height, destino % height
+            n_vecinos = 0
+            suma_vecinos = 0.0
+            for dx, dy in desplazamientos:
+                c = (base + dx) % total_celdas + (y + dy) % height
+                n_vecinos += ocupacion[c]
+                suma_vecinos += suma[c]
+            if n_vecinos > 0:
+                # Cuanto más sociable, más le afecta el entorno (máximo 0.3)
+                permeability = min(0.3, sociabilidad[i] * 0.05)
+                delta = (suma_vecinos / n_vecinos - happiness) * permeability
+                # Mantenemos la felicidad en rangos lógicos (0 a 5)
+                nueva = max(0, min(5, happiness + delta))
+                suma[destino] += nueva - happiness
+                felicidad[i] = nueva
+            if medir:
+                tiempo_influir += reloj() - medio
+
+        if medir:
+            self.perfilador.acumular("move_smart", tiempo_mover, len(orden))
+            self.perfilador.acumular("interact_and_influence", tiempo_influir, len(orden))
+        self.felicidad[:] = felicidad
+        self.pos_x[:], self.pos_y[:] = np.divmod(celdas, height)
+        self.ocupacion.ravel()[:] = ocupacion
+        self.suma_felicidad.ravel()[:] = suma
+
+    # --- Modo simultáneo (todos leen el estado del inicio del paso) ---
+    def _vecinas(self):
+        """Celdas vecinas de cada agente como índices planos x * height + y: (N, k)."""
+        d = np.array(self.desplazamientos, dtype=np.int64).reshape(-1, 2)
+        vx = (self.pos_x[:, None] + d[:, 0]) % self.width
+        vy = (self.pos_y[:, None] + d[:, 1]) % self.height
+        return vx * self.height + vy
+
+    def fase_decidir(self):
+        """Celda de destino de cada agente según la ocupación del inicio del paso."""
+        vecinas = self._vecinas()
+        if vecinas.shape[1] == 0:
+            return None
+        conteos = self.ocupacion.ravel()[vecinas]
+        objetivo = np.where(self.sociabilidad > self.social_threshold,
+                            conteos.max(axis=1), conteos.min(axis=1))
+        empates = conteos == objetivo[:, None]
+        # Un sorteo por agente y en su orden, como random.choice(best_steps)
+        elegir = self.random.choice
+        rangos = [range(k) for k in range(vecinas.shape[1] + 1)]
+        eleccion = np.array([elegir(rangos[k]) for k in empates.sum(axis=1).tolist()], dtype=np.int64)
+        columna = np.argmax(empates & (np.cumsum(empates, axis=1) == eleccion[:, None] + 1), axis=1)
+        return vecinas[np.arange(self.num_agents), columna]
+
+    def fase_mover(self, destinos):
+        if destinos is None:
+            return
+        origenes = self.pos_x * self.height + self.pos_y
+        np.add.at(self.ocupacion.ravel(), origenes, -1)
+        np.add.at(self.ocupacion.ravel(), destinos, 1)
+        # Salida y llegada intercaladas por agente: mismo orden de suma que moverlos uno a uno
+        celdas = np.column_stack([origenes, destinos]).ravel()
+        cambios = np.column_stack([-self.felicidad, self.felicidad]).ravel()
+        np.add.at(self.suma_felicidad.ravel(), celdas, cambios)
+        self.pos_x, self.pos_y = np.divmod(destinos, self.height)
+
+    def fase_influir(self):
+        """Felicidad nueva de cada agente (NaN si no tiene vecinos), leyendo la del paso anterior."""
+        vecinas = self._vecinas()
+        ocupacion, suma = self.ocupacion.ravel(), self.suma_felicidad.ravel()
+        n_vecinos = np.zeros(self.num_agents, dtype=np.int64)
+        suma_vecinos = np.zeros(self.num_agents)
+        # Columna a columna: las sumas se acumulan en el orden de la vecindad
+        for k in range(vecinas.shape[1]):
+            n_vecinos += ocupacion[vecinas[:, k]]
+            suma_vecinos += suma[vecinas[:, k]]
+        con_vecinos = n_vecinos > 0
+        permeability = np.minimum(0.3, self.sociabilidad * 0.05)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            delta = (suma_vecinos / n_vecinos - self.felicidad) * permeability
+        return np.where(con_vecinos, np.clip(self.felicidad + delta, 0, 5), np.nan)
+
+    def fase_actualizar(self, nueva):
+        cambian = ~np.isnan(nueva)
+        celdas = (self.pos_x * self.height + self.pos_y)[cambian]
+        np.add.at(self.suma_felicidad.ravel(), celdas, nueva[cambian] - self.felicidad[cambian])
+        self.felicidad[cambian] = nueva[cambian]
+
+    def paso_simultaneo(self):
+        self.fase_mover(self.fase_decidir())
+        self.fase_actualizar(self.fase_influir())
+
+    def paso_red(self):
+        """Paso en modo topología: toda la influencia con un producto disperso."""
+        happiness = self.felicidad
+        nueva = influencia_red(self.topologia, self.grados, happiness, self.sociabilidad)
+        # Mismo orden de suma que cambiar_felicidad agente a agente
+        np.add.at(self.suma_felicidad, (self.pos_x, self.pos_y), nueva - happiness)
+        happiness[:] = nueva
 
     def step(self):
         self.datacollector.collect(self)
-        self.schedule.step()
+        if self.topologia is not None:
+            self.paso_red()
+        elif self.actualizacion_simultanea:
+            self.paso_simultaneo()
+        else:
+            self.paso_secuencial()
+        self._rejilla_vistas = None
+        self.schedule.steps += 1
+        self.schedule.time += 1
+        if self.convergencia is not None and self.convergencia.evaluar(self, self.schedule.steps):
+            self.running = False
+            self.paso_convergencia = self.schedule.steps
 
 # --- 4. VISUALIZACIÓN ---
 def agent_portrayal(agent):
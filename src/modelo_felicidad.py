@@ -1,19 +1,169 @@
 import pandas as pd
 import numpy as np
 import os
+from collections import OrderedDict
+from multiprocessing import shared_memory
+
+from cache_datos import leer_tabla, guardar_tabla, existe_tabla
+
+# --- Tablas de consulta del kernel Cobb-Douglas ---
+# Los factores son enteros pequeños (códigos de la encuesta o longitudes de
+# texto): la felicidad de cada valor se calcula una vez por (alpha, horas,
+# decimales) y después basta indexar la tabla.
+# La caché LRU de cada proceso no pasa de este tamaño en bytes
+BYTES_CACHE_TABLAS = 16 * 1024 * 1024
+LONGITUD_MINIMA_TABLA = 128
+# Por encima de este factor se calcula directamente (sin tabla)
+FACTOR_MAXIMO_TABLA = 1 << 16
+
+_tablas = OrderedDict()  # Caché LRU del proceso: clave -> tabla
+_compartidas = None      # TablasCompartidas a las que está conectado el proceso
+
+def _ejes_parametro(*parametros):
+    """
+    Convierte los parámetros a arrays. Si alguno es un vector, se coloca en el
+    primer eje (parámetro x encuestado) para que el resultado sea 2-D.
+    """
+    arrays = [np.asarray(p, dtype=float) for p in parametros]
+    if any(a.ndim > 0 for a in arrays):
+        arrays = [np.atleast_1d(a)[:, None] for a in arrays]
+    return arrays
+
+def _como_entrada(resultado, entrada):
+    """Si la entrada era una Series (y el resultado es 1-D) se devuelve otra con el mismo índice."""
+    if isinstance(entrada, pd.Series) and resultado.ndim == 1:
+        return pd.Series(resultado, index=entrada.index, name=entrada.name)
+    return resultado
+
+def _cobb_douglas(alpha, horas, factores, decimales):
+    # Aseguramos que los factores no sean 0 para evitar errores matemáticos
+    factores_seguros = np.maximum(0.1, factores)
+    return np.round(((factores_seguros ** alpha * horas ** (1 - alpha)) * 5) / 11, decimales)
+
+def _indices_tabla(factores):
+    """Los factores como índices de tabla, o None si no son enteros entre 0 y FACTOR_MAXIMO_TABLA."""
+    if factores.size == 0:
+        return None
+    minimo, maximo = factores.min(), factores.max()
+    if not (0 <= minimo and maximo < FACTOR_MAXIMO_TABLA) or np.any(factores != np.floor(factores)):
+        return None
+    return factores.astype(np.intp)
+
+class TablasCompartidas:
+    """
+    Tablas de felicidad precalculadas en un bloque de shared_memory, para que
+    los procesos de un barrido no las recalculen. El proceso principal las
+    crea con crear() y cada trabajador se conecta por nombre con
+    conectar_tablas (como initializer del pool). Son de solo lectura: las
+    claves que falten se calculan en la caché local de cada proceso.
+    """
+
+    def __init__(self, nombre, propietario=False):
+        self._bloque = shared_memory.SharedMemory(name=nombre, create=False)
+        self._propietario = propietario
+        n, longitud = np.ndarray((2,), dtype=np.int64, buffer=self._bloque.buf)
+        self.longitud = int(longitud)
+        self.claves = np.ndarray((n, 3), dtype=float, buffer=self._bloque.buf, offset=16)
+        self.tablas = np.ndarray((n, self.longitud), dtype=float, buffer=self._bloque.buf,
+                                 offset=16 + self.claves.nbytes)
+        self._posicion = {tuple(clave): i for i, clave in enumerate(self.claves.tolist())}
+
+    @property
+    def nombre(self):
+        return self._bloque.name
+
+    @classmethod
+    def crear(cls, parametros, longitud=LONGITUD_MINIMA_TABLA, decimales=2):
+        """Calcula las tablas de cada (alpha, horas) de 'parametros' en un bloque nuevo."""
+        parametros = [(float(alpha), float(horas), float(decimales)) for alpha, horas in parametros]
+        n = len(parametros)
+        bloque = shared_memory.SharedMemory(create=True, size=16 + n * 3 * 8 + n * longitud * 8)
+        np.ndarray((2,), dtype=np.int64, buffer=bloque.buf)[:] = (n, longitud)
+        claves = np.ndarray((n, 3), dtype=float, buffer=bloque.buf, offset=16)
+        tablas = np.ndarray((n, longitud), dtype=float, buffer=bloque.buf, offset=16 + n * 24)
+        dominio = np.arange(longitud, dtype=float)
+        for i, (alpha, horas, _) in enumerate(parametros):
+            claves[i] = parametros[i]
+            tablas[i] = _cobb_douglas(np.asarray(alpha), np.asarray(horas), dominio, decimales)
+        del claves, tablas
+        nombre = bloque.name
+        tablas_compartidas = cls(nombre, propietario=True)
+        bloque.close()
+        return tablas_compartidas
+
+    def buscar(self, clave, longitud):
+        i = self._posicion.get(clave)
+        if i is None or self.longitud < longitud:
+            return None
+        return self.tablas[i]
+
+    def cerrar(self):
+        """Cierra el bloque (y lo libera si este proceso lo creó)."""
+        self.claves = self.tablas = None
+        try:
+            self._bloque.close()
+        except BufferError:
+            # Aún hay tablas de este bloque en la caché local
+            pass
+        if self._propietario:
+            self._bloque.unlink()
+
+def conectar_tablas(nombre=None):
+    """Usa las TablasCompartidas con este nombre en el proceso actual (None para desconectar)."""
+    global _compartidas
+    _tablas.clear()
+    _compartidas = TablasCompartidas(nombre) if nombre else None
+
+def tabla_felicidad(alpha, horas, longitud, decimales=2):
+    """
+    Felicidad de los factores 0, 1, ..., longitud - 1 (la tabla puede ser
+    más larga), desde la caché LRU, las tablas compartidas o calculada.
+    """
+    clave = (float(alpha), float(horas), float(decimales))
+    tabla = _tablas.get(clave)
+    if tabla is None or len(tabla) < longitud:
+        if _compartidas is not None:
+            tabla = _compartidas.buscar(clave, longitud)
+        if tabla is None or len(tabla) < longitud:
+            # Potencia de dos: un factor algo mayor no obliga a rehacerla
+            longitud = max(LONGITUD_MINIMA_TABLA, 1 << (longitud - 1).bit_length())
+            tabla = _cobb_douglas(np.asarray(alpha), np.asarray(horas),
+                                  np.arange(longitud, dtype=float), decimales)
+        _tablas[clave] = tabla
+        _tablas.move_to_end(clave)
+        # Se descartan las menos usadas hasta caber en el presupuesto
+        while len(_tablas) > 1 and sum(t.nbytes for t in _tablas.values()) > BYTES_CACHE_TABLAS:
+            _tablas.popitem(last=False)
+    _tablas.move_to_end(clave)
+    return tabla
 
 def calculate_happiness(alpha, factores, horas=8, decimales=2):
     """
     Calcula el nivel de felicidad (Cobb-Douglas) para cada factor.
+    Acepta listas, ndarrays o Series. Si alpha (y/o horas) es un vector,
+    devuelve una matriz 2-D (alpha x encuestado).
+
+    Con factores enteros no se calcula la potencia de cada encuestado: con
+    parámetros escalares se indexa la tabla de tabla_felicidad (si no es
+    más larga que la propia entrada); con vectores se calcula cada valor
+    distinto una vez y se reparte.
     """
-    # Aseguramos que los factores no sean 0 para evitar errores matemáticos
-    factores_seguros = [max(0.1, f) for f in factores]
-    
-    current_happiness = [
-        round(((factor ** alpha * horas ** (1 - alpha)) * 5) / 11, decimales)
-        for factor in factores_seguros
-    ]
-    return current_happiness
+    alpha, horas = _ejes_parametro(alpha, horas)
+    valores = np.asarray(factores, dtype=float)
+    indices = _indices_tabla(valores)
+    escalares = alpha.ndim == 0 and horas.ndim == 0
+
+    if indices is None or (escalares and indices.max() >= max(LONGITUD_MINIMA_TABLA, indices.size)):
+        current_happiness = _cobb_douglas(alpha, horas, valores, decimales)
+    elif escalares:
+        current_happiness = tabla_felicidad(alpha, horas, int(indices.max()) + 1, decimales)[indices]
+    else:
+        # Una fila por parámetro: alpha, horas o ambos pueden ser el vector
+        filas = np.broadcast_shapes(alpha.shape, horas.shape)[:1]
+        distintos, posicion = np.unique(indices, return_inverse=True)
+        current_happiness = _cobb_douglas(alpha, horas, distintos.astype(float), decimales)[:, posicion.ravel()]
+        current_happiness = current_happiness.reshape(filas + indices.shape)
+    return _como_entrada(current_happiness, factores)
 
 def calculate_sociability_from_happiness(happiness_scores, alpha, decimales=2):
     """
@@ -22,51 +172,58 @@ def calculate_sociability_from_happiness(happiness_scores, alpha, decimales=2):
     
     Fórmula: S = H * (1 + H^alpha)
     Esto asocia a cada nivel de felicidad una sociabilidad necesaria para mantenerla.
+    Si alpha es un vector, cada fila de happiness_scores usa su alpha.
     """
-    sociability_index = []
-    
-    for h in happiness_scores:
-        h_val = max(0, h) # Evitar negativos
-        # Aplicamos la fórmula: Felicidad amplificada por la apertura (alpha)
-        val = h_val * (1 + (h_val ** (1-alpha)))
-        sociability_index.append(round(val, decimales))
-        
-    return sociability_index
+    (alpha,) = _ejes_parametro(alpha)
 
-def simulated_happiness(alpha, horas, archivo_excel_data, archivo_excel_results):
+    h_val = np.maximum(0, np.asarray(happiness_scores, dtype=float)) # Evitar negativos
+    # Aplicamos la fórmula: Felicidad amplificada por la apertura (alpha)
+    sociability_index = np.round(h_val * (1 + (h_val ** (1 - alpha))), decimales)
+
+    return _como_entrada(sociability_index, happiness_scores)
+
+def extraer_factores(df):
     """
-    Lee datos, calcula Felicidad y Sociabilidad derivada, y guarda ambas columnas.
+    Elige qué dato usar como 'factor' del modelo: la última columna numérica,
+    la longitud del último texto o, en último caso, valores aleatorios.
     """
-    if not os.path.exists(archivo_excel_data):
-        print(f"Error: No se encuentra el archivo {archivo_excel_data}")
-        return
-
-    df = pd.read_excel(archivo_excel_data)
-    
-    # --- 1. DETECCIÓN INTELIGENTE DE DATOS ---
     # Buscamos qué dato usar como 'factor' (Likes o Longitud de texto)
     cols_numericas = df.select_dtypes(include=[np.number]).columns.tolist()
     cols_texto = df.select_dtypes(include=['object', 'string']).columns.tolist()
     
-    primer_factores = []
-    
     if len(cols_numericas) > 0 and "id" not in cols_numericas[-1].lower():
         # Si hay una columna numérica al final, la usamos
         col_usada = cols_numericas[-1]
-        primer_factores = df[col_usada].tolist()
+        primer_factores = df[col_usada]
         print(f"  -> Calculando basado en datos numéricos: '{col_usada}'")
         
     elif len(cols_texto) > 0:
         # Si solo hay texto, contamos los caracteres de cada celda
         col_usada = cols_texto[-1]
-        primer_factores = df[col_usada].astype(str).apply(len).tolist()
+        primer_factores = df[col_usada].astype(str).str.len()
         print(f"  -> Calculando basado en longitud de texto de: '{col_usada}'")
         
     else:
         # Caso de emergencia: Generar aleatorios para que no falle
         print("  -> ¡Aviso! No hay datos útiles. Usando simulación aleatoria.")
         np.random.seed(42)
-        primer_factores = np.random.randint(10, 500, size=len(df)).tolist()
+        primer_factores = np.random.randint(10, 500, size=len(df))
+
+    return primer_factores
+
+def simulated_happiness(alpha, horas, archivo_excel_data, archivo_excel_results):
+    """
+    Lee datos, calcula Felicidad y Sociabilidad derivada, y guarda ambas columnas.
+    Devuelve la tabla guardada (o None si no se encuentra el archivo de datos).
+    """
+    if not existe_tabla(archivo_excel_data):
+        print(f"Error: No se encuentra el archivo {archivo_excel_data}")
+        return
+
+    df = leer_tabla(archivo_excel_data)
+    
+    # --- 1. DETECCIÓN INTELIGENTE DE DATOS ---
+    primer_factores = extraer_factores(df)
 
     # --- 2. CÁLCULO DE FELICIDAD ---
     happiness_score = calculate_happiness(alpha, primer_factores, horas=horas)
@@ -81,8 +238,9 @@ def simulated_happiness(alpha, horas, archivo_excel_data, archivo_excel_results)
         "Indice_Sociabilidad": sociability_score
     })
     
-    df_resultado.to_excel(archivo_excel_results, index=False)
+    guardar_tabla(df_resultado, archivo_excel_results)
     print(f"  Guardado correctamente en:\n  {archivo_excel_results}")
+    return df_resultado
 
 def pedir_alpha():
     """
@@ -0,0 +1,367 @@
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+import traceback
+import weakref
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+
+
+import numpy as np
+
+from motor_vectorizado import MotorSocial, desplazamientos_vecindad
+from poblacion import agentes_desde_excel, rellenar_poblacion
+
+# Segundos que una tesela espera a las demás (barrera o buzón) antes de dar
+# la corrida por fallida, y que el proceso principal espera al resto de
+# teselas después del primer error
+TIEMPO_ESPERA = 600
+ESPERA_TRAS_ERROR = 5
+
+
+# --- 1. MEMORIA COMPARTIDA ---
+class _Compartido:
+    """Arrays de NumPy sobre bloques de shared_memory, accesibles por nombre desde los procesos."""
+
+    def __init__(self, especificacion, nombres=None):
+        self.bloques = {}
+        self.arrays = {}
+        for clave, (forma, dtype) in especificacion.items():
+            tam = max(1, int(np.prod(forma)) * np.dtype(dtype).itemsize)
+            if nombres is None:
+                bloque = shared_memory.SharedMemory(create=True, size=tam)
+            else:
+                bloque = shared_memory.SharedMemory(name=nombres[clave])
+            self.bloques[clave] = bloque
+            self.arrays[clave] = np.ndarray(forma, dtype=dtype, buffer=bloque.buf)
+
+    def nombres(self):
+        return {clave: bloque.name for clave, bloque in self.bloques.items()}
+
+    def cerrar(self, liberar=False):
+        self.arrays.clear()
+        for bloque in self.bloques.values():
+            try:
+                bloque.close()
+            except BufferError:
+                # Aún hay vistas vivas sobre el bloque: se libera al salir del proceso
+                pass
+            if liberar:
+                bloque.unlink()
+
+
+# --- 2. PROCESO DE UNA TESELA ---
+def _trabajador(indice, limites, width, height, social_threshold, semilla, especificacion,
+                nombres, barrera, buzones, conexion):
+    """
+    Bucle de un proceso: posee las filas x en [x0, x1) de la rejilla y los
+    agentes que están en ellas. En cada paso:
+      1. mueve sus agentes leyendo la ocupación compartida (las filas vecinas
+         de otras teselas hacen de halo);
+      2. entrega a las teselas vecinas los agentes que han cruzado el borde;
+      3. reconstruye su franja de ocupación y de suma de felicidad;
+      4. actualiza la felicidad de sus agentes con las franjas (y halos) de todos.
+    Las barreras separan las escrituras de una fase de las lecturas de la siguiente.
+    Si algo falla (también al preparar la tesela), se rompe la barrera para
+    que las demás teselas no se queden esperando y se envía el traceback al
+    proceso principal.
+    """
+    try:
+        _bucle_tesela(indice, limites, width, height, social_threshold, semilla, especificacion,
+                      nombres, barrera, buzones, conexion)
+    except Exception:
+        barrera.abort()
+        try:
+            conexion.send(("error", traceback.format_exc()))
+        except (BrokenPipeError, OSError):
+            pass
+
+def _bucle_tesela(indice, limites, width, height, social_threshold, semilla, especificacion,
+                  nombres, barrera, buzones, conexion):
+    memoria = _Compartido(especificacion, nombres)
+    x, y = memoria.arrays["x"], memoria.arrays["y"]
+    happiness, sociability = memoria.arrays["happiness"], memoria.arrays["sociability"]
+    ocupacion, suma_felicidad = memoria.arrays["ocupacion"], memoria.arrays["suma_felicidad"]
+
+    teselas = len(limites) - 1
+    x0, x1 = limites[indice], limites[indice + 1]
+    izquierda, derecha = (indice - 1) % teselas, (indice + 1) % teselas
+    rng = np.random.default_rng(semilla)
+    desplazamientos = desplazamientos_vecindad(width, height)
+    propios = np.flatnonzero((x >= x0) & (x < x1))
+
+    def reconstruir():
+        celdas = (x[propios] - x0) * height + y[propios]
+        tam = (x1 - x0) * height
+        ocupacion[x0:x1] = np.bincount(celdas, minlength=tam).reshape(x1 - x0, height)
+        suma_felicidad[x0:x1] = np.bincount(
+            celdas, weights=happiness[propios], minlength=tam
+        ).reshape(x1 - x0, height)
+
+    def recibir():
+        # get() con plazo, atento a que otra tesela haya roto la barrera
+        limite = time.monotonic() + TIEMPO_ESPERA
+        while True:
+            try:
+                return buzones[indice].get(timeout=0.1)
+            except queue.Empty:
+                if barrera.broken:
+                    raise threading.BrokenBarrierError
+                if time.monotonic() > limite:
+                    raise TimeoutError(f"La tesela {indice} no recibió los agentes de sus vecinas")
+
+    def suma_vecindad(rejilla):
+        # Halo: la franja propia más una fila de cada tesela vecina (toroidal)
+        bloque = rejilla[np.arange(x0 - 1, x1 + 1) % width]
+        total = np.zeros((x1 - x0, height), dtype=rejilla.dtype)
+        for dx, dy in desplazamientos:
+            total += np.roll(bloque[1 + dx:1 + dx + x1 - x0], -dy, axis=1)
+        return total
+
+    def paso():
+        nonlocal propios
+        # 1. Movimiento (misma regla que MotorSocial.move_smart)
+        px, py = x[propios], y[propios]
+        vx = (px[:, None] + desplazamientos[:, 0]) % width
+        vy = (py[:, None] + desplazamientos[:, 1]) % height
+        conteos = ocupacion[vx, vy]
+        gregarios = sociability[propios] > social_threshold
+        puntuacion = np.where(gregarios[:, None], conteos, -conteos)
+        puntuacion = puntuacion + rng.random(puntuacion.shape) * 0.5
+        eleccion = np.argmax(puntuacion, axis=1)
+        filas = np.arange(len(propios))
+        px, py = vx[filas, eleccion], vy[filas, eleccion]
+        x[propios], y[propios] = px, py
+        barrera.wait()
+
+        # 2. Traspaso: como mucho se avanza una celda, solo a teselas vecinas
+        if teselas > 1:
+            dentro = (px >= x0) & (px < x1)
+            salen = propios[~dentro]
+            a_izquierda = px[~dentro] == (x0 - 1) % width
+            buzones[izquierda].put(("der", salen[a_izquierda]))
+            buzones[derecha].put(("izq", salen[~a_izquierda]))
+            recibidos = dict(recibir() for _ in range(2))
+            # Orden fijo para que la corrida sea reproducible
+            propios = np.concatenate([propios[dentro], recibidos["izq"], recibidos["der"]])
+
+        # 3. Índice espacial de la franja propia
+        reconstruir()
+        barrera.wait()
+
+        # 4. Influencia (misma regla que MotorSocial.interact_and_influence)
+        fx, fy = x[propios] - x0, y[propios]
+        n_vecinos = suma_vecindad(ocupacion)[fx, fy]
+        suma_vecinos = suma_vecindad(suma_felicidad)[fx, fy]
+        con_vecinos = n_vecinos > 0
+        h = happiness[propios]
+        avg_happiness = suma_vecinos[con_vecinos] / n_vecinos[con_vecinos]
+        permeability = np.minimum(0.3, sociability[propios][con_vecinos] * 0.05)
+        delta = (avg_happiness - h[con_vecinos]) * permeability
+        h[con_vecinos] = np.clip(h[con_vecinos] + delta, 0, 5)
+        happiness[propios] = h
+
+    try:
+        reconstruir()
+        barrera.wait()
+        conexion.send(("listo", None))
+        while True:
+            orden, pasos = conexion.recv()
+            if orden == "fin":
+                break
+            for _ in range(pasos):
+                paso()
+            # Nadie lee ni escribe la rejilla hasta la siguiente orden: el
+            # siguiente paso() solo lee la ocupación ya reconstruida
+            conexion.send(("hecho", None))
+    finally:
+        del x, y, happiness, sociability, ocupacion, suma_felicidad
+        memoria.cerrar()
+
+
+# --- 3. MOTOR POR TESELAS ---
+class MotorTeselado(MotorSocial):
+    """
+    MotorSocial repartido entre varios procesos para poblaciones muy grandes.
+
+    La rejilla toroidal se divide en franjas de filas (teselas); cada proceso
+    posee una franja y los agentes que están en ella. Posiciones, felicidad,
+    sociabilidad e índices de la rejilla viven en memoria compartida, así que
+    el halo (las filas vecinas de otra tesela) se lee directamente y al
+    cruzar un borde solo se traspasa el identificador del agente.
+
+    Las reglas son las de MotorSocial (actualización simultánea). Con la misma
+    semilla y el mismo número de teselas la corrida es reproducible, pero no
+    coincide agente a agente con MotorSocial: cada tesela usa su propio
+    generador (SeedSequence.spawn).
+
+    Con poblacion=DistribucionConjunta (poblacion.py) los N agentes se generan
+    por bloques directamente en la memoria compartida, sin una copia previa.
+
+    Hay que llamar a cerrar() (o usarlo con 'with') para terminar los procesos.
+    """
+
+    def __init__(self, N, width, height, excel_file_path=None, social_threshold=2.0, seed=None,
+                 teselas=None, recolector=None, agentes_iniciales=None, remuestreo="ciclico",
+                 convergencia=None, poblacion=None):
+        teselas = min(teselas or os.cpu_count() or 1, width)
+        self.num_agents = N
+        self.width = width
+        self.height = height
+        self.desplazamientos = desplazamientos_vecindad(width, height)
+        self.social_threshold = social_threshold
+        self.topologia = None
+        self.rng = np.random.default_rng(seed)
+        self.running = True
+        self.steps = 0
+        self.teselas = teselas
+
+        if agentes_iniciales is None and poblacion is None:
+            agentes_iniciales = agentes_desde_excel(
+                excel_file_path, N, width, height, seed=self.rng, remuestreo=remuestreo
+            )
+        if agentes_iniciales is not None:
+            self.num_agents = N = len(agentes_iniciales["happiness"])
+
+        especificacion = {
+            "x": ((N,), np.int64), "y": ((N,), np.int64),
+            "happiness": ((N,), np.float64), "sociability": ((N,), np.float64),
+            "ocupacion": ((width, height), np.int64),
+            "suma_felicidad": ((width, height), np.float64),
+        }
+        self._memoria = _Compartido(especificacion)
+        estado = {clave: self._memoria.arrays[clave] for clave in ("x", "y", "happiness", "sociability")}
+        if agentes_iniciales is None:
+            rellenar_poblacion(estado, poblacion, width, height, seed=self.rng)
+        else:
+            for clave, array in estado.items():
+                array[:] = agentes_iniciales[clave]
+        # Vistas sobre la memoria compartida: recolector, convergencia y
+        # puntos_control leen el estado igual que en MotorSocial
+        self.x, self.y = self._memoria.arrays["x"], self._memoria.arrays["y"]
+        self.happiness = self._memoria.arrays["happiness"]
+        self.sociability = self._memoria.arrays["sociability"]
+
+        self.recolector = recolector
+        self.historial = []
+
+        self._lanzar_procesos(teselas, seed, especificacion)
+        self._finalizador = weakref.finalize(self, MotorTeselado._liberar,
+                                             self._procesos, self._conexiones, self._memoria)
+        self._esperar()
+
+        self.convergencia = convergencia
+        self.paso_convergencia = None
+        if convergencia is not None:
+            convergencia.iniciar(self)
+
+    def _lanzar_procesos(self, teselas, seed, especificacion):
+        limites = np.linspace(0, self.width, teselas + 1).astype(int)
+        semillas = np.random.SeedSequence(seed).spawn(teselas)
+        contexto = mp.get_context()
+        barrera = contexto.Barrier(teselas, timeout=TIEMPO_ESPERA)
+        buzones = [contexto.Queue() for _ in range(teselas)]
+
+        self._procesos, self._conexiones = [], []
+        for i in range(teselas):
+            propia, ajena = contexto.Pipe()
+            proceso = contexto.Process(
+                target=_trabajador,
+                args=(i, limites, self.width, self.height, self.social_threshold, semillas[i],
+                      especificacion, self._memoria.nombres(), barrera, buzones, ajena),
+                daemon=True,
+            )
+            proceso.start()
+            self._procesos.append(proceso)
+            self._conexiones.append(propia)
+        self._barrera = barrera
+
+    def _esperar(self):
+        """
+        Espera la respuesta de todas las teselas. Si alguna falla o muere, rompe
+        la barrera para liberar a las demás, termina los procesos y relanza el
+        error como RuntimeError con el traceback de la tesela.
+        """
+        pendientes = dict(enumerate(self._conexiones))
+        errores = {}
+        plazo = None
+        while pendientes:
+            centinelas = {self._procesos[i].sentinel: i for i in pendientes}
+            listos = wait(list(pendientes.values()) + list(centinelas), timeout=plazo)
+            if not listos:
+                break
+            for objeto in listos:
+                i = centinelas.get(objeto)
+                if i is None:
+                    i = next(i for i, conexion in pendientes.items() if conexion is objeto)
+                    try:
+                        mensaje, detalle = objeto.recv()
+                    except EOFError:
+                        mensaje, detalle = "error", "el proceso terminó sin responder"
+                    if mensaje == "error":
+                        errores[i] = detalle
+                    pendientes.pop(i)
+                elif i in pendientes and not pendientes[i].poll():
+                    errores[i] = f"el proceso terminó con código {self._procesos[i].exitcode}"
+                    pendientes.pop(i)
+            if errores:
+                self._barrera.abort()
+                plazo = ESPERA_TRAS_ERROR
+        if not errores:
+            return
+
+        self.cerrar()
+        # La barrera rota es consecuencia del fallo de otra tesela: se informa
+        # de la causa original si se conoce
+        originales = {i: detalle for i, detalle in errores.items()
+                      if "BrokenBarrierError" not in detalle}
+        i, detalle = next(iter(sorted((originales or errores).items())))
+        mensaje = f"Falló la tesela {i}: {detalle}"
+        if pendientes:
+            mensaje += f"\nSin respuesta de las teselas {sorted(pendientes)}"
+        raise RuntimeError(mensaje)
+
+    def avanzar(self, pasos):
+        """Ejecuta 'pasos' pasos seguidos en los procesos, sin recoger datos entre medias."""
+        for conexion in self._conexiones:
+            try:
+                conexion.send(("pasos", pasos))
+            except (BrokenPipeError, OSError):
+                # Tesela muerta: _esperar lo detecta por su centinela
+                pass
+        self._esperar()
+        self.steps += pasos
+
+    def step(self):
+        self.collect()
+        self.avanzar(1)
+        if self.convergencia is not None and self.convergencia.evaluar(self, self.steps):
+            self.running = False
+            self.paso_convergencia = self.steps
+
+    @staticmethod
+    def _liberar(procesos, conexiones, memoria):
+        for conexion in conexiones:
+            try:
+                conexion.send(("fin", 0))
+            except (BrokenPipeError, OSError):
+                pass
+        for proceso in procesos:
+            proceso.join(timeout=5)
+            if proceso.is_alive():
+                proceso.terminate()
+        memoria.cerrar(liberar=True)
+
+    def cerrar(self):
+        """Termina los procesos y libera la memoria compartida (copia antes el estado si se necesita)."""
+        self.x, self.y = self.x.copy(), self.y.copy()
+        self.happiness, self.sociability = self.happiness.copy(), self.sociability.copy()
+        self._finalizador()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
@@ -0,0 +1,210 @@
+import pandas as pd
+import numpy as np
+
+from poblacion import agentes_desde_excel
+from topologias import preparar_topologia, grado, influencia_red
+
+# --- 1. CONSTANTES DE LA REJILLA ---
+# Desplazamientos de la vecindad de Moore (sin la celda central), en el mismo
+# orden en que MultiGrid.get_neighborhood recorre las celdas vecinas.
+DESPLAZAMIENTOS_MOORE = np.array([
+    (-1, -1), (-1, 0), (-1, 1),
+    (0, -1),           (0, 1),
+    (1, -1),  (1, 0),  (1, 1),
+])
+
+def desplazamientos_vecindad(width, height):
+    """
+    Desplazamientos de la vecindad de Moore en una rejilla toroidal, en el
+    orden de MultiGrid.get_neighborhood, como array (k, 2). En rejillas de
+    menos de 3 celdas de lado varias vecinas coinciden (o son la propia celda)
+    y se quitan igual que hace Mesa; el resultado es el mismo para todas las
+    celdas.
+    """
+    vistos = {}
+    for dx, dy in DESPLAZAMIENTOS_MOORE.tolist():
+        vistos.setdefault((dx % width, dy % height), (dx, dy))
+    vistos.pop((0, 0), None)
+    return np.array(list(vistos.values()), dtype=np.int64).reshape(-1, 2)
+
+# Misma tabla que SocialAgent.update_color, indexada por felicidad redondeada
+COLORES = np.array(["Red", "Orange", "Yellow", "Green", "LightBlue", "DarkBlue"])
+
+
+# --- 2. MOTOR ---
+class MotorSocial:
+    """
+    Versión vectorizada de SocialModel: el estado de los agentes vive en arrays
+    de NumPy y las reglas move_smart / interact_and_influence se aplican a todos
+    los agentes a la vez sobre una rejilla toroidal.
+
+    Todos los agentes deciden con la ocupación y la felicidad del inicio del
+    paso, es decir, las mismas reglas que SocialModel con
+    actualizacion_simultanea=True. No reproduce esa corrida bajo la misma
+    semilla: los empates se deciden con otro generador (NumPy en lugar de
+    random), así que coinciden las distribuciones, no las trayectorias. Con
+    400 agentes en 30x30 y datos de FB, tras 60 pasos la felicidad media de
+    una réplica difiere hasta ~0.003 y su desviación típica hasta ~0.01; la
+    media de 16 réplicas coincide dentro de 0.002 y 0.0075 (ver
+    tests/test_motor_vectorizado.py). El modo por defecto de SocialModel
+    (orden aleatorio, actualización inmediata) es otra regla y da una
+    desviación típica menor (~0.046 frente a ~0.062).
+    """
+
+    def __init__(self, N, width, height, excel_file_path=None, social_threshold=2.0, seed=None,
+                 recolector=None, perfilador=None, agentes_iniciales=None, remuestreo="ciclico",
+                 convergencia=None, topologia=None):
+        self.num_agents = N
+        self.width = width
+        self.height = height
+        self.social_threshold = social_threshold
+        self.desplazamientos = desplazamientos_vecindad(width, height)
+        self.rng = np.random.default_rng(seed)
+        self.running = True
+        self.steps = 0
+
+        # Interacción sobre un grafo (ver SocialModel): el agente i es el nodo i
+        self.topologia = None
+        if topologia is not None:
+            self.topologia = preparar_topologia(topologia, N, seed=seed)
+            self.grados = grado(self.topologia)
+            N = self.topologia.shape[0]
+
+        if agentes_iniciales is None:
+            # Mismo generador que el resto de la corrida: una semilla lo fija todo
+            agentes_iniciales = agentes_desde_excel(
+                excel_file_path, N, width, height, seed=self.rng, remuestreo=remuestreo
+            )
+        self.num_agents = len(agentes_iniciales["happiness"])
+        self.happiness = np.array(agentes_iniciales["happiness"], dtype=float)
+        self.sociability = np.array(agentes_iniciales["sociability"], dtype=float)
+        self.x = np.array(agentes_iniciales["x"], dtype=np.int64)
+        self.y = np.array(agentes_iniciales["y"], dtype=np.int64)
+
+        # Estadísticas por paso (equivalente agregado del DataCollector).
+        # Con un RecolectorStreaming se escriben a disco en lugar de a la lista.
+        self.recolector = recolector
+        self.historial = []
+
+        # Parada opcional (convergencia.CriterioConvergencia)
+        self.convergencia = convergencia
+        self.paso_convergencia = None
+        if convergencia is not None:
+            convergencia.iniciar(self)
+
+        # Instrumentación opcional (perfilado.Perfilador)
+        if perfilador is not None:
+            perfilador.instrumentar(self)
+
+    def _rejilla(self, pesos=None):
+        """Suma (o cuenta, si pesos es None) los valores de los agentes de cada celda."""
+        celdas = self.x * self.height + self.y
+        rejilla = np.bincount(celdas, weights=pesos, minlength=self.width * self.height)
+        return rejilla.reshape(self.width, self.height)
+
+    def _suma_vecindad(self, rejilla):
+        """Para cada celda, suma los valores de sus vecinas de Moore (toroidal)."""
+        total = np.zeros_like(rejilla)
+        for dx, dy in self.desplazamientos:
+            total += np.roll(rejilla, shift=(-dx, -dy), axis=(0, 1))
+        return total
+
+    def move_smart(self):
+        """
+        Los sociables van a la celda vecina con más ocupantes y los
+        ermitaños a la que tiene menos; los empates se deciden al azar.
+        Con topología de red los agentes no se mueven.
+        """
+        if self.topologia is not None:
+            return
+        ocupacion = self._rejilla()
+        vx = (self.x[:, None] + self.desplazamientos[:, 0]) % self.width
+        vy = (self.y[:, None] + self.desplazamientos[:, 1]) % self.height
+        conteos = ocupacion[vx, vy]
+
+        gregarios = self.sociability > self.social_threshold
+        puntuacion = np.where(gregarios[:, None], conteos, -conteos)
+        # Los conteos son enteros: un ruido en [0, 0.5) solo desempata
+        puntuacion = puntuacion + self.rng.random(puntuacion.shape) * 0.5
+        eleccion = np.argmax(puntuacion, axis=1)
+
+        filas = np.arange(self.num_agents)
+        self.x = vx[filas, eleccion]
+        self.y = vy[filas, eleccion]
+
+    def interact_and_influence(self):
+        """
+        Cada agente se acerca a la felicidad media de sus vecinos (sin contar
+        su propia celda) con una permeabilidad que depende de su sociabilidad.
+        """
+        if self.topologia is not None:
+            self.happiness = influencia_red(self.topologia, self.grados,
+                                            self.happiness, self.sociability)
+            return
+        n_vecinos = self._suma_vecindad(self._rejilla())[self.x, self.y]
+        suma_vecinos = self._suma_vecindad(self._rejilla(self.happiness))[self.x, self.y]
+
+        con_vecinos = n_vecinos > 0
+        avg_happiness = suma_vecinos[con_vecinos] / n_vecinos[con_vecinos]
+        permeability = np.minimum(0.3, self.sociability[con_vecinos] * 0.05)
+
+        delta = (avg_happiness - self.happiness[con_vecinos]) * permeability
+        self.happiness[con_vecinos] = np.clip(self.happiness[con_vecinos] + delta, 0, 5)
+
+    def bandas_color(self):
+        """Índice de color de cada agente (felicidad redondeada en 0-5)."""
+        return np.rint(np.clip(self.happiness, 0, 5)).astype(int)
+
+    def collect(self):
+        if self.recolector is not None:
+            self.recolector.collect(self)
+            return
+        self.historial.append({
+            "Step": self.steps,
+            "Felicidad_media": self.happiness.mean(),
+            "Felicidad_std": self.happiness.std(ddof=1),
+            "Sociabilidad_media": self.sociability.mean(),
+        })
+
+    def step(self):
+        # Igual que SocialModel.step: se recoge antes de mover
+        self.collect()
+        self.move_smart()
+        self.interact_and_influence()
+        self.steps += 1
+        if self.convergencia is not None and self.convergencia.evaluar(self, self.steps):
+            self.running = False
+            self.paso_convergencia = self.steps
+
+    def run(self, pasos):
+        for _ in range(pasos):
+            if not self.running:
+                break
+            self.step()
+        return self.estadisticas()
+
+    def estadisticas(self):
+        """Tabla de estadísticas por paso, con las mismas columnas que estadisticas_mesa."""
+        if self.recolector is not None:
+            return self.recolector.estadisticas()
+        return pd.DataFrame(self.historial, columns=[
+            "Step", "Felicidad_media", "Felicidad_std", "Sociabilidad_media"
+        ])
+
+
+# --- 3. COMPARACIÓN CON LA RUTA MESA ---
+def estadisticas_mesa(model):
+    """
+    Resume el DataCollector de un SocialModel en la misma tabla que
+    MotorSocial.estadisticas, para comparar ambos motores.
+    """
+    if hasattr(model.datacollector, "estadisticas"):
+        # RecolectorStreaming ya guarda los agregados por paso
+        return model.datacollector.estadisticas()
+    df = model.datacollector.get_agent_vars_dataframe().reset_index()
+    resumen = df.groupby("Step").agg(
+        Felicidad_media=("Felicidad", "mean"),
+        Felicidad_std=("Felicidad", "std"),
+        Sociabilidad_media=("Sociabilidad", "mean"),
+    )
+    return resumen.reset_index()
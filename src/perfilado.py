@@ -0,0 +1,151 @@
+import pandas as pd
+import cProfile
+import io
+import pstats
+import time
+from collections import defaultdict
+
+from recolector import paso_actual
+
+# --- 1. FASES INSTRUMENTADAS ---
+# Métodos de SocialModel: el modo por defecto es un único recorrido de los
+# agentes; el simultáneo y el de topología trabajan sobre todos a la vez
+# Dentro de paso_secuencial el propio modelo mide por separado el movimiento
+# y la influencia de cada agente, con los nombres de FASES_MOTOR
+FASES_MODELO = [
+    "paso_secuencial",
+    "fase_decidir", "fase_mover", "fase_influir", "fase_actualizar",
+    "paso_red",
+]
+# Métodos de MotorSocial, que trabaja sobre todos los agentes a la vez
+FASES_MOTOR = ["move_smart", "interact_and_influence"]
+
+
+# --- 2. PERFILADOR ---
+class Perfilador:
+    """
+    Mide tiempo acumulado y número de llamadas por fase y por paso.
+
+    No modifica el código del modelo: instrumentar() sustituye los métodos de
+    fase del modelo (FASES_MODELO o FASES_MOTOR) y su recolección por
+    versiones cronometradas, así que un modelo sin perfilador no paga ningún
+    coste. El recorrido fusionado de paso_secuencial no se puede envolver por
+    partes: SocialModel acumula ahí el tiempo de las fases de FASES_MOTOR y
+    lo entrega con acumular().
+
+    :param ventana_cprofile: Tupla (paso_inicio, paso_fin) en la que se activa
+        cProfile, o None para no usarlo.
+    :param ruta_cprofile: Archivo .prof donde volcar el perfil de la ventana.
+    """
+
+    def __init__(self, ventana_cprofile=None, ruta_cprofile=None):
+        self.ventana_cprofile = ventana_cprofile
+        self.ruta_cprofile = ruta_cprofile
+        self.estadisticas_cprofile = None
+
+        self.filas = []
+        self._actual = defaultdict(lambda: [0.0, 0])
+        self._cprofile = None
+
+    def envolver(self, fase, funcion):
+        """Devuelve 'funcion' cronometrada, acumulando en la fase indicada."""
+        acumulado = self._actual
+        reloj = time.perf_counter
+
+        def medida(*args, **kwargs):
+            inicio = reloj()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                registro = acumulado[fase]
+                registro[0] += reloj() - inicio
+                registro[1] += 1
+
+        return medida
+
+    def acumular(self, fase, segundos, llamadas=1):
+        """Suma a la fase un tiempo medido fuera de envolver()."""
+        registro = self._actual[fase]
+        registro[0] += segundos
+        registro[1] += llamadas
+
+    def instrumentar(self, model):
+        """Engancha el perfilador a un SocialModel o a un MotorSocial."""
+        if hasattr(model, "datacollector"):
+            model.perfilador = self
+            for fase in FASES_MODELO:
+                setattr(model, fase, self.envolver(fase, getattr(model, fase)))
+            model.datacollector.collect = self.envolver("collect", model.datacollector.collect)
+        else:
+            for fase in FASES_MOTOR:
+                setattr(model, fase, self.envolver(fase, getattr(model, fase)))
+            model.collect = self.envolver("collect", model.collect)
+
+        paso = model.step
+
+        def step():
+            numero = paso_actual(model)
+            self._abrir_paso(numero)
+            inicio = time.perf_counter()
+            paso()
+            self._cerrar_paso(numero, time.perf_counter() - inicio)
+
+        model.step = step
+        return model
+
+    # --- Gestión de pasos y cProfile ---
+    def _en_ventana(self, numero):
+        return self.ventana_cprofile is not None and \
+            self.ventana_cprofile[0] <= numero < self.ventana_cprofile[1]
+
+    def _abrir_paso(self, numero):
+        if self._cprofile is None and self._en_ventana(numero):
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def _cerrar_paso(self, numero, total):
+        fila = {"Step": numero, "paso_s": total}
+        for fase, (tiempo, llamadas) in self._actual.items():
+            fila[f"{fase}_s"] = tiempo
+            fila[f"{fase}_llamadas"] = llamadas
+        self.filas.append(fila)
+        self._actual.clear()
+
+        if self._cprofile is not None and not self._en_ventana(numero + 1):
+            self._cprofile.disable()
+            self.estadisticas_cprofile = pstats.Stats(self._cprofile)
+            if self.ruta_cprofile:
+                self.estadisticas_cprofile.dump_stats(self.ruta_cprofile)
+            self._cprofile = None
+
+    # --- Exportación ---
+    def tabla_por_paso(self):
+        """Una fila por paso con tiempo y llamadas de cada fase."""
+        return pd.DataFrame(self.filas).fillna(0)
+
+    def resumen(self):
+        """Tiempo total, llamadas y porcentaje del total por fase."""
+        df = self.tabla_por_paso()
+        columnas = [c for c in df.columns if c.endswith("_s") and c != "paso_s"]
+        total = df["paso_s"].sum()
+        filas = []
+        for columna in columnas:
+            fase = columna[:-2]
+            filas.append({
+                "fase": fase,
+                "tiempo_s": df[columna].sum(),
+                "llamadas": int(df[f"{fase}_llamadas"].sum()) if f"{fase}_llamadas" in df else None,
+                "porcentaje": 100 * df[columna].sum() / total if total else 0.0,
+            })
+        resumen = pd.DataFrame(filas)
+        resumen["llamadas"] = resumen["llamadas"].astype("Int64")
+        return resumen.sort_values("tiempo_s", ascending=False)
+
+    def informe_cprofile(self, lineas=20, orden="cumulative"):
+        """Texto con las funciones más costosas de la ventana de cProfile."""
+        if self.estadisticas_cprofile is None:
+            return ""
+        salida = io.StringIO()
+        self.estadisticas_cprofile.stream = salida
+        self.estadisticas_cprofile.sort_stats(orden).print_stats(lineas)
+        return salida.getvalue()
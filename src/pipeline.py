@@ -0,0 +1,248 @@
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from cache_datos import existe_tabla, hash_archivo, ruta_cache
+from filtra_datos import COLUMNAS_RED, procesar_redes
+from modelo_felicidad import simulated_happiness, TablasCompartidas, conectar_tablas
+from calibrado_aunado import calcular_correlacion, metricas_modelo
+
+# --- 1. RUTAS ---
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SRC_DIR)
+DATA_FILE = os.path.join(PROJECT_ROOT, "data", "3145_data.xlsx")
+CLEAN_DATA_DIR = os.path.join(PROJECT_ROOT, "clean_data")
+RESULTADOS_DIR = os.path.join(PROJECT_ROOT, "resultados")
+
+# Estado de la última ejecución: clave de cada etapa y hash de sus salidas
+ARCHIVO_ESTADO = os.path.join(CLEAN_DATA_DIR, ".cache", "pipeline.json")
+
+# Subir este número obliga a rehacer todo si cambia la lógica de alguna etapa
+VERSION_ETAPAS = 2
+
+
+def ruta_limpia(red):
+    return os.path.join(CLEAN_DATA_DIR, f"3145_data_clean_{red}.xlsx")
+
+def ruta_modelo(red):
+    return os.path.join(CLEAN_DATA_DIR, f"model_{red}.xlsx")
+
+def ruta_calibracion(red):
+    return os.path.join(RESULTADOS_DIR, f"calibracion_{red}.json")
+
+
+# --- 2. DEFINICIÓN DEL GRAFO ---
+def _clave(*partes):
+    """Hash de los parámetros de una etapa y de las claves de las que depende."""
+    texto = json.dumps([VERSION_ETAPAS, *partes], sort_keys=True, default=str)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+def construir_grafo(redes, alpha, horas):
+    """
+    Devuelve las etapas {nombre: etapa} del pipeline para las redes pedidas:
+    filtrar:RED -> modelo:RED -> calibrar:RED.
+
+    La clave de cada etapa combina sus parámetros con la clave de su
+    dependencia (y el hash del Excel del CIS para el filtrado), de modo que un
+    cambio solo invalida las etapas que quedan por debajo.
+    """
+    hash_datos = hash_archivo(DATA_FILE) if os.path.exists(DATA_FILE) else None
+    etapas = {}
+
+    for red in redes:
+        columna = COLUMNAS_RED[red]
+        filtrar = {
+            "tipo": "filtrar", "red": red, "depende": None,
+            "clave": _clave("filtrar", red, columna, hash_datos),
+            "salidas": [ruta_limpia(red)],
+        }
+        modelo = {
+            "tipo": "modelo", "red": red, "depende": f"filtrar:{red}",
+            "clave": _clave("modelo", red, alpha, horas, filtrar["clave"]),
+            "salidas": [ruta_modelo(red)],
+        }
+        calibrar = {
+            "tipo": "calibrar", "red": red, "depende": f"modelo:{red}",
+            "clave": _clave("calibrar", red, modelo["clave"]),
+            "salidas": [ruta_calibracion(red)],
+        }
+        etapas[f"filtrar:{red}"] = filtrar
+        etapas[f"modelo:{red}"] = modelo
+        etapas[f"calibrar:{red}"] = calibrar
+
+    return etapas
+
+
+# --- 3. ESTADO ---
+def cargar_estado():
+    try:
+        with open(ARCHIVO_ESTADO, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def guardar_estado(estado):
+    os.makedirs(os.path.dirname(ARCHIVO_ESTADO), exist_ok=True)
+    with open(ARCHIVO_ESTADO, "w", encoding="utf-8") as f:
+        json.dump(estado, f, indent=2, sort_keys=True)
+
+def _hash_salida(ruta):
+    """
+    Hash del contenido de una salida, o None si no existe. Para las tablas
+    .xlsx que no se exportan a Excel se usa su caché columnar.
+    """
+    if os.path.exists(ruta):
+        return hash_archivo(ruta)
+    if ruta.endswith(".xlsx") and existe_tabla(ruta):
+        return hash_archivo(ruta_cache(ruta))
+    return None
+
+def registro_etapa(etapa):
+    """Lo que se guarda de una etapa terminada: su clave y el hash de cada salida."""
+    return {"clave": etapa["clave"],
+            "salidas": {os.path.relpath(ruta, PROJECT_ROOT): _hash_salida(ruta) for ruta in etapa["salidas"]}}
+
+def _etapa_vigente(etapa, registro):
+    # Una salida sobrescrita desde fuera (p. ej. model_FB.xlsx con otro alpha
+    # desde el menú) cambia de hash aunque la clave de la etapa sea la misma
+    if not isinstance(registro, dict) or registro.get("clave") != etapa["clave"]:
+        return False
+    hashes = registro.get("salidas", {})
+    for ruta in etapa["salidas"]:
+        guardado = hashes.get(os.path.relpath(ruta, PROJECT_ROOT))
+        if guardado is None or guardado != _hash_salida(ruta):
+            return False
+    return True
+
+def etapas_pendientes(etapas, estado, forzar=False):
+    """
+    Nombres de las etapas que hay que ejecutar: las que cambiaron de clave,
+    no tienen sus salidas o las tienen modificadas, o dependen de una etapa
+    pendiente.
+    """
+    pendientes = set()
+    # Las etapas se crean en orden topológico, así que basta una pasada
+    for nombre, etapa in etapas.items():
+        obsoleta = (
+            forzar
+            or etapa["depende"] in pendientes
+            or not _etapa_vigente(etapa, estado.get(nombre))
+        )
+        if obsoleta:
+            pendientes.add(nombre)
+    return pendientes
+
+
+# --- 4. EJECUCIÓN ---
+def _modelo_y_calibracion(red, alpha, horas, hacer_modelo, hacer_calibracion):
+    """
+    Cadena modelo -> calibración de una red (se ejecuta en un proceso aparte).
+    Si alguna etapa no produce resultado se lanza RuntimeError, para que no
+    quede registrada como hecha.
+    """
+    if hacer_modelo:
+        print(f"\n[modelo:{red}] alpha={alpha}, horas={horas}")
+        if simulated_happiness(alpha, horas, ruta_limpia(red), ruta_modelo(red)) is None:
+            raise RuntimeError(f"No se pudo generar el modelo de {red}")
+
+    if hacer_calibracion:
+        print(f"\n[calibrar:{red}]")
+        archivos = (os.path.basename(ruta_limpia(red)), os.path.basename(ruta_modelo(red)))
+        correlacion = calcular_correlacion(red, *archivos)
+        if correlacion is None:
+            raise RuntimeError(f"No se pudo calcular la correlación de {red}")
+        # Pearson, Spearman, RMSE y MAE con intervalos bootstrap
+        metricas = metricas_modelo(red, *archivos, seed=0)
+        if metricas is not None:
+            metricas.pop("red")
+        os.makedirs(RESULTADOS_DIR, exist_ok=True)
+        with open(ruta_calibracion(red), "w", encoding="utf-8") as f:
+            json.dump({"red": red, "alpha": alpha, "horas": horas,
+                       "correlacion": correlacion, "metricas": metricas}, f, indent=2)
+
+def ejecutar_pipeline(redes=None, alpha=0.2, horas=8.0, forzar=False, procesos=None):
+    """
+    Ejecuta filtrado -> modelo -> calibración sin menús, saltando las etapas
+    que están al día. El filtrado de todas las redes pendientes se hace en una
+    sola pasada; el resto de etapas de cada red corre en paralelo.
+    Devuelve el conjunto de etapas ejecutadas.
+    """
+    redes = list(redes or COLUMNAS_RED)
+    etapas = construir_grafo(redes, alpha, horas)
+    estado = cargar_estado()
+    pendientes = etapas_pendientes(etapas, estado, forzar)
+
+    if not pendientes:
+        print("Todo está al día. No hay nada que ejecutar.")
+        return pendientes
+
+    print("Etapas a ejecutar: " + ", ".join(n for n in etapas if n in pendientes))
+
+    # Nivel 1: filtrado (una sola lectura del CIS para todas las redes)
+    redes_filtrar = [red for red in redes if f"filtrar:{red}" in pendientes]
+    if redes_filtrar:
+        procesar_redes({red: COLUMNAS_RED[red] for red in redes_filtrar}, raiz=PROJECT_ROOT)
+        for red in redes_filtrar:
+            estado[f"filtrar:{red}"] = registro_etapa(etapas[f"filtrar:{red}"])
+        guardar_estado(estado)
+
+    # Niveles 2 y 3: cada red es independiente de las demás
+    trabajos = {
+        red: (f"modelo:{red}" in pendientes, f"calibrar:{red}" in pendientes)
+        for red in redes
+        if f"modelo:{red}" in pendientes or f"calibrar:{red}" in pendientes
+    }
+    # Todas las redes usan la misma tabla de felicidad: se calcula una vez y
+    # los procesos la leen de memoria compartida
+    tablas = TablasCompartidas.crear([(alpha, horas)])
+    errores = {}
+    try:
+        with ProcessPoolExecutor(max_workers=procesos, initializer=conectar_tablas,
+                                 initargs=(tablas.nombre,)) as pool:
+            futuros = {
+                pool.submit(_modelo_y_calibracion, red, alpha, horas, *flags): red
+                for red, flags in trabajos.items()
+            }
+            # Las redes que terminan se guardan aunque otra falle: la próxima
+            # ejecución solo repite las que no acabaron
+            for futuro in as_completed(futuros):
+                red = futuros[futuro]
+                try:
+                    futuro.result()
+                except Exception as e:
+                    print(f"Error en la red {red}: {e}")
+                    errores[red] = e
+                    continue
+                for nombre in (f"modelo:{red}", f"calibrar:{red}"):
+                    if nombre in pendientes:
+                        estado[nombre] = registro_etapa(etapas[nombre])
+                guardar_estado(estado)
+    finally:
+        tablas.cerrar()
+
+    if errores:
+        primera = next(iter(errores.values()))
+        raise RuntimeError(f"Fallaron las redes: {', '.join(errores)}") from primera
+    return pendientes
+
+
+# --- 5. LÍNEA DE COMANDOS ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Pipeline filtrado -> modelo -> calibración, incremental y sin menús."
+    )
+    parser.add_argument("--redes", nargs="+", choices=list(COLUMNAS_RED), default=list(COLUMNAS_RED))
+    parser.add_argument("--alpha", type=float, default=0.2)
+    parser.add_argument("--horas", type=float, default=8.0)
+    parser.add_argument("--forzar", action="store_true", help="Rehacer todas las etapas")
+    parser.add_argument("--procesos", type=int, default=None)
+    args = parser.parse_args()
+
+    if not 0 <= args.alpha <= 1:
+        parser.error("El valor alpha debe estar entre 0 y 1.")
+    if args.horas <= 0:
+        parser.error("Las horas deben ser un número positivo.")
+
+    ejecutar_pipeline(args.redes, args.alpha, args.horas, args.forzar, args.procesos)
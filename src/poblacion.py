@@ -0,0 +1,186 @@
+import numpy as np
+
+from cache_datos import leer_tabla
+from filtra_datos import COLUMNAS_RED
+from modelo_felicidad import calculate_happiness, calculate_sociability_from_happiness
+
+# Formas de obtener N agentes a partir de las filas del modelo
+REMUESTREOS = ("ciclico", "bootstrap")
+
+# Agentes sintéticos generados de cada vez: con decenas de millones de
+# agentes nunca se crea la población entera más que en los arrays finales
+TAM_BLOQUE = 1_000_000
+
+
+# --- 1. LECTURA DE DATOS ---
+def leer_valores_modelo(excel_file_path):
+    """
+    Devuelve (felicidad, sociabilidad) del Excel del modelo como arrays
+    (Col 0 = Felicidad, Col 1 = Sociabilidad), o None si no se puede leer.
+    """
+    try:
+        df = leer_tabla(excel_file_path)
+        return df.iloc[:, 0].to_numpy(dtype=float), df.iloc[:, 1].to_numpy(dtype=float)
+    except Exception as e:
+        print(f"Error leyendo Excel ({e}). Usando datos aleatorios.")
+        return None
+
+
+# --- 2. INICIALIZACIÓN EN BLOQUE ---
+def inicializar_agentes(happiness_vals, sociability_vals, N, width, height, seed=None,
+                        remuestreo="ciclico"):
+    """
+    Prepara de una vez el estado inicial de N agentes.
+
+    :param happiness_vals, sociability_vals: Valores por encuestado. Si son None
+        se generan uniformes en [0, 5) con la misma semilla.
+    :param seed: Semilla o np.random.Generator (reproducible con la misma semilla).
+    :param remuestreo: 'ciclico' repite las filas en orden (i % len), como hacía
+        SocialModel; 'bootstrap' sortea encuestados con reemplazo.
+    :return: Diccionario con 'ids', 'x', 'y', 'happiness' y 'sociability'
+        (el formato de agentes_iniciales de SocialModel y MotorSocial), más
+        'filas': la fila del Excel de la que sale cada agente.
+    """
+    if remuestreo not in REMUESTREOS:
+        raise ValueError(f"Remuestreo desconocido: {remuestreo}. Opciones: {REMUESTREOS}")
+
+    rng = np.random.default_rng(seed)
+
+    if happiness_vals is None or sociability_vals is None:
+        happiness_vals = rng.uniform(0, 5, N)
+        sociability_vals = rng.uniform(0, 5, N)
+    happiness_vals = np.asarray(happiness_vals, dtype=float)
+    sociability_vals = np.asarray(sociability_vals, dtype=float)
+
+    if remuestreo == "bootstrap":
+        # El mismo encuestado aporta felicidad y sociabilidad
+        filas = rng.integers(0, len(happiness_vals), N)
+    else:
+        filas = np.arange(N) % len(happiness_vals)
+
+    return {
+        "ids": np.arange(N, dtype=np.int64),
+        "x": rng.integers(0, width, N),
+        "y": rng.integers(0, height, N),
+        "happiness": happiness_vals[filas],
+        "sociability": sociability_vals[filas],
+        "filas": filas,
+    }
+
+def agentes_desde_excel(excel_file_path, N, width, height, seed=None, remuestreo="ciclico"):
+    """Lee el Excel del modelo e inicializa N agentes (ver inicializar_agentes)."""
+    valores = leer_valores_modelo(excel_file_path)
+    happiness_vals, sociability_vals = valores if valores is not None else (None, None)
+    return inicializar_agentes(happiness_vals, sociability_vals, N, width, height,
+                               seed=seed, remuestreo=remuestreo)
+
+
+# --- 3. POBLACIÓN SINTÉTICA ---
+class DistribucionConjunta:
+    """
+    Distribución conjunta empírica de varias columnas discretas: cada
+    combinación de valores observada (una categoría) con su frecuencia.
+    Cada categoría lleva la felicidad y la sociabilidad iniciales de sus
+    agentes, así que generar agentes es sortear índices de categoría y no
+    hace falta repetir filas del Excel.
+
+    Se construye con desde_modelo (felicidad/sociabilidad de model_*.xlsx) o
+    desde_encuesta (P69, P60A y columna de la red de 3145_data_clean_*.xlsx).
+    """
+
+    def __init__(self, combinaciones, frecuencias, happiness, sociability, columnas):
+        self.combinaciones = np.asarray(combinaciones)
+        self.columnas = list(columnas)
+        frecuencias = np.asarray(frecuencias, dtype=float)
+        self.probabilidades = frecuencias / frecuencias.sum()
+        self._acumulada = np.cumsum(self.probabilidades)
+        self.happiness = np.asarray(happiness, dtype=float)
+        self.sociability = np.asarray(sociability, dtype=float)
+
+    @staticmethod
+    def _frecuencias(valores):
+        # Combinaciones distintas (filas) y cuántas veces aparece cada una
+        return np.unique(valores, axis=0, return_counts=True)
+
+    @classmethod
+    def desde_modelo(cls, excel_file_path):
+        """Conjunta de (felicidad, sociabilidad) del Excel del modelo."""
+        df = leer_tabla(excel_file_path)
+        combinaciones, frecuencias = cls._frecuencias(df.iloc[:, :2].to_numpy(dtype=float))
+        return cls(combinaciones, frecuencias, combinaciones[:, 0], combinaciones[:, 1],
+                   df.columns[:2])
+
+    @classmethod
+    def desde_encuesta(cls, ruta, alpha, horas=8, columnas=None):
+        """
+        Conjunta de las respuestas de un archivo limpio de la encuesta. La
+        felicidad de cada categoría se calcula con el modelo Cobb-Douglas a
+        partir de P69 (el factor que usa modelo_felicidad) y la sociabilidad,
+        a partir de la felicidad.
+
+        :param columnas: Por defecto P69, P60A y la columna de red presente.
+        """
+        df = leer_tabla(ruta)
+        if columnas is None:
+            columnas = [c for c in ("P69", "P60A", *COLUMNAS_RED.values()) if c in df.columns]
+        combinaciones, frecuencias = cls._frecuencias(df[columnas].to_numpy())
+        happiness = calculate_happiness(alpha, combinaciones[:, columnas.index("P69")], horas=horas)
+        sociability = calculate_sociability_from_happiness(happiness, alpha)
+        return cls(combinaciones, frecuencias, happiness, sociability, columnas)
+
+    def __len__(self):
+        return len(self.probabilidades)
+
+    def muestrear(self, n, rng):
+        """Índices de categoría de n agentes, con las frecuencias observadas."""
+        categorias = np.searchsorted(self._acumulada, rng.random(n), side="right")
+        # Por redondeo la acumulada puede acabar un poco por debajo de 1
+        return np.minimum(categorias, len(self) - 1)
+
+def bloques_poblacion(distribucion, N, width, height, seed=None, tam_bloque=TAM_BLOQUE):
+    """
+    Genera N agentes sintéticos por bloques de como mucho tam_bloque.
+    Produce (inicio, bloque) con 'x', 'y', 'happiness', 'sociability' y
+    'categorias' de los agentes inicio .. inicio + len(bloque['x']).
+    Reproducible con la misma semilla y el mismo tam_bloque.
+    """
+    rng = np.random.default_rng(seed)
+    for inicio in range(0, N, tam_bloque):
+        n = min(tam_bloque, N - inicio)
+        categorias = distribucion.muestrear(n, rng)
+        yield inicio, {
+            "x": rng.integers(0, width, n),
+            "y": rng.integers(0, height, n),
+            "happiness": distribucion.happiness[categorias],
+            "sociability": distribucion.sociability[categorias],
+            "categorias": categorias,
+        }
+
+def rellenar_poblacion(destino, distribucion, width, height, seed=None, tam_bloque=TAM_BLOQUE):
+    """
+    Escribe agentes sintéticos bloque a bloque en arrays ya reservados (por
+    ejemplo, la memoria compartida de MotorTeselado). 'destino' es un
+    diccionario con algunas de las claves de bloques_poblacion; N es la
+    longitud de sus arrays.
+    """
+    N = len(next(iter(destino.values())))
+    for inicio, bloque in bloques_poblacion(distribucion, N, width, height, seed, tam_bloque):
+        fin = inicio + len(bloque["x"])
+        for clave, array in destino.items():
+            array[inicio:fin] = bloque[clave]
+    return destino
+
+def poblacion_sintetica(distribucion, N, width, height, seed=None, tam_bloque=TAM_BLOQUE):
+    """
+    N agentes sintéticos en el formato de agentes_iniciales de SocialModel y
+    MotorSocial (como inicializar_agentes, con 'categorias' en lugar de 'filas').
+    """
+    agentes = {
+        "x": np.empty(N, dtype=np.int64),
+        "y": np.empty(N, dtype=np.int64),
+        "happiness": np.empty(N),
+        "sociability": np.empty(N),
+        "categorias": np.empty(N, dtype=np.int64),
+    }
+    rellenar_poblacion(agentes, distribucion, width, height, seed, tam_bloque)
+    return {"ids": np.arange(N, dtype=np.int64), **agentes}
@@ -0,0 +1,182 @@
+import numpy as np
+import json
+
+from convergencia import CriterioConvergencia
+from graphics import SocialModel
+from motor_vectorizado import MotorSocial
+from motor_teselas import MotorTeselado
+from topologias import arrays_matriz, matriz_desde_arrays
+
+# --- 1. GUARDADO ---
+def _estado_social_model(model):
+    # Los agentes se guardan en el orden del planificador (el de los arrays
+    # del modelo): RandomActivation baraja esa lista, así que conservarla es
+    # necesario para reanudar igual
+    version, estado_mt, gauss = model.random.getstate()
+
+    arrays = {
+        "ids": model.ids,
+        "x": model.pos_x,
+        "y": model.pos_y,
+        "happiness": model.felicidad,
+        "sociability": model.sociabilidad,
+        # Las sumas por celda acumulan redondeos: se guardan tal cual para
+        # que la reanudación sea exacta bit a bit
+        "ocupacion": model.ocupacion,
+        "suma_felicidad": model.suma_felicidad,
+        "rng_mt": np.array(estado_mt, dtype=np.uint32),
+    }
+    meta = {
+        "tipo": "SocialModel",
+        "width": model.width,
+        "height": model.height,
+        "social_threshold": model.social_threshold,
+        "actualizacion_simultanea": model.actualizacion_simultanea,
+        "steps": model.schedule.steps,
+        "time": model.schedule.time,
+        "running": model.running,
+        "topologia": model.topologia is not None,
+        "rng_version": version,
+        "rng_gauss": gauss,
+    }
+    return arrays, meta
+
+def _estado_motor(model):
+    arrays = {
+        "x": model.x, "y": model.y,
+        "happiness": model.happiness, "sociability": model.sociability,
+    }
+    meta = {
+        "tipo": "MotorSocial",
+        "width": model.width,
+        "height": model.height,
+        "social_threshold": model.social_threshold,
+        "steps": model.steps,
+        "running": model.running,
+        "topologia": model.topologia is not None,
+        "rng_estado": model.rng.bit_generator.state,
+    }
+    return arrays, meta
+
+def _estado_topologia(model, arrays):
+    # La matriz de adyacencia tal cual: una topología generada al azar no se
+    # puede volver a generar igual sin la semilla original
+    if model.topologia is None:
+        return
+    indptr, indices, datos = arrays_matriz(model.topologia)
+    arrays["topologia_indptr"] = indptr
+    arrays["topologia_indices"] = indices
+    if datos is not None:
+        arrays["topologia_datos"] = datos
+    arrays["grados"] = model.grados
+
+def _estado_convergencia(model, arrays, meta):
+    # El criterio guarda estado entre pasos (ventana de medias, felicidad del
+    # paso anterior): sin él la reanudación no pararía en el mismo paso
+    meta["paso_convergencia"] = model.paso_convergencia
+    if model.convergencia is not None:
+        meta["convergencia"], anterior = model.convergencia.estado()
+        if anterior is not None:
+            arrays["convergencia_anterior"] = anterior
+
+def ruta_npz(ruta):
+    """np.savez añade '.npz' si falta: la misma ruta sirve para guardar y cargar."""
+    ruta = str(ruta)
+    return ruta if ruta.endswith(".npz") else ruta + ".npz"
+
+def guardar_checkpoint(model, ruta):
+    """
+    Guarda el estado de un SocialModel o un MotorSocial en un .npz binario:
+    arrays de agentes (id, posición, felicidad, sociabilidad), estado del
+    generador aleatorio, contador de pasos, matriz de adyacencia de la
+    topología de red (si la hay) y estado del criterio de convergencia.
+    Devuelve la ruta del archivo (con '.npz').
+    El historial del DataCollector no se guarda.
+    MotorTeselado no se admite: sus generadores viven en los procesos de
+    cada tesela.
+    """
+    if isinstance(model, MotorTeselado):
+        raise ValueError("MotorTeselado no admite checkpoints: el estado aleatorio de cada "
+                         "tesela está en su proceso. Usa MotorSocial o SocialModel.")
+    if isinstance(model, MotorSocial):
+        arrays, meta = _estado_motor(model)
+    else:
+        arrays, meta = _estado_social_model(model)
+    _estado_topologia(model, arrays)
+    _estado_convergencia(model, arrays, meta)
+    ruta = ruta_npz(ruta)
+    # Sin compresión: prima la velocidad para poder guardar cada pocos miles de pasos
+    np.savez(ruta, meta=np.array(json.dumps(meta)), **arrays)
+    return ruta
+
+
+# --- 2. RESTAURACIÓN ---
+def cargar_checkpoint(ruta, **cambios):
+    """
+    Reconstruye el modelo guardado en 'ruta' sin volver a leer ningún Excel.
+
+    Los argumentos de 'cambios' sustituyen a los del modelo guardado, p. ej.
+    social_threshold=3.0 para bifurcar la corrida, o recolector/perfilador.
+    Si se pasa 'seed', el generador se reinicia con esa semilla en lugar de
+    restaurar su estado (la continuación deja de ser idéntica a la original).
+    La topología de red y el criterio de convergencia se restauran salvo que
+    se pasen otros.
+    """
+    with np.load(ruta_npz(ruta)) as datos:
+        meta = json.loads(str(datos["meta"]))
+        arrays = {k: datos[k] for k in datos.files if k != "meta"}
+
+    restaurar_topologia = meta.get("topologia") and "topologia" not in cambios
+    if restaurar_topologia:
+        if "topologia_indptr" not in arrays:
+            raise ValueError("El checkpoint no guarda la matriz de la topología de red "
+                             "(versión anterior): pásala con topologia=...")
+        cambios["topologia"] = matriz_desde_arrays(
+            arrays["topologia_indptr"], arrays["topologia_indices"], arrays.get("topologia_datos"))
+
+    nueva_semilla = "seed" in cambios
+    parametros = {
+        "N": len(arrays["happiness"]),
+        "width": meta["width"],
+        "height": meta["height"],
+        "excel_file_path": None,
+        "social_threshold": meta["social_threshold"],
+    }
+    if meta["tipo"] == "SocialModel":
+        parametros["actualizacion_simultanea"] = meta["actualizacion_simultanea"]
+    parametros.update(cambios)
+
+    if meta["tipo"] == "MotorSocial":
+        model = MotorSocial(agentes_iniciales=arrays, **parametros)
+        if not nueva_semilla:
+            model.rng.bit_generator.state = meta["rng_estado"]
+        model.steps = meta["steps"]
+    else:
+        model = SocialModel(agentes_iniciales=arrays, **parametros)
+        if not nueva_semilla:
+            model.random.setstate(
+                (meta["rng_version"], tuple(int(v) for v in arrays["rng_mt"]), meta["rng_gauss"])
+            )
+        model.ocupacion[:] = arrays["ocupacion"]
+        model.suma_felicidad[:] = arrays["suma_felicidad"]
+        model.schedule.steps = meta["steps"]
+        model.schedule.time = meta["time"]
+
+    if restaurar_topologia:
+        model.grados = arrays["grados"]
+
+    if meta.get("convergencia") is not None and "convergencia" not in cambios:
+        model.convergencia = CriterioConvergencia.desde_estado(
+            meta["convergencia"], arrays.get("convergencia_anterior"))
+    if "convergencia" not in cambios:
+        model.paso_convergencia = meta.get("paso_convergencia")
+    model.running = meta["running"]
+    return model
+
+def bifurcar(ruta, variantes):
+    """
+    Crea varias continuaciones a partir de un mismo checkpoint.
+    'variantes' es una lista de diccionarios de cambios (ver cargar_checkpoint),
+    p. ej. [{"social_threshold": 1.5}, {"social_threshold": 2.5}].
+    """
+    return [cargar_checkpoint(ruta, **cambios) for cambios in variantes]
@@ -0,0 +1,189 @@
+import pandas as pd
+import numpy as np
+import json
+import os
+import tempfile
+
+# --- 1. FORMATO EN DISCO ---
+# Una fila por agente y paso muestreado (archivo binario plano, legible con np.memmap)
+DTYPE_AGENTES = np.dtype([
+    ("Step", np.int64), ("AgentID", np.int64),
+    ("Felicidad", np.float64), ("Sociabilidad", np.float64),
+])
+
+# Número de bandas de color de update_color (felicidad redondeada 0-5)
+N_BANDAS = 6
+
+# Pasos de agregados acumulados antes de escribir a disco
+TAM_BLOQUE_AGREGADOS = 10_000
+
+# Una fila por paso muestreado con los agregados
+DTYPE_AGREGADOS = np.dtype(
+    [("Step", np.int64), ("Felicidad_media", np.float64), ("Felicidad_var", np.float64),
+     ("Sociabilidad_media", np.float64)]
+    + [(f"banda_{i}", np.int64) for i in range(N_BANDAS)]
+)
+
+
+def estado_agentes(model):
+    """
+    Devuelve (ids, felicidad, sociabilidad) como arrays, tanto para SocialModel
+    como para MotorSocial.
+    """
+    if isinstance(getattr(model, "happiness", None), np.ndarray):
+        return np.arange(model.num_agents), model.happiness, model.sociability
+    # SocialModel: arrays en el orden del planificador
+    return model.ids, model.felicidad, model.sociabilidad
+
+def posiciones_agentes(model):
+    """(x, y) de cada agente, en el mismo orden que estado_agentes."""
+    if isinstance(getattr(model, "happiness", None), np.ndarray):
+        return model.x, model.y
+    return model.pos_x, model.pos_y
+
+def paso_actual(model):
+    schedule = getattr(model, "schedule", None)
+    return schedule.steps if schedule is not None else model.steps
+
+
+# --- 2. RECOLECTORES ---
+class RecolectorMemoria:
+    """
+    Recolector por defecto de SocialModel: guarda en memoria la felicidad y la
+    sociabilidad de todos los agentes en cada paso, como el DataCollector de
+    Mesa con agent_reporters, pero copiando los arrays del modelo en lugar de
+    recorrer objetos agente.
+    """
+
+    def __init__(self):
+        # Un registro por paso; recoger dos veces el mismo paso lo sustituye
+        self._registros = {}
+
+    def collect(self, model):
+        ids, happiness, sociability = estado_agentes(model)
+        self._registros[paso_actual(model)] = (np.array(ids), np.array(happiness), np.array(sociability))
+
+    def get_agent_vars_dataframe(self):
+        """Misma tabla que DataCollector.get_agent_vars_dataframe: índice (Step, AgentID)."""
+        if not self._registros:
+            return pd.DataFrame(columns=["Felicidad", "Sociabilidad"])
+        pasos = [np.full(len(ids), step) for step, (ids, _, _) in self._registros.items()]
+        ids, happiness, sociability = (np.concatenate(columna) for columna in zip(*self._registros.values()))
+        indice = pd.MultiIndex.from_arrays([np.concatenate(pasos), ids], names=["Step", "AgentID"])
+        return pd.DataFrame({"Felicidad": happiness, "Sociabilidad": sociability}, index=indice)
+
+class RecolectorNulo:
+    """Recolector que no guarda nada, para corridas que calculan sus propias métricas."""
+
+    def collect(self, model):
+        pass
+
+class RecolectorStreaming:
+    """
+    Sustituto del DataCollector de Mesa con memoria acotada: las instantáneas se
+    acumulan en un búfer de tamaño fijo y se añaden a archivos binarios en disco.
+
+    :param ruta: Carpeta de salida. Si es None se usa una carpeta temporal.
+    :param intervalo: Solo se recoge cada 'intervalo' pasos.
+    :param solo_agregados: Si es True no se guardan datos por agente, solo
+        media/varianza de felicidad y número de agentes por banda de color.
+    :param tam_bloque: Filas de agente acumuladas antes de escribir a disco.
+    """
+
+    def __init__(self, ruta=None, intervalo=1, solo_agregados=False, tam_bloque=1_000_000):
+        if intervalo < 1:
+            raise ValueError(f"intervalo debe ser un número de pasos positivo, no {intervalo}.")
+        if ruta is None:
+            self._temporal = tempfile.TemporaryDirectory(prefix="recolector_")
+            ruta = self._temporal.name
+        os.makedirs(ruta, exist_ok=True)
+
+        self.ruta = ruta
+        self.intervalo = intervalo
+        self.solo_agregados = solo_agregados
+        self.tam_bloque = tam_bloque
+
+        self.ruta_agentes = os.path.join(ruta, "agentes.bin")
+        self.ruta_agregados = os.path.join(ruta, "agregados.bin")
+        # Se empieza siempre con archivos vacíos
+        for r in (self.ruta_agentes, self.ruta_agregados):
+            open(r, "wb").close()
+
+        self._bufer_agentes = []
+        self._filas_bufer = 0
+        self._bufer_agregados = []
+
+        with open(os.path.join(ruta, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"intervalo": intervalo, "solo_agregados": solo_agregados,
+                       "agentes": DTYPE_AGENTES.descr, "agregados": DTYPE_AGREGADOS.descr}, f)
+
+    def collect(self, model):
+        step = paso_actual(model)
+        if step % self.intervalo:
+            return
+
+        ids, happiness, sociability = estado_agentes(model)
+
+        fila = np.zeros(1, dtype=DTYPE_AGREGADOS)
+        fila["Step"] = step
+        fila["Felicidad_media"] = happiness.mean()
+        fila["Felicidad_var"] = happiness.var(ddof=1) if len(happiness) > 1 else np.nan
+        fila["Sociabilidad_media"] = sociability.mean()
+        bandas = np.bincount(np.rint(np.clip(happiness, 0, 5)).astype(int), minlength=N_BANDAS)
+        for i in range(N_BANDAS):
+            fila[f"banda_{i}"] = bandas[i]
+        self._bufer_agregados.append(fila)
+
+        if not self.solo_agregados:
+            bloque = np.empty(len(ids), dtype=DTYPE_AGENTES)
+            bloque["Step"] = step
+            bloque["AgentID"] = ids
+            bloque["Felicidad"] = happiness
+            bloque["Sociabilidad"] = sociability
+            self._bufer_agentes.append(bloque)
+            self._filas_bufer += len(bloque)
+
+        if self._filas_bufer >= self.tam_bloque or len(self._bufer_agregados) >= TAM_BLOQUE_AGREGADOS:
+            self.volcar()
+
+    def volcar(self):
+        """Escribe a disco lo que haya en el búfer."""
+        if self._bufer_agentes:
+            with open(self.ruta_agentes, "ab") as f:
+                np.concatenate(self._bufer_agentes).tofile(f)
+            self._bufer_agentes = []
+            self._filas_bufer = 0
+        if self._bufer_agregados:
+            with open(self.ruta_agregados, "ab") as f:
+                np.concatenate(self._bufer_agregados).tofile(f)
+            self._bufer_agregados = []
+
+    # --- Lectura ---
+    def agentes(self):
+        """Datos por agente como array mapeado en memoria (no se cargan en RAM)."""
+        self.volcar()
+        if os.path.getsize(self.ruta_agentes) == 0:
+            return np.zeros(0, dtype=DTYPE_AGENTES)
+        return np.memmap(self.ruta_agentes, dtype=DTYPE_AGENTES, mode="r")
+
+    def agregados(self):
+        self.volcar()
+        if os.path.getsize(self.ruta_agregados) == 0:
+            return np.zeros(0, dtype=DTYPE_AGREGADOS)
+        return np.memmap(self.ruta_agregados, dtype=DTYPE_AGREGADOS, mode="r")
+
+    def get_agent_vars_dataframe(self):
+        """Misma tabla que DataCollector.get_agent_vars_dataframe (carga todo en RAM)."""
+        if self.solo_agregados:
+            raise ValueError("El recolector está en modo solo_agregados: no hay datos por agente.")
+        df = pd.DataFrame(np.asarray(self.agentes()))
+        return df.set_index(["Step", "AgentID"])
+
+    def get_agregados_dataframe(self):
+        return pd.DataFrame(np.asarray(self.agregados()))
+
+    def estadisticas(self):
+        """Tabla por paso con las mismas columnas que MotorSocial.estadisticas."""
+        df = self.get_agregados_dataframe()
+        df["Felicidad_std"] = np.sqrt(df["Felicidad_var"])
+        return df[["Step", "Felicidad_media", "Felicidad_std", "Sociabilidad_media"]]
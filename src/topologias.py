@@ -0,0 +1,180 @@
+import numpy as np
+import pandas as pd
+import networkx as nx
+
+# --- 1. CONFIGURACIÓN ---
+# scipy.sparse si está instalado; si no, un CSR mínimo con NumPy
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+# Generadores de networkx admitidos. Los parámetros por defecto dan un grado
+# medio cercano a 8, como la vecindad de Moore de la rejilla.
+TOPOLOGIAS = ("erdos_renyi", "watts_strogatz", "barabasi_albert")
+GRADO_MEDIO = 8
+
+
+# --- 2. CONSTRUCCIÓN DE GRAFOS ---
+def _p_erdos_renyi(N, parametros):
+    return parametros.get("p", GRADO_MEDIO / max(N - 1, 1))
+
+def crear_topologia(tipo, N, seed=None, **parametros):
+    """
+    Genera un grafo de N nodos con networkx.
+
+    :param tipo: 'erdos_renyi' (p), 'watts_strogatz' (k, p) o 'barabasi_albert' (m).
+    :param parametros: Sustituyen a los valores por defecto de cada generador.
+    """
+    if tipo == "erdos_renyi":
+        # Mismo generador que preparar_topologia: misma semilla, mismo grafo
+        G = nx.empty_graph(N)
+        origen, destino, _ = aristas_erdos_renyi(N, _p_erdos_renyi(N, parametros), seed=seed)
+        G.add_edges_from(zip(origen.tolist(), destino.tolist()))
+        return G
+    if tipo == "watts_strogatz":
+        return nx.watts_strogatz_graph(N, parametros.get("k", GRADO_MEDIO),
+                                       parametros.get("p", 0.1), seed=seed)
+    if tipo == "barabasi_albert":
+        return nx.barabasi_albert_graph(N, parametros.get("m", GRADO_MEDIO // 2), seed=seed)
+    raise ValueError(f"Topología desconocida: {tipo}. Opciones: {TOPOLOGIAS}")
+
+def leer_lista_aristas(ruta, separador=r"\s+"):
+    """
+    Lee un archivo de aristas (dos columnas: origen destino, separadas por
+    espacios o por 'separador') sin pasar por networkx, para grafos con
+    millones de aristas. Los identificadores se renumeran a 0..n-1 en orden
+    creciente. Devuelve (origen, destino, n_nodos).
+    """
+    aristas = pd.read_csv(ruta, sep=separador, header=None, usecols=[0, 1],
+                          comment="#").to_numpy()
+    nodos, indices = np.unique(aristas.ravel(), return_inverse=True)
+    indices = indices.reshape(-1, 2)
+    return indices[:, 0], indices[:, 1], len(nodos)
+
+def aristas_erdos_renyi(N, p, seed=None):
+    """
+    Aristas de un grafo G(N, p) de Erdős–Rényi generadas directamente con
+    NumPy (networkx tarda decenas de segundos con millones de nodos). Se
+    sortea el número de aristas, Binomial(N(N-1)/2, p), y después ese número
+    de pares distintos entre todos los posibles (i > j), que da exactamente la
+    misma distribución que decidir cada par con probabilidad p.
+    """
+    rng = np.random.default_rng(seed)
+    pares = N * (N - 1) // 2
+    m = rng.binomial(pares, p) if pares else 0
+    k = np.sort(rng.choice(pares, size=m, replace=False)) if m else np.zeros(0, dtype=np.int64)
+    # Par k del triángulo inferior: k = i (i - 1) / 2 + j con 0 <= j < i.
+    # La raíz en coma flotante puede errar en una unidad: se corrige con enteros
+    i = ((1 + np.sqrt(1 + 8 * k.astype(float))) // 2).astype(np.int64)
+    i -= i * (i - 1) // 2 > k
+    i += (i + 1) * i // 2 <= k
+    return i, k - i * (i - 1) // 2, N
+
+def aristas_de_grafo(G):
+    """(origen, destino, n_nodos) de un grafo de networkx, con nodos renumerados 0..n-1."""
+    G = nx.convert_node_labels_to_integers(G)
+    extremos = np.fromiter((v for arista in G.edges() for v in arista), dtype=np.int64,
+                           count=2 * G.number_of_edges())
+    return extremos[0::2], extremos[1::2], G.number_of_nodes()
+
+
+# --- 3. MATRIZ DE ADYACENCIA ---
+class MatrizCSR:
+    """CSR mínimo (solo lo que necesita la influencia) cuando scipy no está disponible."""
+
+    def __init__(self, indptr, indices, n):
+        self.indptr = indptr
+        self.indices = indices
+        self.shape = (n, n)
+        # Fila de cada entrada, para sumar por filas con bincount
+        self._filas = np.repeat(np.arange(n, dtype=indices.dtype), np.diff(indptr))
+
+    def dot(self, vector):
+        return np.bincount(self._filas, weights=vector[self.indices], minlength=self.shape[0])
+
+def _csr(indptr, columnas, n):
+    indice = np.int32 if n < 2**31 else np.int64
+    if sparse is not None:
+        datos = np.ones(len(columnas))
+        return sparse.csr_matrix((datos, columnas.astype(indice), indptr), shape=(n, n))
+    return MatrizCSR(indptr, columnas.astype(indice), n)
+
+def arrays_matriz(matriz):
+    """(indptr, indices, datos) de una matriz de adyacencia; datos es None con MatrizCSR."""
+    return matriz.indptr, matriz.indices, getattr(matriz, "data", None)
+
+def matriz_desde_arrays(indptr, indices, datos=None):
+    """
+    Matriz de adyacencia a partir de sus arrays CSR tal cual (p. ej. los de un
+    checkpoint), sin reordenar ni quitar duplicados.
+    """
+    n = len(indptr) - 1
+    if sparse is not None:
+        if datos is None:
+            datos = np.ones(len(indices))
+        return sparse.csr_matrix((datos, indices, indptr), shape=(n, n))
+    return MatrizCSR(np.asarray(indptr), np.asarray(indices), n)
+
+def adyacencia(origen, destino, n):
+    """
+    Matriz de adyacencia no dirigida en formato CSR (scipy.sparse si está
+    instalado). Se descartan bucles y aristas repetidas.
+    """
+    origen = np.asarray(origen, dtype=np.int64)
+    destino = np.asarray(destino, dtype=np.int64)
+    distintos = origen != destino
+    filas = np.concatenate([origen[distintos], destino[distintos]])
+    columnas = np.concatenate([destino[distintos], origen[distintos]])
+
+    # Ordenar por (fila, columna) y quitar duplicados (sort es mucho más
+    # rápido que np.unique con decenas de millones de claves)
+    clave = np.sort(filas * n + columnas)
+    if len(clave) == 0:
+        # Sin aristas (p = 0, grafo vacío o N = 1): indptr todo a cero
+        return _csr(np.zeros(n + 1, dtype=np.int64), np.zeros(0, dtype=np.int64), n)
+    clave = clave[np.concatenate(([True], clave[1:] != clave[:-1]))]
+    filas, columnas = clave // n, clave % n
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(filas, minlength=n), out=indptr[1:])
+    return _csr(indptr, columnas, n)
+
+def preparar_topologia(topologia, N=None, seed=None):
+    """
+    Convierte la topología pedida en una matriz de adyacencia CSR. Acepta:
+    un grafo de networkx, una ruta a una lista de aristas, una tupla
+    (tipo, parametros) / un nombre de TOPOLOGIAS que se genera con N nodos, o
+    una matriz ya preparada (se devuelve tal cual).
+    """
+    if hasattr(topologia, "indptr"):
+        return topologia
+    if isinstance(topologia, nx.Graph):
+        return adyacencia(*aristas_de_grafo(topologia))
+    if isinstance(topologia, str) and topologia not in TOPOLOGIAS:
+        return adyacencia(*leer_lista_aristas(topologia))
+    tipo, parametros = (topologia, {}) if isinstance(topologia, str) else topologia
+    if tipo == "erdos_renyi":
+        # Sin pasar por networkx (crear_topologia da el mismo grafo como nx.Graph)
+        return adyacencia(*aristas_erdos_renyi(N, _p_erdos_renyi(N, parametros), seed=seed))
+    return adyacencia(*aristas_de_grafo(crear_topologia(tipo, N, seed=seed, **parametros)))
+
+
+# --- 4. INFLUENCIA SOBRE EL GRAFO ---
+def grado(matriz):
+    """Número de vecinos de cada nodo."""
+    return np.diff(matriz.indptr)
+
+def influencia_red(matriz, grados, happiness, sociability):
+    """
+    Misma regla que interact_and_influence, con los vecinos del grafo en lugar
+    de la vecindad de Moore: la suma de felicidad de los vecinos es el producto
+    adyacencia x felicidad. Devuelve la nueva felicidad (actualización simultánea).
+    """
+    suma_vecinos = matriz.dot(happiness)
+    nueva = happiness.copy()
+    con_vecinos = grados > 0
+    avg_happiness = suma_vecinos[con_vecinos] / grados[con_vecinos]
+    permeability = np.minimum(0.3, sociability[con_vecinos] * 0.05)
+    delta = (avg_happiness - happiness[con_vecinos]) * permeability
+    nueva[con_vecinos] = np.clip(happiness[con_vecinos] + delta, 0, 5)
+    return nueva
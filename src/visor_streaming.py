@@ -0,0 +1,328 @@
+import argparse
+import json
+import struct
+import threading
+import time
+
+import numpy as np
+import tornado.ioloop
+import tornado.web
+import tornado.websocket
+
+from graphics import SocialModel, obtener_ruta_datos
+from motor_vectorizado import MotorSocial, COLORES
+from recolector import N_BANDAS, estado_agentes, paso_actual, posiciones_agentes
+
+# --- 1. FORMATO DE LOS FRAMES ---
+# Cabecera (little-endian): firma, versión, tipo, paso, ancho, alto y número
+# de registros. Después, arrays planos sin separadores:
+#   CALOR:   ancho*alto uint8 con la felicidad media de la celda escalada a
+#            0-250 (255 = celda vacía)
+#   CLAVE:   por agente, celda uint32 (x*alto + y) y banda de color uint8
+#   DELTA:   solo los agentes que cambian: id uint32, celda uint32, banda uint8
+CABECERA = struct.Struct("<4sBBxxIIII")
+FIRMA = b"ABMF"
+VERSION = 1
+CALOR, CLAVE, DELTA = 0, 1, 2
+CELDA_VACIA = 255
+MODOS = ("calor", "posiciones")
+
+
+def rejillas(model):
+    """(ocupación, suma de felicidad) por celda para cualquiera de los motores."""
+    if hasattr(model, "suma_felicidad"):
+        # SocialModel ya mantiene el índice espacial
+        return model.ocupacion, model.suma_felicidad
+    return model._rejilla(), model._rejilla(model.happiness)
+
+def posiciones(model):
+    """(x, y, felicidad) por agente, en un orden estable entre pasos."""
+    return (*posiciones_agentes(model), estado_agentes(model)[1])
+
+def dimensiones(model):
+    return model.width, model.height
+
+
+# --- 2. CODIFICACIÓN ---
+def frame_calor(model):
+    """Mapa de calor: felicidad media por celda en un byte (independiente de N)."""
+    width, height = dimensiones(model)
+    ocupacion, suma = rejillas(model)
+    media = np.divide(suma, ocupacion, out=np.zeros(ocupacion.shape), where=ocupacion > 0)
+    raster = np.where(ocupacion > 0, np.rint(np.clip(media, 0, 5) * 50), CELDA_VACIA)
+    return CABECERA.pack(FIRMA, VERSION, CALOR, paso_actual(model), width, height, width * height) \
+        + raster.astype(np.uint8).tobytes()
+
+class Frame:
+    """
+    Frame codificado de un paso, con su número de orden. El frame clave del
+    mismo paso solo hace falta para los clientes que han perdido algún frame,
+    así que se construye (una vez) la primera vez que alguno lo pide.
+    """
+    __slots__ = ("numero", "datos", "_clave", "_estado")
+
+    def __init__(self, numero, datos, estado=None):
+        self.numero = numero
+        self.datos = datos
+        # Sin estado el frame ya es completo (frame clave o mapa de calor)
+        self._clave = datos if estado is None else None
+        self._estado = estado
+
+    def clave(self):
+        if self._clave is None:
+            self._clave = _frame_clave(*self._estado)
+            self._estado = None
+        return self._clave
+
+def _frame_clave(paso, width, height, celdas, bandas):
+    return CABECERA.pack(FIRMA, VERSION, CLAVE, paso, width, height, len(celdas)) \
+        + celdas.tobytes() + bandas.tobytes()
+
+class CodificadorPosiciones:
+    """
+    Frames de posiciones y color: un frame CLAVE con todos los agentes y,
+    después, frames DELTA con los que han cambiado de celda o de banda.
+    Se fuerza un frame clave cada 'intervalo_clave' frames.
+    """
+
+    def __init__(self, intervalo_clave=100):
+        self.intervalo_clave = intervalo_clave
+        self._celdas = None
+        self._bandas = None
+        self._frames = 0
+
+    def codificar(self, model):
+        """Devuelve el Frame que toca enviar (delta respecto al anterior codificado)."""
+        width, height = dimensiones(model)
+        x, y, h = posiciones(model)
+        celdas = (x * height + y).astype(np.uint32)
+        bandas = np.rint(np.clip(h, 0, 5)).astype(np.uint8)
+        paso = paso_actual(model)
+
+        if self._celdas is None or len(self._celdas) != len(celdas) \
+                or self._frames % self.intervalo_clave == 0:
+            frame = Frame(self._frames, _frame_clave(paso, width, height, celdas, bandas))
+        else:
+            cambian = np.flatnonzero((celdas != self._celdas) | (bandas != self._bandas))
+            datos = CABECERA.pack(FIRMA, VERSION, DELTA, paso, width, height, len(cambian)) \
+                + cambian.astype(np.uint32).tobytes() + celdas[cambian].tobytes() \
+                + bandas[cambian].tobytes()
+            # Los arrays no se vuelven a modificar: el frame clave se puede
+            # construir más tarde desde el hilo de tornado
+            frame = Frame(self._frames, datos, (paso, width, height, celdas, bandas))
+
+        self._celdas, self._bandas = celdas, bandas
+        self._frames += 1
+        return frame
+
+
+# --- 3. SERVIDOR ---
+PAGINA = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Dinámica Social (streaming)</title></head>
+<body style="font-family:sans-serif">
+<h3>Dinámica Social: {titulo}</h3><div id="info">conectando...</div>
+<canvas id="lienzo" style="image-rendering:pixelated;width:{lado}px;height:{lado}px"></canvas>
+<script>
+const COLORES = {colores};
+const lienzo = document.getElementById("lienzo"), ctx = lienzo.getContext("2d");
+const ws = new WebSocket(`ws://${{location.host}}/frames`);
+ws.binaryType = "arraybuffer";
+let celdas = null, bandas = null, imagen = null;
+function rgb(nombre) {{ const c = document.createElement("canvas").getContext("2d");
+  c.fillStyle = nombre; c.fillRect(0, 0, 1, 1); return c.getImageData(0, 0, 1, 1).data; }}
+const PALETA = COLORES.map(rgb);
+ws.onmessage = (ev) => {{
+  const v = new DataView(ev.data), tipo = v.getUint8(5), paso = v.getUint32(8, true);
+  const w = v.getUint32(12, true), h = v.getUint32(16, true), n = v.getUint32(20, true);
+  if (lienzo.width !== w || lienzo.height !== h) {{ lienzo.width = w; lienzo.height = h;
+    imagen = ctx.createImageData(w, h); }}
+  const px = imagen.data; px.fill(255);
+  if (tipo === 0) {{
+    const r = new Uint8Array(ev.data, 24, n);
+    for (let i = 0; i < n; i++) {{ if (r[i] === 255) continue;
+      const c = PALETA[Math.round(r[i] / 50)], j = 4 * ((i % h) * w + Math.floor(i / h));
+      px[j] = c[0]; px[j + 1] = c[1]; px[j + 2] = c[2]; px[j + 3] = 255; }}
+  }} else {{
+    if (tipo === 1) {{ celdas = new Uint32Array(ev.data.slice(24, 24 + 4 * n));
+      bandas = new Uint8Array(ev.data.slice(24 + 4 * n, 24 + 5 * n)); }}
+    else {{ const ids = new Uint32Array(ev.data.slice(24, 24 + 4 * n));
+      const nc = new Uint32Array(ev.data.slice(24 + 4 * n, 24 + 8 * n));
+      const nb = new Uint8Array(ev.data, 24 + 8 * n, n);
+      for (let k = 0; k < n; k++) {{ celdas[ids[k]] = nc[k]; bandas[ids[k]] = nb[k]; }} }}
+    for (let a = 0; a < celdas.length; a++) {{ const i = celdas[a], c = PALETA[bandas[a]];
+      const j = 4 * ((i % h) * w + Math.floor(i / h));
+      px[j] = c[0]; px[j + 1] = c[1]; px[j + 2] = c[2]; px[j + 3] = 255; }}
+  }}
+  ctx.putImageData(imagen, 0, 0);
+  document.getElementById("info").textContent = `paso ${{paso}} · ${{ev.data.byteLength}} bytes`;
+  ws.send("ok");
+}};
+</script></body></html>
+"""
+
+
+class _Pagina(tornado.web.RequestHandler):
+    def initialize(self, html):
+        self.html = html
+
+    def get(self):
+        self.write(self.html)
+
+
+class _Frames(tornado.websocket.WebSocketHandler):
+    """
+    Un cliente. Si todavía no ha confirmado el frame anterior, el nuevo se
+    descarta (salto de frames). Los deltas solo sirven si el cliente recibió
+    el frame inmediatamente anterior; si no, se le envía el frame clave.
+    """
+
+    def initialize(self, servidor):
+        self.servidor = servidor
+        self.ocupado = False
+        self.ultimo = None
+
+    def open(self):
+        self.servidor.clientes.add(self)
+
+    def on_message(self, mensaje):
+        self.ocupado = False
+
+    def on_close(self):
+        self.servidor.clientes.discard(self)
+
+    def enviar(self, frame):
+        if self.ocupado:
+            self.servidor.descartados += 1
+            return
+        seguido = self.ultimo is not None and frame.numero == self.ultimo + 1
+        datos = frame.datos if seguido else frame.clave()
+        try:
+            self.write_message(datos, binary=True)
+        except tornado.websocket.WebSocketClosedError:
+            return
+        self.ocupado = True
+        self.ultimo = frame.numero
+        self.servidor.enviados += 1
+
+
+class ServidorStreaming:
+    """
+    Sustituto de ModularServer para poblaciones grandes: la simulación avanza
+    en un hilo propio y publica un frame binario cada 'cada' pasos; el bucle
+    de tornado lo reparte por websocket. Un cliente lento nunca frena la
+    simulación: se le saltan frames hasta que confirme el último. Entre los
+    dos hilos hay un único hueco con el último frame: si el bucle de tornado
+    se retrasa, los frames que no llegó a repartir se sustituyen, no se
+    acumulan.
+
+    :param modo: 'calor' (mapa de calor por celda) o 'posiciones' (delta por agente).
+    :param pausa: Segundos de espera entre pasos (0 = tan rápido como se pueda).
+    :param pasos: Número máximo de pasos (None = hasta que model.running sea False).
+    """
+
+    def __init__(self, model, modo="calor", puerto=8522, cada=1, pausa=0.0, pasos=None,
+                 titulo="SocialModel", intervalo_clave=100):
+        if modo not in MODOS:
+            raise ValueError(f"Modo desconocido: {modo}. Opciones: {MODOS}")
+        self.model = model
+        self.modo = modo
+        self.puerto = puerto
+        self.cada = cada
+        self.pausa = pausa
+        self.pasos = pasos
+        self.codificador = CodificadorPosiciones(intervalo_clave)
+
+        self.clientes = set()
+        self.enviados = 0
+        self.descartados = 0
+        self.sustituidos = 0
+        self._numero = 0
+        self._pendiente = None
+        self._cerrojo = threading.Lock()
+        self._parar = threading.Event()
+        self._bucle = None
+
+        html = PAGINA.format(titulo=titulo, lado=600, colores=json.dumps(COLORES[:N_BANDAS].tolist()))
+        self.app = tornado.web.Application([
+            (r"/", _Pagina, {"html": html}),
+            (r"/frames", _Frames, {"servidor": self}),
+        ])
+
+    def codificar(self):
+        if self.modo == "calor":
+            self._numero += 1
+            return Frame(self._numero, frame_calor(self.model))
+        return self.codificador.codificar(self.model)
+
+    def publicar(self, frame):
+        """Deja el frame en el hueco (desde el hilo de la simulación) y avisa al bucle si estaba vacío."""
+        with self._cerrojo:
+            avisar = self._pendiente is None
+            if not avisar:
+                self.sustituidos += 1
+            self._pendiente = frame
+        if avisar:
+            self._bucle.add_callback(self._difundir_pendiente)
+
+    def _difundir_pendiente(self):
+        with self._cerrojo:
+            frame, self._pendiente = self._pendiente, None
+        if frame is not None:
+            self.difundir(frame)
+
+    def difundir(self, frame):
+        for cliente in list(self.clientes):
+            cliente.enviar(frame)
+
+    def _simular(self):
+        hechos = 0
+        while not self._parar.is_set() and self.model.running \
+                and (self.pasos is None or hechos < self.pasos):
+            if hechos % self.cada == 0 and self.clientes:
+                # Se codifica en este hilo; el bucle de tornado solo envía bytes
+                self.publicar(self.codificar())
+            self.model.step()
+            hechos += 1
+            if self.pausa:
+                time.sleep(self.pausa)
+
+    def launch(self):
+        self.app.listen(self.puerto)
+        self._bucle = tornado.ioloop.IOLoop.current()
+        hilo = threading.Thread(target=self._simular, daemon=True)
+        hilo.start()
+        print(f"Visor en http://127.0.0.1:{self.puerto} (Ctrl+C para salir)")
+        try:
+            self._bucle.start()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._parar.set()
+            hilo.join()
+            print(f"Frames enviados: {self.enviados}, descartados: {self.descartados}, "
+                  f"sustituidos antes de repartir: {self.sustituidos}")
+
+
+# --- 4. LÍNEA DE COMANDOS ---
+if __name__ == "__main__":
+    redes = {"FB": "model_FB.xlsx", "IG": "model_IG.xlsx", "X": "model_X.xlsx"}
+    parser = argparse.ArgumentParser(description="Visor binario por websocket para poblaciones grandes.")
+    parser.add_argument("--red", choices=list(redes), default="FB")
+    parser.add_argument("--N", type=int, default=10_000)
+    parser.add_argument("--width", type=int, default=100)
+    parser.add_argument("--height", type=int, default=100)
+    parser.add_argument("--motor", choices=("mesa", "vectorizado"), default="vectorizado")
+    parser.add_argument("--modo", choices=MODOS, default="calor")
+    parser.add_argument("--cada", type=int, default=1, help="Enviar un frame cada k pasos")
+    parser.add_argument("--pausa", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--puerto", type=int, default=8522)
+    args = parser.parse_args()
+
+    ruta = obtener_ruta_datos(redes[args.red])
+    if args.motor == "mesa":
+        modelo = SocialModel(args.N, args.width, args.height, ruta, seed=args.seed)
+    else:
+        modelo = MotorSocial(args.N, args.width, args.height, ruta, seed=args.seed)
+    ServidorStreaming(modelo, modo=args.modo, puerto=args.puerto, cada=args.cada,
+                      pausa=args.pausa, titulo=args.red).launch()
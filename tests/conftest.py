@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Los módulos de src/ se importan por nombre, como al ejecutarlos desde allí
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
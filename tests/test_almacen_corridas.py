@@ -0,0 +1,88 @@
+import os
+
+import numpy as np
+import pytest
+
+from almacen_corridas import INDICE, AlmacenCorridas, clave_corrida
+from motor_vectorizado import MotorSocial
+from poblacion import inicializar_agentes
+
+N, WIDTH, HEIGHT, PASOS = 30, 8, 8, 6
+AGENTES = inicializar_agentes(None, None, N, WIDTH, HEIGHT, seed=0)
+
+
+def correr(almacen, parametros):
+    motor = MotorSocial(N, WIDTH, HEIGHT, seed=parametros["seed"], agentes_iniciales=AGENTES,
+                        recolector=almacen.nueva_corrida(parametros))
+    felicidad, posiciones = [], []
+    for _ in range(PASOS):
+        felicidad.append(motor.happiness.copy())
+        posiciones.append((motor.x.copy(), motor.y.copy()))
+        motor.step()
+    return np.array(felicidad), posiciones
+
+
+@pytest.fixture
+def almacen(tmp_path):
+    almacen = AlmacenCorridas(tmp_path / "almacen")
+    registros = {}
+    for red in ("FB", "IG"):
+        for alpha in (0.1, 0.3, 0.5):
+            parametros = {"red": red, "alpha": alpha, "seed": int(alpha * 10)}
+            registros[clave_corrida(parametros)] = correr(almacen, parametros)
+    almacen.registros = registros
+    return almacen
+
+
+def test_trayectoria(almacen):
+    clave = almacen.buscar(red="FB", alpha=0.3)["clave"].item()
+    felicidad, _ = almacen.registros[clave]
+    trayectoria = almacen.corrida(clave).trayectoria(7)
+    assert list(trayectoria.index) == list(range(PASOS))
+    assert np.array_equal(trayectoria.to_numpy(), felicidad[:, 7])
+
+
+def test_instantanea(almacen):
+    parametros = {"red": "IG", "alpha": 0.5, "seed": 5}
+    corrida = almacen.corrida(parametros)
+    felicidad, posiciones = almacen.registros[clave_corrida(parametros)]
+    x, y, h = corrida.estado(3)
+    assert np.array_equal(x, posiciones[3][0]) and np.array_equal(y, posiciones[3][1])
+    assert np.array_equal(h, felicidad[3])
+
+    ocupacion, media = corrida.rejilla(3)
+    assert ocupacion.sum() == N
+    assert np.isclose(np.nansum(media * ocupacion), felicidad[3].sum())
+    with pytest.raises(KeyError):
+        corrida.estado(PASOS)
+
+
+def test_consultas_por_rango(almacen):
+    assert len(almacen.indice()) == 6
+    assert sorted(almacen.buscar(alpha=(0.2, 0.5))["alpha"]) == [0.3, 0.3, 0.5, 0.5]
+    assert set(almacen.buscar(red=["IG"], alpha=(0.0, 0.3))["alpha"]) == {0.1, 0.3}
+    assert (almacen.buscar(alpha=0.1)["pasos_recogidos"] == PASOS).all()
+    assert len(almacen.buscar(alpha=(0.6, 1.0))) == 0
+    assert len(almacen.buscar(desconocido=1)) == 0
+
+
+def test_indice_persistente(almacen):
+    # Otro objeto (otro proceso) lee el índice sin abrir los meta.json
+    otro = AlmacenCorridas(almacen.ruta)
+    assert len(otro.indice()) == 6
+    correr(almacen, {"red": "X", "alpha": 0.9, "seed": 9})
+    assert otro.buscar(red="X")["alpha"].tolist() == [0.9]
+
+    # Repetir una corrida la sustituye: una sola fila por clave
+    correr(almacen, {"red": "X", "alpha": 0.9, "seed": 9})
+    assert len(otro.buscar(red="X")) == 1
+
+
+def test_reconstruye_indice(almacen):
+    os.remove(os.path.join(almacen.ruta, INDICE))
+    assert len(AlmacenCorridas(almacen.ruta).indice()) == 6
+
+
+def test_intervalo_no_positivo(tmp_path):
+    with pytest.raises(ValueError):
+        AlmacenCorridas(tmp_path).nueva_corrida({"red": "FB"}, intervalo=0)
@@ -0,0 +1,57 @@
+import os
+import stat
+
+import pandas as pd
+import pytest
+
+import cache_datos
+from cache_datos import cache_vigente, leer_tabla, ruta_cache
+
+
+@pytest.fixture
+def excel(tmp_path, monkeypatch):
+    ruta = tmp_path / "datos.xlsx"
+    pd.DataFrame({"a": [1, 2, 3], "b": ["x", "y", "z"]}).to_excel(ruta, index=False)
+
+    construcciones = []
+    construir = cache_datos.construir_cache
+    monkeypatch.setattr(cache_datos, "construir_cache",
+                        lambda ruta: construcciones.append(ruta) or construir(ruta))
+    return ruta, construcciones
+
+
+def test_se_construye_una_vez(excel):
+    excel, construcciones = excel
+    assert leer_tabla(excel)["a"].tolist() == [1, 2, 3]
+    assert leer_tabla(excel, columnas=["b"]).columns.tolist() == ["b"]
+    assert len(construcciones) == 1
+    assert cache_vigente(excel)
+
+
+def test_tocar_sin_cambiar_conserva_la_cache(excel):
+    excel, construcciones = excel
+    leer_tabla(excel)
+    info = os.stat(excel)
+    os.utime(excel, ns=(info.st_atime_ns, info.st_mtime_ns + 10**9))
+    assert cache_vigente(excel)
+    leer_tabla(excel)
+    assert len(construcciones) == 1
+
+
+def test_cambiar_el_contenido_regenera(excel):
+    excel, construcciones = excel
+    leer_tabla(excel)
+    pd.DataFrame({"a": [4, 5], "b": ["u", "v"]}).to_excel(excel, index=False)
+    assert not cache_vigente(excel)
+    assert leer_tabla(excel)["a"].tolist() == [4, 5]
+    assert len(construcciones) == 2
+
+
+def test_permisos_como_un_archivo_nuevo(excel):
+    excel, _ = excel
+    leer_tabla(excel)
+    umask = os.umask(0)
+    os.umask(umask)
+    cache = ruta_cache(excel)
+    for ruta in (cache, os.path.splitext(cache)[0] + ".json"):
+        assert stat.S_IMODE(os.stat(ruta).st_mode) == 0o666 & ~umask
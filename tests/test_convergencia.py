@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from convergencia import CriterioConvergencia
+from graphics import SocialModel
+from motor_vectorizado import MotorSocial
+from poblacion import inicializar_agentes
+from recolector import estado_agentes
+
+N, WIDTH, HEIGHT = 100, 10, 10
+AGENTES = inicializar_agentes(None, None, N, WIDTH, HEIGHT, seed=0)
+MODELOS = {
+    "secuencial": lambda **kw: SocialModel(N, WIDTH, HEIGHT, None, seed=1, agentes_iniciales=AGENTES, **kw),
+    "simultanea": lambda **kw: SocialModel(N, WIDTH, HEIGHT, None, seed=1, agentes_iniciales=AGENTES,
+                                           actualizacion_simultanea=True, **kw),
+    "motor": lambda **kw: MotorSocial(N, WIDTH, HEIGHT, seed=1, agentes_iniciales=AGENTES, **kw),
+}
+PASOS = 300
+
+
+def trayectoria(crear):
+    """Felicidad de cada agente antes del primer paso y tras cada paso, sin criterio."""
+    model = crear()
+    estados = [estado_agentes(model)[1].copy()]
+    for _ in range(PASOS):
+        model.step()
+        estados.append(estado_agentes(model)[1].copy())
+    return np.array(estados)
+
+def parar(crear, **criterio):
+    model = crear(convergencia=CriterioConvergencia(**criterio))
+    for _ in range(PASOS):
+        if not model.running:
+            break
+        model.step()
+    return model
+
+
+@pytest.mark.parametrize("modelo", MODELOS)
+def test_para_con_tol_delta(modelo):
+    estados = trayectoria(MODELOS[modelo])
+    deltas = np.abs(np.diff(estados, axis=0)).max(axis=1)
+    esperado = int(np.argmax(deltas < 0.05)) + 1
+    assert deltas[esperado - 1] < 0.05
+
+    model = parar(MODELOS[modelo], tol_delta=0.05)
+    assert not model.running
+    assert model.paso_convergencia == esperado
+
+
+@pytest.mark.parametrize("modelo", MODELOS)
+def test_para_con_ventana(modelo):
+    medias = trayectoria(MODELOS[modelo]).mean(axis=1)
+    ventana, tol = 5, 1e-6
+    # La ventana que termina en el paso p contiene las medias de p-4 .. p
+    varianzas = np.array([np.var(medias[p - ventana + 1:p + 1]) for p in range(ventana - 1, PASOS + 1)])
+    esperado = int(np.argmax(varianzas < tol)) + ventana - 1
+    assert varianzas[esperado - ventana + 1] < tol
+
+    model = parar(MODELOS[modelo], ventana=ventana, tol_varianza=tol)
+    assert not model.running
+    assert model.paso_convergencia == esperado
+
+
+def test_paso_minimo():
+    model = parar(MODELOS["motor"], tol_delta=10.0, paso_minimo=7)
+    assert model.paso_convergencia == 7
+
+
+def test_ventana_y_tol_varianza_juntas():
+    with pytest.raises(ValueError):
+        CriterioConvergencia(ventana=5)
+    with pytest.raises(ValueError):
+        CriterioConvergencia(tol_delta=0.1, tol_varianza=1e-6)
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+from modelo_felicidad import calculate_happiness
+
+
+def cobb_douglas(alpha, horas, factores):
+    factores = np.maximum(0.1, np.asarray(factores, dtype=float))
+    return np.round(((factores ** alpha * horas ** (1 - alpha)) * 5) / 11, 2)
+
+
+@pytest.mark.parametrize("n_alphas, n_horas", [(1, 1), (50, 1), (1, 20), (30, 30)])
+def test_tablas_coinciden_con_la_formula(n_alphas, n_horas):
+    # Las tablas de consulta deben dar exactamente la fórmula directa
+    factores = np.random.default_rng(0).integers(0, 6, 5000)
+    alphas = np.linspace(0, 1, n_alphas) if n_alphas > 1 else 0.3
+    horas = np.linspace(1, 12, n_horas) if n_horas > 1 else 8
+    felicidad = calculate_happiness(alphas, factores, horas=horas)
+
+    if n_alphas > 1 or n_horas > 1:
+        directa = cobb_douglas(np.atleast_1d(alphas)[:, None], np.atleast_1d(horas)[:, None], factores)
+    else:
+        directa = cobb_douglas(alphas, horas, factores)
+    assert felicidad.shape == directa.shape
+    assert np.array_equal(felicidad, directa)
@@ -0,0 +1,69 @@
+import os
+
+import numpy as np
+import pytest
+
+import motor_teselas
+from motor_teselas import MotorTeselado
+from motor_vectorizado import MotorSocial
+from poblacion import inicializar_agentes
+
+N, WIDTH, HEIGHT = 400, 30, 30
+
+
+def test_traspaso_conserva_agentes():
+    agentes = inicializar_agentes(None, None, N, WIDTH, HEIGHT, seed=0)
+    with MotorTeselado(N, WIDTH, HEIGHT, agentes_iniciales=agentes, seed=1, teselas=2) as motor:
+        ocupacion = motor._memoria.arrays["ocupacion"]
+        suma_felicidad = motor._memoria.arrays["suma_felicidad"]
+        for _ in range(20):
+            x, y, happiness = motor.x.copy(), motor.y.copy(), motor.happiness.copy()
+            motor.avanzar(1)
+            # Cada agente avanza como mucho una celda (también al cruzar de tesela)
+            assert np.all(np.minimum(abs(motor.x - x), WIDTH - abs(motor.x - x)) <= 1)
+            assert np.all(np.minimum(abs(motor.y - y), HEIGHT - abs(motor.y - y)) <= 1)
+            # La rejilla se reconstruye tras el traspaso y antes de la
+            # influencia: cada agente cuenta una vez, con su felicidad anterior
+            celdas = motor.x * HEIGHT + motor.y
+            assert np.array_equal(ocupacion.ravel(), np.bincount(celdas, minlength=WIDTH * HEIGHT))
+            assert ocupacion.sum() == N
+            assert np.isclose(suma_felicidad.sum(), happiness.sum())
+        assert motor.steps == 20
+
+
+def test_estadisticas_como_motor_social():
+    # Mismas reglas que MotorSocial con un generador por tesela: se compara la
+    # media de varias réplicas, como MotorSocial frente a SocialModel
+    finales = {"teselas": [], "motor": []}
+    for semilla in range(8):
+        agentes = inicializar_agentes(None, None, N, WIDTH, HEIGHT, seed=semilla)
+        motor = MotorSocial(N, WIDTH, HEIGHT, seed=semilla, agentes_iniciales=agentes)
+        with MotorTeselado(N, WIDTH, HEIGHT, agentes_iniciales=agentes, seed=semilla,
+                           teselas=2) as teselado:
+            for _ in range(40):
+                motor.step()
+                teselado.step()
+            finales["teselas"].append((teselado.happiness.mean(), teselado.happiness.std(ddof=1)))
+        finales["motor"].append((motor.happiness.mean(), motor.happiness.std(ddof=1)))
+
+    teselas, motor = np.mean(finales["teselas"], axis=0), np.mean(finales["motor"], axis=0)
+    assert abs(teselas[0] - motor[0]) < 0.01
+    assert abs(teselas[1] - motor[1]) < 0.02
+
+
+def test_error_en_una_tesela(monkeypatch):
+    # Fallo solo en los procesos hijos (heredan el parche al hacer fork)
+    padre = os.getpid()
+    original = motor_teselas.desplazamientos_vecindad
+
+    def desplazamientos(width, height):
+        if os.getpid() != padre:
+            raise ValueError("fallo de prueba")
+        return original(width, height)
+
+    if motor_teselas.mp.get_start_method() != "fork":
+        pytest.skip("el parche solo llega a los procesos con fork")
+    monkeypatch.setattr(motor_teselas, "desplazamientos_vecindad", desplazamientos)
+    agentes = inicializar_agentes(None, None, 50, 10, 10, seed=0)
+    with pytest.raises(RuntimeError, match="fallo de prueba"):
+        MotorTeselado(50, 10, 10, agentes_iniciales=agentes, seed=1, teselas=2)
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from graphics import SocialModel, obtener_ruta_datos
+from motor_vectorizado import MotorSocial, desplazamientos_vecindad, estadisticas_mesa
+from poblacion import agentes_desde_excel, inicializar_agentes
+
+
+@pytest.mark.parametrize("width, height, vecinas", [(30, 30, 8), (2, 30, 5), (2, 2, 3), (1, 3, 2), (1, 1, 0)])
+def test_desplazamientos_sin_repetir(width, height, vecinas):
+    desplazamientos = desplazamientos_vecindad(width, height)
+    assert len(desplazamientos) == vecinas
+    celdas = {(dx % width, dy % height) for dx, dy in desplazamientos.tolist()}
+    assert len(celdas) == vecinas and (0, 0) not in celdas
+
+
+@pytest.mark.parametrize("width, height", [(2, 2), (2, 5), (1, 4), (5, 5)])
+def test_influencia_igual_que_social_model(width, height):
+    # La influencia no usa el generador: en rejillas estrechas ambos motores
+    # deben contar las mismas vecinas
+    agentes = inicializar_agentes(None, None, 20, width, height, seed=0)
+    motor = MotorSocial(20, width, height, agentes_iniciales=agentes)
+    model = SocialModel(20, width, height, None, agentes_iniciales=agentes,
+                        actualizacion_simultanea=True)
+    esperada = model.fase_influir()
+    motor.interact_and_influence()
+    esperada = np.where(np.isnan(esperada), agentes["happiness"], esperada)
+    assert np.allclose(motor.happiness, esperada, rtol=0, atol=1e-12)
+
+
+def test_estadisticas_como_social_model_simultaneo():
+    # Mismas reglas con otro generador: se compara la media de varias réplicas
+    ruta = obtener_ruta_datos("model_FB.xlsx")
+    finales = {"mesa": [], "motor": []}
+    for semilla in range(16):
+        agentes = agentes_desde_excel(ruta, 400, 30, 30, seed=semilla)
+        model = SocialModel(400, 30, 30, None, seed=semilla, agentes_iniciales=agentes,
+                            actualizacion_simultanea=True)
+        motor = MotorSocial(400, 30, 30, seed=semilla, agentes_iniciales=agentes)
+        for _ in range(60):
+            model.step()
+            motor.step()
+        for clave, tabla in (("mesa", estadisticas_mesa(model)), ("motor", motor.estadisticas())):
+            finales[clave].append(tabla[["Felicidad_media", "Felicidad_std"]].iloc[-1].to_numpy(float))
+
+    mesa, motor = np.mean(finales["mesa"], axis=0), np.mean(finales["motor"], axis=0)
+    assert abs(mesa[0] - motor[0]) < 0.002
+    assert abs(mesa[1] - motor[1]) < 0.0075
@@ -0,0 +1,34 @@
+import pytest
+
+from graphics import SocialModel
+from motor_vectorizado import MotorSocial
+from perfilado import FASES_MOTOR, Perfilador
+from poblacion import inicializar_agentes
+
+AGENTES = inicializar_agentes(None, None, 50, 10, 10, seed=0)
+
+
+@pytest.mark.parametrize("crear", [
+    lambda p: SocialModel(50, 10, 10, None, seed=1, agentes_iniciales=AGENTES, perfilador=p),
+    lambda p: MotorSocial(50, 10, 10, seed=1, agentes_iniciales=AGENTES, perfilador=p),
+])
+def test_tabla_por_paso_separa_movimiento_e_influencia(crear):
+    perfilador = Perfilador()
+    model = crear(perfilador)
+    for _ in range(3):
+        model.step()
+
+    tabla = perfilador.tabla_por_paso()
+    assert list(tabla["Step"]) == [0, 1, 2]
+    for fase in FASES_MOTOR:
+        assert (tabla[f"{fase}_s"] > 0).all()
+    assert set(FASES_MOTOR) <= set(perfilador.resumen()["fase"])
+
+
+def test_sin_perfilador_misma_trayectoria():
+    con = SocialModel(50, 10, 10, None, seed=1, agentes_iniciales=AGENTES, perfilador=Perfilador())
+    sin = SocialModel(50, 10, 10, None, seed=1, agentes_iniciales=AGENTES)
+    for _ in range(3):
+        con.step()
+        sin.step()
+    assert (con.felicidad == sin.felicidad).all()
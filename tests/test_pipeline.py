@@ -0,0 +1,113 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import pipeline
+
+REDES = ["FB", "IG"]
+
+
+@pytest.fixture
+def entorno(tmp_path, monkeypatch):
+    """
+    Pipeline en una carpeta temporal con etapas falsas que solo escriben sus
+    salidas; devuelve la lista de llamadas y el conjunto de redes que fallan.
+    """
+    for nombre, ruta in (("PROJECT_ROOT", tmp_path),
+                         ("DATA_FILE", tmp_path / "data" / "3145_data.xlsx"),
+                         ("CLEAN_DATA_DIR", tmp_path / "clean_data"),
+                         ("RESULTADOS_DIR", tmp_path / "resultados"),
+                         ("ARCHIVO_ESTADO", tmp_path / "clean_data" / ".cache" / "pipeline.json")):
+        monkeypatch.setattr(pipeline, nombre, str(ruta))
+    os.makedirs(tmp_path / "data")
+    (tmp_path / "data" / "3145_data.xlsx").write_text("CIS")
+
+    llamadas, fallan = [], set()
+
+    def escribir(ruta, texto):
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        with open(ruta, "w") as f:
+            f.write(texto)
+
+    def procesar_redes(redes, raiz):
+        for red in redes:
+            llamadas.append(f"filtrar:{red}")
+            escribir(pipeline.ruta_limpia(red), red)
+
+    def modelo_y_calibracion(red, alpha, horas, hacer_modelo, hacer_calibracion):
+        if red in fallan:
+            raise RuntimeError(f"No se pudo generar el modelo de {red}")
+        if hacer_modelo:
+            llamadas.append(f"modelo:{red}")
+            escribir(pipeline.ruta_modelo(red), f"{red} {alpha} {horas}")
+        if hacer_calibracion:
+            llamadas.append(f"calibrar:{red}")
+            escribir(pipeline.ruta_calibracion(red), f"{red} {alpha}")
+
+    monkeypatch.setattr(pipeline, "procesar_redes", procesar_redes)
+    monkeypatch.setattr(pipeline, "_modelo_y_calibracion", modelo_y_calibracion)
+    # Hilos en lugar de procesos: las etapas falsas y los parches se comparten
+    monkeypatch.setattr(pipeline, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(pipeline, "conectar_tablas", lambda nombre: None)
+    return llamadas, fallan
+
+
+def todas(redes):
+    return {f"{etapa}:{red}" for etapa in ("filtrar", "modelo", "calibrar") for red in redes}
+
+
+def test_repetir_no_hace_nada(entorno):
+    llamadas, _ = entorno
+    assert pipeline.ejecutar_pipeline(REDES) == todas(REDES)
+    assert sorted(llamadas) == sorted(todas(REDES))
+
+    llamadas.clear()
+    assert pipeline.ejecutar_pipeline(REDES) == set()
+    assert llamadas == []
+
+
+def test_cambiar_alpha_solo_invalida_modelo_y_calibracion(entorno):
+    llamadas, _ = entorno
+    pipeline.ejecutar_pipeline(REDES, alpha=0.2)
+    llamadas.clear()
+
+    esperadas = {f"{etapa}:{red}" for etapa in ("modelo", "calibrar") for red in REDES}
+    etapas = pipeline.construir_grafo(REDES, 0.4, 8.0)
+    assert pipeline.etapas_pendientes(etapas, pipeline.cargar_estado()) == esperadas
+    assert pipeline.ejecutar_pipeline(REDES, alpha=0.4) == esperadas
+    assert sorted(llamadas) == sorted(esperadas)
+
+
+def test_salida_modificada_se_rehace(entorno):
+    llamadas, _ = entorno
+    pipeline.ejecutar_pipeline(REDES)
+    with open(pipeline.ruta_modelo("FB"), "w") as f:
+        f.write("otro alpha desde el menú")
+    assert pipeline.ejecutar_pipeline(REDES) == {"modelo:FB", "calibrar:FB"}
+
+
+def test_red_fallida_no_se_registra(entorno):
+    llamadas, fallan = entorno
+    fallan.add("IG")
+    with pytest.raises(RuntimeError, match="IG"):
+        pipeline.ejecutar_pipeline(REDES)
+
+    estado = pipeline.cargar_estado()
+    assert {"filtrar:FB", "filtrar:IG", "modelo:FB", "calibrar:FB"} <= set(estado)
+    assert "modelo:IG" not in estado and "calibrar:IG" not in estado
+
+    fallan.clear()
+    llamadas.clear()
+    assert pipeline.ejecutar_pipeline(REDES) == {"modelo:IG", "calibrar:IG"}
+
+
+@pytest.mark.parametrize("modelo, correlacion", [(None, 0.5), ("tabla", None)])
+def test_etapa_sin_resultado_falla(monkeypatch, tmp_path, modelo, correlacion):
+    monkeypatch.setattr(pipeline, "RESULTADOS_DIR", str(tmp_path))
+    monkeypatch.setattr(pipeline, "simulated_happiness", lambda *args: modelo)
+    monkeypatch.setattr(pipeline, "calcular_correlacion", lambda *args: correlacion)
+    monkeypatch.setattr(pipeline, "metricas_modelo", lambda *args, **kw: None)
+    with pytest.raises(RuntimeError):
+        pipeline._modelo_y_calibracion("FB", 0.2, 8.0, True, True)
+    assert not os.path.exists(pipeline.ruta_calibracion("FB"))
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from convergencia import CriterioConvergencia
+from graphics import SocialModel
+from motor_vectorizado import MotorSocial
+from poblacion import inicializar_agentes
+from puntos_control import cargar_checkpoint, guardar_checkpoint
+from recolector import estado_agentes, posiciones_agentes
+
+N, WIDTH, HEIGHT = 100, 10, 10
+AGENTES = inicializar_agentes(None, None, N, WIDTH, HEIGHT, seed=0)
+
+
+def avanzar(model, pasos):
+    for _ in range(pasos):
+        if not model.running:
+            break
+        model.step()
+
+def comprobar_igual(a, b):
+    for x, y in zip(estado_agentes(a) + posiciones_agentes(a), estado_agentes(b) + posiciones_agentes(b)):
+        assert np.array_equal(x, y)
+    assert a.running == b.running
+    assert a.paso_convergencia == b.paso_convergencia
+
+
+MODOS = {
+    "secuencial": lambda **kw: SocialModel(N, WIDTH, HEIGHT, None, seed=3, agentes_iniciales=AGENTES, **kw),
+    "simultanea": lambda **kw: SocialModel(N, WIDTH, HEIGHT, None, seed=3, agentes_iniciales=AGENTES,
+                                           actualizacion_simultanea=True, **kw),
+    "motor": lambda **kw: MotorSocial(N, WIDTH, HEIGHT, seed=3, agentes_iniciales=AGENTES, **kw),
+    "topologia": lambda **kw: SocialModel(N, WIDTH, HEIGHT, None, seed=3, agentes_iniciales=AGENTES,
+                                          topologia=("watts_strogatz", {}), **kw),
+    "topologia_motor": lambda **kw: MotorSocial(N, WIDTH, HEIGHT, seed=3, agentes_iniciales=AGENTES,
+                                                topologia=("watts_strogatz", {}), **kw),
+}
+
+
+@pytest.mark.parametrize("modo", MODOS)
+def test_reanudar_es_identico(modo, tmp_path):
+    original = MODOS[modo]()
+    avanzar(original, 10)
+    ruta = guardar_checkpoint(original, tmp_path / "corrida")
+    avanzar(original, 10)
+
+    reanudado = cargar_checkpoint(ruta)
+    avanzar(reanudado, 10)
+    comprobar_igual(original, reanudado)
+
+
+@pytest.mark.parametrize("modo", MODOS)
+def test_topologia_sin_semilla(modo, tmp_path):
+    # La matriz guardada no depende de volver a generar el grafo
+    original = MODOS[modo]()
+    ruta = guardar_checkpoint(original, tmp_path / "corrida")
+    reanudado = cargar_checkpoint(ruta)
+    if original.topologia is None:
+        assert reanudado.topologia is None
+        return
+    for x, y in zip((original.topologia.indptr, original.topologia.indices, original.grados),
+                    (reanudado.topologia.indptr, reanudado.topologia.indices, reanudado.grados)):
+        assert np.array_equal(x, y)
+
+
+@pytest.mark.parametrize("modo", ["secuencial", "simultanea", "motor"])
+@pytest.mark.parametrize("criterio", [
+    {"tol_delta": 0.05},
+    {"ventana": 5, "tol_varianza": 1e-6},
+])
+def test_reanudar_con_convergencia(modo, criterio, tmp_path):
+    original = MODOS[modo](convergencia=CriterioConvergencia(**criterio))
+    avanzar(original, 8)
+    assert original.running
+    ruta = guardar_checkpoint(original, tmp_path / "corrida")
+    avanzar(original, 300)
+    assert original.paso_convergencia is not None
+
+    reanudado = cargar_checkpoint(ruta)
+    avanzar(reanudado, 300)
+    comprobar_igual(original, reanudado)
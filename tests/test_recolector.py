@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from motor_vectorizado import MotorSocial
+from poblacion import inicializar_agentes
+from recolector import RecolectorStreaming
+
+AGENTES = inicializar_agentes(None, None, 40, 8, 8, seed=0)
+
+
+@pytest.mark.parametrize("intervalo", [0, -1])
+def test_intervalo_no_positivo(intervalo, tmp_path):
+    with pytest.raises(ValueError):
+        RecolectorStreaming(tmp_path, intervalo=intervalo)
+
+
+def test_intervalo_y_agregados(tmp_path):
+    recolector = RecolectorStreaming(tmp_path, intervalo=3, tam_bloque=50)
+    motor = MotorSocial(40, 8, 8, seed=1, agentes_iniciales=AGENTES, recolector=recolector)
+    referencia = MotorSocial(40, 8, 8, seed=1, agentes_iniciales=AGENTES)
+    motor.run(10)
+    referencia.run(10)
+
+    tabla = recolector.estadisticas()
+    esperada = referencia.estadisticas().iloc[::3].reset_index(drop=True)
+    assert tabla["Step"].tolist() == [0, 3, 6, 9]
+    assert np.allclose(tabla["Felicidad_media"], esperada["Felicidad_media"])
+    assert np.allclose(tabla["Felicidad_std"], esperada["Felicidad_std"])
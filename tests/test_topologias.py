@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+nx = pytest.importorskip("networkx")
+from topologias import grado, influencia_red, preparar_topologia
+
+
+@pytest.mark.parametrize("topologia, N", [
+    (("erdos_renyi", {"p": 0.0}), 10),
+    (nx.empty_graph(10), None),
+    (nx.empty_graph(1), None),
+])
+def test_grafo_sin_aristas(topologia, N):
+    matriz = preparar_topologia(topologia, N, seed=1)
+    n = matriz.shape[0]
+    assert np.array_equal(matriz.indptr, np.zeros(n + 1))
+    assert len(matriz.indices) == 0
+
+    # Sin vecinos la felicidad no cambia
+    happiness = np.linspace(0, 5, n)
+    nueva = influencia_red(matriz, grado(matriz), happiness, np.ones(n))
+    assert np.array_equal(nueva, happiness)